@@ -5,12 +5,23 @@ load_dotenv()
 API_BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")
 SESSION_ID = f"s-{uuid.uuid4().hex[:6]}"
 
+RETRIES = 2
+
 def send(text, account_number=None):
     url = f"{API_BASE}/chat"
-    payload = {"session_id": SESSION_ID, "text": text}
+    # one key per message: a retry after a timeout replays the original reply
+    # instead of re-running the flows (no second ticket, no second LLM call)
+    payload = {"session_id": SESSION_ID, "text": text, "idempotency_key": uuid.uuid4().hex}
     if account_number:
         payload["account_number"] = account_number
-    r = requests.post(url, json=payload, timeout=30)
+    for attempt in range(RETRIES + 1):
+        try:
+            r = requests.post(url, json=payload, timeout=30)
+            break
+        except (requests.Timeout, requests.ConnectionError):
+            if attempt == RETRIES:
+                raise
+            print("(retrying...)", file=sys.stderr)
     r.raise_for_status()
     return r.json()
 
@@ -1 +1,4 @@
-# package
\ No newline at end of file
+# package
+import time as _time
+
+IMPORT_STARTED = _time.perf_counter()  # reference point for start-up timings (natlang.warmup)
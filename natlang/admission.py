@@ -0,0 +1,106 @@
+"""Admission control in front of the sentiment backend.
+
+At most `limit` upstream calls run at once. Further turns wait in a priority
+queue ordered by a lexicon pre-scan (safety first, then profanity / complaint /
+conduct escalations, then everything else; FIFO within a class), so a hazard
+report is next in line no matter how many routine replies are waiting. A turn
+that cannot be admitted within `max_wait`, or arrives when the queue is full,
+is shed to the local analyzer instead of waiting on the LLM.
+"""
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+from typing import Callable, List, Optional
+from .config import SENTIMENT_CONCURRENCY, SENTIMENT_QUEUE_MAX, SENTIMENT_MAX_WAIT_SECONDS
+from .lexicon import scan
+from .metrics import REGISTRY, Counter, Gauge
+from .models import SentimentResult
+from .logger import get_logger
+
+log = get_logger("natlang.admission")
+
+PRIORITY_SAFETY, PRIORITY_ESCALATION, PRIORITY_ROUTINE = 0, 1, 2
+PRIORITY_NAMES = {PRIORITY_SAFETY: "safety", PRIORITY_ESCALATION: "escalation", PRIORITY_ROUTINE: "routine"}
+ADMISSIONS = REGISTRY.register(Counter("natlang_sentiment_admissions_total", "Sentiment calls by admission outcome and priority.", ["outcome", "priority"]))
+
+
+def classify(text: str) -> int:
+    cats = scan(text)
+    if "safety" in cats:
+        return PRIORITY_SAFETY
+    if cats & {"profanity", "complaint", "conduct"}:
+        return PRIORITY_ESCALATION
+    return PRIORITY_ROUTINE
+
+
+class _Waiter:
+    __slots__ = ("granted", "cancelled", "event")
+
+    def __init__(self):
+        self.granted = False; self.cancelled = False
+        self.event = threading.Event()
+
+
+class AdmissionGate:
+    def __init__(self, limit: int = SENTIMENT_CONCURRENCY, max_queue: int = SENTIMENT_QUEUE_MAX, max_wait: float = SENTIMENT_MAX_WAIT_SECONDS):
+        self.limit = limit; self.max_queue = max_queue; self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0  # live (not cancelled) entries in the heap
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def depth(self) -> int:
+        return self.waiting
+
+    def _acquire(self, priority: int, max_wait: float) -> Optional[str]:
+        """Take a slot; returns None when admitted, else the shed reason."""
+        with self._lock:
+            if self.active < self.limit and not self.waiting:
+                self.active += 1
+                return None
+            if self.waiting >= self.max_queue:
+                return "shed_full"
+            w = _Waiter()
+            heapq.heappush(self._heap, (priority, next(self._seq), w))
+            self.waiting += 1
+        if w.event.wait(max_wait):
+            return None
+        with self._lock:
+            if w.granted:
+                return None  # handed a slot just as the wait expired
+            w.cancelled = True
+            self.waiting -= 1
+        return "shed_wait"
+
+    def _release(self):
+        with self._lock:
+            while self._heap:
+                _, _, w = heapq.heappop(self._heap)
+                if w.cancelled:
+                    continue
+                # hand the slot straight to the best waiter (active count unchanged)
+                w.granted = True; self.waiting -= 1
+                w.event.set()
+                return
+            self.active -= 1
+
+    def run(self, text: str, call: Callable[[str], SentimentResult], fallback: Callable[[str], SentimentResult]) -> SentimentResult:
+        priority = classify(text)
+        shed = self._acquire(priority, self.max_wait)
+        label = PRIORITY_NAMES[priority]
+        if shed:
+            ADMISSIONS.inc(outcome=shed, priority=label)
+            log.warning("Sentiment overload (%s, depth=%d): using local analyzer for %s turn", shed, self.waiting, label)
+            return fallback(text)
+        ADMISSIONS.inc(outcome="admitted", priority=label)
+        try:
+            return call(text)
+        finally:
+            self._release()
+
+
+sentiment_gate = AdmissionGate()
+REGISTRY.register(Gauge("natlang_sentiment_queue_depth", "Turns waiting for a sentiment call slot.", fn=sentiment_gate.depth))
+REGISTRY.register(Gauge("natlang_sentiment_inflight", "Sentiment calls currently running.", fn=lambda: sentiment_gate.active))
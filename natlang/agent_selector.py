@@ -1,6 +1,29 @@
-def select_best_available_agent(domain: str):
-    if domain == 'OUTAGE':
-        return 'agent_outage_csat_top'
-    if domain == 'CSR_EMERGENCY':
-        return 'agent_csr_emergency'
-    return 'agent_billing_csat_top'
+from __future__ import annotations
+from typing import Optional
+from .models import Ticket
+from .routing import RoutingEngine
+from .storage import store
+
+def _skill(domain: str) -> str:
+    if domain in ('OUTAGE', 'CSR_EMERGENCY'):
+        return domain
+    return 'BILLING'
+
+def _on_assigned(ticket_id: str, agent_id: str):
+    # a queued ticket just got an agent; reflect it on the stored ticket
+    store.assign_ticket(ticket_id, agent_id)
+
+routing_engine = RoutingEngine(on_assigned=_on_assigned)
+store.add_listener("ticket_closed", lambda t: routing_engine.release(t.id))
+
+def select_best_available_agent(domain: str, ticket: Optional[Ticket] = None) -> Optional[str]:
+    """Least-loaded available agent for the domain's skill pool.
+
+    With a ticket, the ticket is assigned (counting against the agent's load) or,
+    when every agent is at capacity, queued by priority and None is returned.
+    Without one, this only peeks at who would be picked.
+    """
+    skill = _skill(domain)
+    if ticket is None:
+        return routing_engine.peek(skill)
+    return routing_engine.assign(ticket.id, ticket.priority.value, skill)
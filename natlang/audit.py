@@ -0,0 +1,145 @@
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from .config import AUDIT_QUEUE_MAX, AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS
+from .storage import store
+from .metrics import REGISTRY, Gauge
+from .logger import get_logger
+
+log = get_logger("natlang.audit")
+
+
+@dataclass
+class AuditEvent:
+    kind: str                      # "feedback" | "interaction"
+    session_id: str
+    ticket_id: Optional[str]
+    text: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+
+def _materialize(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn deferred objects (EmotionScore lists, SentimentResult) into plain data at write time."""
+    out = dict(payload)
+    emotions = out.get("emotions")
+    if emotions and not isinstance(emotions[0], tuple):
+        out["emotions"] = [(e.type, e.score) for e in emotions]
+    return out
+
+
+def store_sink(batch: List[AuditEvent]):
+    for e in batch:
+        if e.kind == "feedback":
+            store.add_feedback(e.session_id, e.ticket_id, e.text, _materialize(e.payload),
+                               ts=datetime.fromtimestamp(e.ts, timezone.utc).isoformat())
+        elif e.kind == "interaction":
+            sr = e.payload.get("sr")
+            sentiment = sr.to_dict() if sr is not None else e.payload.get("sentiment", {"note": "menu"})
+            store.add_interaction(e.session_id, e.text, e.payload.get("bot_text", ""), sentiment,
+                                  ts=datetime.fromtimestamp(e.ts, timezone.utc).isoformat(),
+                                  flow=e.payload.get("flow"), actions=e.payload.get("actions"),
+                                  account_number=e.payload.get("account_number"))
+
+
+class AuditBus:
+    """In-process audit event bus.
+
+    `emit()` appends to a deque (atomic in CPython, so no queue lock on the
+    request path); a background consumer drains it in batches and hands each
+    batch to every sink. When the queue is full the emitting thread queues its
+    event and drains the queue itself (counted as backpressure) rather than
+    dropping audit data, so events are still written in emit order.
+    Until `start()` is called every emit is written inline, which keeps scripts
+    and tests deterministic.
+    """
+
+    def __init__(self, maxsize: int = AUDIT_QUEUE_MAX, batch_size: int = AUDIT_BATCH_SIZE, flush_interval: float = AUDIT_FLUSH_SECONDS):
+        self.maxsize = maxsize; self.batch_size = batch_size; self.flush_interval = flush_interval
+        self.sinks: List[Callable[[List[AuditEvent]], None]] = [store_sink]
+        self.stats = {"emitted": 0, "written": 0, "batches": 0, "backpressure": 0, "sink_errors": 0, "max_depth": 0}
+        self._q: deque = deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def depth(self) -> int:
+        return len(self._q)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def emit(self, event: AuditEvent):
+        self._count("emitted")
+        if not self.running:
+            self._write([event]); return
+        full = len(self._q) >= self.maxsize
+        self._q.append(event)
+        if full:
+            # writing this event alone would put it ahead of the queued ones
+            self._count("backpressure")
+            self.flush(); return
+        depth = len(self._q)
+        with self._stats_lock:
+            if depth > self.stats["max_depth"]: self.stats["max_depth"] = depth
+        if depth >= self.batch_size:
+            self._wake.set()
+
+    def flush(self):
+        with self._flush_lock:
+            while self._q:
+                batch = []
+                try:
+                    while len(batch) < self.batch_size:
+                        batch.append(self._q.popleft())
+                except IndexError:
+                    pass
+                self._write(batch)
+
+    def _write(self, batch: List[AuditEvent]):
+        for sink in self.sinks:
+            try:
+                sink(batch)
+            except Exception as e:
+                self._count("sink_errors")
+                log.error("Audit sink %s failed for %d events: %s", getattr(sink, "__name__", sink), len(batch), e)
+        with self._stats_lock:
+            self.stats["written"] += len(batch); self.stats["batches"] += 1
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="natlang-audit", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set(); self._wake.set()
+        if self._thread: self._thread.join(timeout=5)
+        self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+audit_bus = AuditBus()
+REGISTRY.register(Gauge("natlang_audit_queue_depth", "Audit events waiting for the background writer.", fn=audit_bus.depth))
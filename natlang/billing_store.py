@@ -1,21 +1,212 @@
+"""Billing request ledger.
+
+Requests are kept by SR id (`requests`, O(1) existence and ownership checks)
+and indexed by created_at three ways: over the whole ledger, per account and
+per issue type. Each index is a sorted list of (created_at epoch, sr_id); new
+requests arrive in time order, so adding one is an append, and a range query
+("this account's disputes this quarter", "refunds last month") is two
+bisections plus the matching slice, never a scan of the ledger.
+"""
 from __future__ import annotations
-from typing import Dict, Optional
+import gc
+import json
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from datetime import datetime, timezone
 
+Time = Union[datetime, str, float, None]   # datetime, ISO-8601 text (naive = UTC) or epoch seconds
+
+
+def _epoch(t: Time) -> Optional[float]:
+    if t is None or isinstance(t, (int, float)):
+        return None if t is None else float(t)
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t.replace("Z", "+00:00"))
+    return (t if t.tzinfo else t.replace(tzinfo=timezone.utc)).timestamp()
+
+
+class TimeIndex:
+    """(created_at epoch, sr_id) pairs in sorted order."""
+    __slots__ = ("keys",)
+
+    def __init__(self):
+        self.keys: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, t: float, sr_id: str):
+        k = (t, sr_id)
+        if not self.keys or self.keys[-1] <= k: self.keys.append(k)
+        else: insort(self.keys, k)
+
+    def extend(self, keys: List[Tuple[float, str]]):
+        self.keys.extend(keys); self.keys.sort()  # timsort: cheap when the new run is already ordered
+
+    def discard(self, t: float, sr_id: str):
+        i = bisect_left(self.keys, (t, sr_id))
+        if i < len(self.keys) and self.keys[i] == (t, sr_id): del self.keys[i]
+
+    def _bounds(self, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        lo = 0 if since is None else bisect_left(self.keys, (since,))
+        hi = len(self.keys) if until is None else bisect_left(self.keys, (until,))
+        return lo, max(lo, hi)
+
+    def between(self, since: Optional[float] = None, until: Optional[float] = None) -> List[str]:
+        """SR ids created in [since, until), oldest first."""
+        lo, hi = self._bounds(since, until)
+        return [sr_id for _, sr_id in self.keys[lo:hi]]
+
+    def count(self, since: Optional[float] = None, until: Optional[float] = None) -> int:
+        lo, hi = self._bounds(since, until)
+        return hi - lo
+
+
 class BillingStore:
     def __init__(self):
         self.requests: Dict[str, Dict] = {}
+        self.by_time = TimeIndex()
+        self.by_account: Dict[str, TimeIndex] = {}
+        self.by_issue: Dict[str, TimeIndex] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, item: Dict, t: float):
+        sr_id = item["service_request"]
+        self.by_time.add(t, sr_id)
+        for table, key in ((self.by_account, item["account_number"]), (self.by_issue, item["issue_type"])):
+            if key:
+                index = table.get(key)
+                if index is None: index = table[key] = TimeIndex()
+                index.add(t, sr_id)
+
+    def _unindex(self, item: Dict):
+        t, sr_id = _epoch(item["created_at"]), item["service_request"]
+        self.by_time.discard(t, sr_id)
+        for table, key in ((self.by_account, item["account_number"]), (self.by_issue, item["issue_type"])):
+            index = table.get(key)
+            if index is not None:
+                index.discard(t, sr_id)
+                if not index: del table[key]
 
-    def create_request(self, account_number: Optional[str], first_name: Optional[str], last_name: Optional[str], issue_type: str, sr_id: str) -> Dict:
+    def create_request(self, account_number: Optional[str], first_name: Optional[str], last_name: Optional[str], issue_type: str, sr_id: str,
+                       created_at: Optional[datetime] = None) -> Dict:
+        created_at = created_at or datetime.now(timezone.utc)
         item = {
             "account_number": account_number, "first_name": first_name, "last_name": last_name,
             "issue_type": issue_type, "service_request": sr_id,
-            "created_at": datetime.now(timezone.utc).isoformat(),
+            "created_at": created_at.isoformat(),
         }
-        self.requests[sr_id] = item
+        with self._lock:
+            old = self.requests.get(sr_id)
+            if old is not None:
+                self._unindex(old)
+            self.requests[sr_id] = item
+            self._index(item, _epoch(created_at))
         return item
 
     def get_request(self, sr_id: str) -> Optional[Dict]:
         return self.requests.get(sr_id)
 
+    def exists(self, sr_id: str) -> bool:
+        return sr_id in self.requests
+
+    def owned_by(self, sr_id: str, account_number: Optional[str]) -> bool:
+        """True if the request exists and was filed for this account."""
+        item = self.requests.get(sr_id)
+        return item is not None and account_number is not None and item["account_number"] == account_number
+
+    def remove(self, sr_id: str) -> Optional[Dict]:
+        with self._lock:
+            item = self.requests.pop(sr_id, None)
+            if item is not None:
+                self._unindex(item)
+        return item
+
+    def query(self, account_number: Optional[str] = None, issue_type: Optional[str] = None,
+              since: Time = None, until: Time = None, limit: Optional[int] = None) -> List[Dict]:
+        """Requests created in [since, until), oldest first, optionally for one account and/or issue type."""
+        lo, hi = _epoch(since), _epoch(until)
+        with self._lock:
+            if account_number is not None:
+                index = self.by_account.get(account_number)
+                filter_issue = issue_type
+            elif issue_type is not None:
+                index = self.by_issue.get(issue_type); filter_issue = None
+            else:
+                index = self.by_time; filter_issue = None
+            ids = index.between(lo, hi) if index is not None else []
+            out = []
+            for sr_id in ids:
+                item = self.requests[sr_id]
+                if filter_issue is None or item["issue_type"] == filter_issue:
+                    out.append(item)
+                    if limit is not None and len(out) >= limit: break
+        return out
+
+    def ids_between(self, since: Time = None, until: Time = None) -> List[str]:
+        with self._lock:
+            return self.by_time.between(_epoch(since), _epoch(until))
+
+    def issue_counts(self, since: Time = None, until: Time = None, account_number: Optional[str] = None) -> Dict[str, int]:
+        """Requests per issue type created in [since, until) (bisections only, unless filtered to an account)."""
+        lo, hi = _epoch(since), _epoch(until)
+        with self._lock:
+            if account_number is None:
+                counts = {issue: index.count(lo, hi) for issue, index in self.by_issue.items()}
+            else:
+                counts = {}
+                index = self.by_account.get(account_number)
+                for sr_id in (index.between(lo, hi) if index is not None else ()):
+                    issue = self.requests[sr_id]["issue_type"]
+                    counts[issue] = counts.get(issue, 0) + 1
+        return {k: v for k, v in counts.items() if v}
+
+    def bulk_import(self, records: Iterable[Dict]) -> int:
+        """Load historical requests (dicts shaped like create_request's, e.g. a billing export).
+
+        Ids already in the ledger are skipped, so re-running an import is harmless.
+        Indexes are sorted once per import rather than per record. Returns how many were added.
+        """
+        # millions of new dicts would set off the cyclic GC over and over; nothing here forms cycles
+        gc_was_enabled = gc.isenabled(); gc.disable()
+        try:
+            staged: Dict[str, Tuple[Tuple[float, str], Dict]] = {}
+            for r in records:
+                sr_id, issue, created = r.get("service_request"), r.get("issue_type"), r.get("created_at")
+                if not sr_id or not issue or not created:
+                    raise ValueError(f"billing record needs service_request, issue_type and created_at: {r!r}")
+                if sr_id in staged: continue
+                t = _epoch(created)
+                if not isinstance(created, str):
+                    created = datetime.fromtimestamp(t, timezone.utc).isoformat()
+                staged[sr_id] = ((t, sr_id), {"account_number": r.get("account_number"), "first_name": r.get("first_name"),
+                                              "last_name": r.get("last_name"), "issue_type": issue,
+                                              "service_request": sr_id, "created_at": created})
+            with self._lock:
+                new_time: List[Tuple[float, str]] = []
+                new_account: Dict[str, List[Tuple[float, str]]] = {}
+                new_issue: Dict[str, List[Tuple[float, str]]] = {}
+                requests = self.requests
+                for sr_id, (key, item) in staged.items():
+                    if sr_id in requests: continue
+                    requests[sr_id] = item
+                    new_time.append(key)  # one key tuple shared by all three indexes
+                    if item["account_number"]:
+                        new_account.setdefault(item["account_number"], []).append(key)
+                    new_issue.setdefault(item["issue_type"], []).append(key)
+                self.by_time.extend(new_time)
+                for table, new in ((self.by_account, new_account), (self.by_issue, new_issue)):
+                    for k, keys in new.items():
+                        index = table.get(k)
+                        if index is None: index = table[k] = TimeIndex()
+                        index.extend(keys)
+        finally:
+            if gc_was_enabled: gc.enable()
+        return len(new_time)
+
+    def import_jsonl(self, path: str) -> int:
+        with open(path, encoding="utf-8") as f:
+            return self.bulk_import(json.loads(line) for line in f if line.strip())
+
 billing_store = BillingStore()
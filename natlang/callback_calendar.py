@@ -0,0 +1,167 @@
+from __future__ import annotations
+import threading
+from bisect import bisect_left
+from datetime import datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from .config import (BUSINESS_START_HOUR, BUSINESS_END_HOUR,
+                     CALLBACK_SLOT_MINUTES, CALLBACK_SLOT_CAPACITY, CALLBACK_HORIZON_DAYS)
+from .scheduler import ZONE, is_holiday
+from .storage import store
+from .logger import get_logger
+
+log = get_logger("natlang.callback_calendar")
+
+
+class _MaxTree:
+    """Segment tree of per-slot remaining capacity.
+
+    Supports point updates and "first slot at/after i (or at/before i) with
+    capacity left" in O(log n).
+    """
+
+    def __init__(self, values: List[int]):
+        self.n = len(values)
+        size = 1
+        while size < max(self.n, 1): size <<= 1
+        self.size = size
+        self.tree = [0] * (2 * size)
+        self.tree[size:size + self.n] = values
+        for i in range(size - 1, 0, -1):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def get(self, i: int) -> int:
+        return self.tree[self.size + i]
+
+    def set(self, i: int, value: int):
+        pos = self.size + i
+        self.tree[pos] = value
+        pos >>= 1
+        while pos:
+            self.tree[pos] = max(self.tree[2 * pos], self.tree[2 * pos + 1])
+            pos >>= 1
+
+    def find_next(self, i: int) -> int:
+        if i < 0: i = 0
+        if i >= self.n: return -1
+        pos = self.size + i
+        if self.tree[pos] > 0: return i
+        while pos > 1:
+            if not pos & 1 and self.tree[pos + 1] > 0:
+                pos += 1; break
+            pos >>= 1
+        else:
+            return -1
+        while pos < self.size:
+            pos = 2 * pos if self.tree[2 * pos] > 0 else 2 * pos + 1
+        return pos - self.size
+
+    def find_prev(self, i: int) -> int:
+        if i >= self.n: i = self.n - 1
+        if i < 0: return -1
+        pos = self.size + i
+        if self.tree[pos] > 0: return i
+        while pos > 1:
+            if pos & 1 and self.tree[pos - 1] > 0:
+                pos -= 1; break
+            pos >>= 1
+        else:
+            return -1
+        while pos < self.size:
+            pos = 2 * pos + 1 if self.tree[2 * pos + 1] > 0 else 2 * pos
+        return pos - self.size
+
+
+class CallbackCalendar:
+    """Billing callback slots with per-slot specialist capacity.
+
+    The slot table (weekday business hours in TZ, minus holidays) is precomputed
+    for `horizon_days`; booking finds the free slot nearest the requested time
+    via the capacity tree instead of walking the calendar, and is atomic under
+    a lock. The table rolls forward once half the horizon has elapsed.
+    """
+
+    def __init__(self, capacity: int = CALLBACK_SLOT_CAPACITY, slot_minutes: int = CALLBACK_SLOT_MINUTES,
+                 horizon_days: int = CALLBACK_HORIZON_DAYS, holidays: Optional[Iterable[str]] = None, now: Optional[datetime] = None):
+        self.capacity = capacity; self.slot_minutes = slot_minutes; self.horizon_days = horizon_days
+        # explicit ISO dates replace the rule-based calendar (natlang.scheduler.is_holiday)
+        if holidays is None:
+            self._is_holiday = is_holiday
+        else:
+            days = frozenset(holidays)
+            self._is_holiday = lambda d: d.isoformat() in days
+        self._lock = threading.Lock()
+        self._build((now or datetime.now(timezone.utc)), {})
+
+    def _build(self, now: datetime, booked: Dict[float, int]):
+        first_day = now.astimezone(ZONE).date()
+        slots: List[datetime] = []
+        for offset in range(self.horizon_days):
+            d = first_day + timedelta(days=offset)
+            if d.weekday() >= 5 or self._is_holiday(d):
+                continue
+            t = datetime.combine(d, time(BUSINESS_START_HOUR), tzinfo=ZONE)
+            end = datetime.combine(d, time(BUSINESS_END_HOUR), tzinfo=ZONE)
+            while t < end:
+                slots.append(t)
+                t += timedelta(minutes=self.slot_minutes)
+        self.slots = slots
+        self._epochs = [s.timestamp() for s in slots]
+        self.tree = _MaxTree([self.capacity - booked.get(e, 0) for e in self._epochs])
+        self._roll_at = (now + timedelta(days=self.horizon_days / 2)).timestamp()
+
+    def _maybe_roll(self, now: datetime):
+        if now.timestamp() < self._roll_at:
+            return
+        booked = {e: self.capacity - self.tree.get(i) for i, e in enumerate(self._epochs) if self.tree.get(i) < self.capacity}
+        self._build(now, booked)
+
+    def book(self, desired: datetime, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Book the free slot closest to `desired` (never in the past). Returns the slot in TZ, or None if full."""
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            self._maybe_roll(now)
+            lo = bisect_left(self._epochs, now.timestamp())
+            local = desired.astimezone(ZONE)
+            while local.weekday() >= 5 or self._is_holiday(local.date()):
+                # same wall-clock time on the next business day, not the end of the previous one
+                local = local + timedelta(days=1)
+            target = local.timestamp()
+            i = max(bisect_left(self._epochs, target), lo)
+            nxt = self.tree.find_next(i)
+            prv = self.tree.find_prev(i - 1)
+            if prv < lo: prv = -1
+            if nxt == -1 and prv == -1:
+                return None
+            if nxt == -1 or (prv != -1 and target - self._epochs[prv] < self._epochs[nxt] - target):
+                pick = prv
+            else:
+                pick = nxt
+            self.tree.set(pick, self.tree.get(pick) - 1)
+            return self.slots[pick]
+
+    def release(self, slot: datetime) -> bool:
+        with self._lock:
+            i = bisect_left(self._epochs, slot.timestamp())
+            if i >= len(self._epochs) or self._epochs[i] != slot.timestamp() or self.tree.get(i) >= self.capacity:
+                return False
+            self.tree.set(i, self.tree.get(i) + 1)
+            return True
+
+    def remaining(self, slot: datetime) -> int:
+        i = bisect_left(self._epochs, slot.timestamp())
+        if i >= len(self._epochs) or self._epochs[i] != slot.timestamp():
+            return 0
+        return self.tree.get(i)
+
+
+callback_calendar = CallbackCalendar()
+
+def _release_on_close(ticket):
+    iso = (ticket.fields or {}).get("callback_time_et")
+    if iso and "callback" in ticket.tags:
+        try:
+            callback_calendar.release(datetime.fromisoformat(iso))
+        except Exception as e:
+            log.error("Could not release callback slot %s for %s: %s", iso, ticket.id, e)
+
+store.add_listener("ticket_closed", _release_on_close)
@@ -9,6 +9,27 @@ load_dotenv()
 TZ = "America/New_York"
 BUSINESS_START_HOUR = 9
 BUSINESS_END_HOUR = 17
+# Days with no business callbacks (local dates in TZ): the US federal holidays are
+# computed by rule (natlang.scheduler.is_holiday); list extra closures here as ISO dates.
+EXTRA_HOLIDAYS = frozenset(d.strip() for d in os.getenv("NATLANG_EXTRA_HOLIDAYS", "").split(",") if d.strip())
+
+# Billing callback calendar (natlang.callback_calendar)
+CALLBACK_SLOT_MINUTES = 30
+CALLBACK_SLOT_CAPACITY = 4      # billing specialists available per slot
+CALLBACK_HORIZON_DAYS = 60      # how far ahead the slot table is precomputed
+
+# Live agent pools by skill (natlang.routing); the first agent in each list is the
+# historical single assignee for that domain.
+AGENT_ROSTER = {
+    "OUTAGE": ["agent_outage_csat_top", "agent_outage_2", "agent_outage_3"],
+    "BILLING": ["agent_billing_csat_top", "agent_billing_2"],
+    "CSR_EMERGENCY": ["agent_csr_emergency", "agent_csr_emergency_2"],
+}
+AGENT_MAX_LOAD = 5  # concurrent open tickets per agent before new ones queue
+# How long an assignment counts against the agent's load. Escalation and emergency
+# handoffs finish in the live chat and their tickets are never closed here, so the
+# load decays after this hold instead (a ticket_closed releases it sooner).
+AGENT_HANDOFF_MINUTES = {"P0": 30, "P1": 45, "P2": 60, "P3": 60}
 
 SLA_MINUTES = {"P0": 2, "P1": 15, "P2": 60 * 24, "P3": 60 * 24 * 3}
 
@@ -22,6 +43,88 @@ THRESHOLDS = {
     "happy": 0.65,
 }
 
+# Inbound text is truncated to this many characters before sanitizing/scanning
+MAX_MESSAGE_CHARS = 2000
+
+# Audit event bus (natlang.audit): feedback/interaction records are persisted off the request thread
+AUDIT_QUEUE_MAX = 50_000      # beyond this the emitting thread writes synchronously (backpressure)
+AUDIT_BATCH_SIZE = 256
+AUDIT_FLUSH_SECONDS = 0.2
+
+# Sentiment backend: "gemini" (default) or "stub" (local keyword analyzer with simulated
+# upstream latency, for load tests and offline runs)
+SENTIMENT_BACKEND = (os.getenv("NATLANG_SENTIMENT_BACKEND") or "gemini").lower()
+STUB_LATENCY_MS = float(os.getenv("NATLANG_STUB_LATENCY_MS", "0") or 0)
+STUB_LATENCY_JITTER_MS = float(os.getenv("NATLANG_STUB_LATENCY_JITTER_MS", "0") or 0)
+
+# /chat idempotency keys (natlang.idempotency): replayed responses for client retries
+IDEMPOTENCY_MAX_ENTRIES = 10_000
+IDEMPOTENCY_TTL_SECONDS = 600     # how long a completed response can be replayed
+IDEMPOTENCY_WAIT_SECONDS = 30     # how long a duplicate waits for the in-flight original
+
+# Per-session turn serialization (natlang.session_locks)
+SESSION_LOCK_TIMEOUT_SECONDS = 30  # a turn queued behind this long gets 409
+SESSION_MAX_WAITERS = 4           # turns queued behind the running one; more get 409 at once
+
+# Sentiment admission control (natlang.admission): concurrent upstream calls, queue bound,
+# and how long a queued turn waits before falling back to the local analyzer
+SENTIMENT_CONCURRENCY = int(os.getenv("NATLANG_SENTIMENT_CONCURRENCY", "8") or 8)
+SENTIMENT_QUEUE_MAX = 200
+SENTIMENT_MAX_WAIT_SECONDS = float(os.getenv("NATLANG_SENTIMENT_MAX_WAIT_SECONDS", "2.0") or 2.0)
+
+# Near-duplicate sentiment cache (natlang.sentiment_cache): reuse a recent LLM result for
+# messages whose hashed content-word vectors have cosine similarity >= the threshold
+# and that carry the same negation words, affect words and lexicon categories
+SENTIMENT_CACHE_ENABLED = os.getenv("NATLANG_SENTIMENT_CACHE", "1") not in ("0", "false", "no")
+SENTIMENT_CACHE_THRESHOLD = float(os.getenv("NATLANG_SENTIMENT_CACHE_THRESHOLD", "0.75") or 0.75)
+SENTIMENT_CACHE_SIZE = 2048
+SENTIMENT_CACHE_TTL_SECONDS = 900   # outage conditions change; do not reuse older results
+
+# Local distilled classifier (natlang.local_model, trained by tools/train_local_model.py).
+# Turns it is at least this confident about are answered locally; the rest go to the LLM.
+LOCAL_MODEL_PATH = os.getenv("NATLANG_LOCAL_MODEL") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "sentiment_local.npz")
+LOCAL_MODEL_MIN_CONFIDENCE = float(os.getenv("NATLANG_LOCAL_MODEL_MIN_CONFIDENCE", "0.85") or 0.85)
+
+# /chat/batch (IVR / SMS gateways)
+BATCH_MAX_ITEMS = 500
+BATCH_WORKERS = int(os.getenv("NATLANG_BATCH_WORKERS", "32") or 32)  # sessions processed in parallel
+# /chat/async turns accepted but not yet finished; beyond this new ones get 503
+ASYNC_MAX_PENDING = int(os.getenv("NATLANG_ASYNC_MAX_PENDING", "128") or 128)
+
+# Server-sent events to the web UI (natlang.push)
+PUSH_QUEUE_MAX = 100            # events buffered per connection before the oldest is dropped
+PUSH_KEEPALIVE_SECONDS = 15.0
+PUSH_BACKLOG_EVENTS = 20        # recent events kept per session for Last-Event-ID resume
+PUSH_BACKLOG_SESSIONS = 10_000  # sessions with a resume backlog (LRU)
+
+# Live analytics (natlang.stats, GET /stats): rolling window of bucketed counters
+STATS_WINDOW_SECONDS = 900
+STATS_BUCKET_SECONDS = 10
+
+# Historical billing requests (JSONL, e.g. GET /export/billing) loaded into the ledger at start-up
+BILLING_IMPORT_PATH: Optional[str] = os.getenv("NATLANG_BILLING_IMPORT") or None
+
+# Ticket ids (natlang.ids): worker bits of the time-ordered id. Unset, they mix the host name
+# into the pid, which keeps the processes of one host apart but only makes collisions between
+# hosts (or containers that all run as PID 1) unlikely. With more than one replica the server
+# refuses to start unless each process has its own NATLANG_WORKER_ID.
+WORKER_ID: Optional[int] = int(os.getenv("NATLANG_WORKER_ID")) if os.getenv("NATLANG_WORKER_ID") else None
+REPLICAS = int(os.getenv("NATLANG_REPLICAS", "1") or 1)
+
+# Start-up: warm the sentiment backend in the background (/readyz reports when done)
+WARMUP_ENABLED = os.getenv("NATLANG_WARMUP", "1") not in ("0", "false", "no")
+READINESS_RETRY_SECONDS = 10  # a failed required start-up step (billing import) is retried this often
+
+# Debug surface (/debug/*): disabled unless a token is configured
+DEBUG_TOKEN: Optional[str] = os.getenv("NATLANG_DEBUG_TOKEN") or None
+PROFILE_MAX_SECONDS = 60
+TRACE_SAMPLE_RATE = float(os.getenv("NATLANG_TRACE_SAMPLE_RATE", "0") or 0)  # fraction of /chat turns traced
+
+# Recurring customer update notifications (timer wheel in natlang.notifications)
+NOTIFY_TICK_SECONDS = 1.0     # wheel resolution
+NOTIFY_BATCH_SIZE = 500       # max notifications handed to the sender per call
+NOTIFY_MIN_INTERVAL_MINUTES = 15  # faster cadences a customer asks for are raised to this
+
 # GEMINI key helpers: allow setting/getting at runtime which is handy for Colab.
 _GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
 
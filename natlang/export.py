@@ -0,0 +1,231 @@
+"""Streaming bulk export of interactions, feedback, tickets and billing requests.
+
+Records are read straight from the live store one at a time: the append-only
+journals (interactions, feedback) are walked by index up to their length when
+the export started, and the keyed tables (tickets, billing requests) through a
+snapshot of their keys only. Rows are flattened to a fixed column set per kind
+and encoded in chunks, so memory stays flat however many rows go out:
+
+- "jsonl": newline-delimited JSON, flushed every `chunk_bytes`
+- "arrow": Arrow IPC stream, one record batch per `batch_rows`
+- "parquet": Parquet, one row group per `batch_rows` (zstd)
+
+The columnar formats need the optional `pyarrow` package; without it they
+raise ExportUnavailable and JSONL still works.
+"""
+from __future__ import annotations
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .storage import store as default_store, InMemoryStore
+from .billing_store import billing_store as default_billing, BillingStore
+
+FORMATS = {"jsonl": ("application/x-ndjson", "jsonl"),
+           "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+           "parquet": ("application/vnd.apache.parquet", "parquet")}
+
+# column -> type ("str" | "ts" | "float" | "bool" | "json"). "json" columns hold nested values:
+# native in JSONL, JSON text in the columnar formats (whose schemas are flat)
+COLUMNS: Dict[str, List[Tuple[str, str]]] = {
+    "interactions": [("ts", "ts"), ("session_id", "str"), ("flow", "str"), ("user_text", "str"), ("bot_text", "str"),
+                     ("domain", "str"), ("profanity", "bool"), ("safety_flag", "bool"), ("confidence", "float"),
+                     ("source", "str"), ("intents", "json"), ("emotions", "json"), ("actions", "json"),
+                     ("account_number", "str")],
+    "feedback": [("ts", "ts"), ("session_id", "str"), ("ticket_id", "str"), ("text", "str"), ("event", "str"), ("details", "json")],
+    "tickets": [("created_at", "ts"), ("id", "str"), ("priority", "str"), ("domain", "str"), ("status", "str"), ("reason", "str"),
+                ("assigned_agent_id", "str"), ("sla_deadline", "ts"), ("account_number", "str"), ("tags", "json"), ("fields", "json")],
+    "billing": [("created_at", "ts"), ("service_request", "str"), ("account_number", "str"), ("issue_type", "str"),
+                ("first_name", "str"), ("last_name", "str")],
+}
+SESSION_KINDS = ("interactions", "feedback")
+
+
+class ExportUnavailable(RuntimeError):
+    """The requested format needs an optional dependency that is not installed."""
+
+
+def _ts(v) -> Optional[datetime]:
+    if v is None or isinstance(v, datetime):
+        return v
+    return datetime.fromisoformat(v)
+
+
+def _js(v) -> Optional[str]:
+    return None if v is None else json.dumps(v, default=str)
+
+
+def _interaction_row(r: Dict) -> Dict:
+    s = r.get("sentiment") or {}
+    return {"ts": _ts(r.get("ts")), "session_id": r.get("session_id"), "flow": r.get("flow"), "user_text": r.get("user_text"),
+            "bot_text": r.get("bot_text"), "domain": s.get("domain"), "profanity": s.get("profanity"),
+            "safety_flag": s.get("safety_flag"), "confidence": s.get("confidence"), "source": s.get("source"),
+            "intents": s.get("intents"), "emotions": s.get("emotions"), "actions": r.get("actions"),
+            "account_number": r.get("account_number")}
+
+
+def _feedback_row(r: Dict) -> Dict:
+    details = r.get("sentiments") or {}
+    return {"ts": _ts(r.get("ts")), "session_id": r.get("session_id"), "ticket_id": r.get("ticket_id"), "text": r.get("text"),
+            "event": details.get("event"), "details": details}
+
+
+def _ticket_row(t) -> Dict:
+    return {"created_at": t.created_at, "id": t.id, "priority": getattr(t.priority, "value", t.priority),
+            "domain": getattr(t.domain, "value", t.domain), "status": t.status, "reason": t.reason,
+            "assigned_agent_id": t.assigned_agent_id, "sla_deadline": t.sla_deadline,
+            "account_number": (t.fields or {}).get("account_number"), "tags": t.tags, "fields": t.fields}
+
+
+def _billing_row(r: Dict) -> Dict:
+    return {"created_at": _ts(r.get("created_at")), "service_request": r.get("service_request"), "account_number": r.get("account_number"),
+            "issue_type": r.get("issue_type"), "first_name": r.get("first_name"), "last_name": r.get("last_name")}
+
+
+def _journal(items: List) -> Iterator:
+    # append-only list: index reads are safe while the server keeps appending
+    for i in range(len(items)):
+        if i >= len(items): break  # the journal was cleared under us
+        yield items[i]
+
+
+def _table(table: Dict, keys: Optional[List] = None) -> Iterator:
+    for key in (list(table) if keys is None else keys):  # keys only; rows are fetched as we go
+        v = table.get(key)
+        if v is not None:
+            yield v
+
+
+def check(kind: str, fmt: str = "jsonl", session_id: Optional[str] = None):
+    """Raise ValueError / ExportUnavailable for a request that cannot be served (before anything is streamed)."""
+    if kind not in COLUMNS:
+        raise ValueError(f"unknown export kind {kind!r}; expected one of {', '.join(COLUMNS)}")
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if session_id and kind not in SESSION_KINDS:
+        raise ValueError(f"session filter applies to {' and '.join(SESSION_KINDS)} only")
+    if fmt != "jsonl":
+        _pyarrow()
+
+
+def iter_rows(kind: str, since: Optional[datetime] = None, until: Optional[datetime] = None, session_id: Optional[str] = None,
+              st: InMemoryStore = None, billing: BillingStore = None) -> Iterator[Dict]:
+    """Flattened rows of one kind, filtered to [since, until) and (for journals) one session."""
+    st = st or default_store; billing = billing or default_billing
+    source, to_row = {"interactions": (lambda: _journal(st.interactions), _interaction_row),
+                      "feedback": (lambda: _journal(st.feedback), _feedback_row),
+                      # time-ordered ticket ids and the ledger's time index narrow a range to its keys
+                      "tickets": (lambda: _table(st.tickets, [t.id for t in st.tickets_between(since, until)]), _ticket_row),
+                      "billing": (lambda: _table(billing.requests, billing.ids_between(since, until)), _billing_row)}[kind]
+    time_col = COLUMNS[kind][0][0]
+    for rec in source():
+        if session_id and rec.get("session_id") != session_id:
+            continue
+        row = to_row(rec)
+        t = row[time_col]
+        if (since and (t is None or t < since)) or (until and (t is None or t >= until)):
+            continue
+        yield row
+
+
+def _iso(v):
+    return v.isoformat() if isinstance(v, datetime) else str(v)
+
+
+def jsonl_chunks(rows: Iterable[Dict], chunk_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    buf: List[str] = []; size = 0
+    for row in rows:
+        line = json.dumps(row, default=_iso, ensure_ascii=False) + "\n"
+        buf.append(line); size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(buf).encode("utf-8"); buf.clear(); size = 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ExportUnavailable("pyarrow is not installed; use format=jsonl or install pyarrow")
+    return pyarrow
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file object that hands written bytes back in pieces."""
+
+    def __init__(self):
+        self.parts: List[bytes] = []; self.pos = 0
+
+    def writable(self): return True
+
+    def write(self, b):
+        self.parts.append(bytes(b)); self.pos += len(b)
+        return len(b)
+
+    def tell(self): return self.pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self.parts); self.parts.clear()
+        return out
+
+
+def columnar_chunks(rows: Iterable[Dict], kind: str, fmt: str, batch_rows: int = 10_000) -> Iterator[bytes]:
+    pa = _pyarrow()
+    types: Dict[str, Callable[[], Any]] = {"str": pa.string, "json": pa.string, "float": pa.float64, "bool": pa.bool_,
+                                            "ts": lambda: pa.timestamp("us", tz="UTC")}
+    schema = pa.schema([(name, types[t]()) for name, t in COLUMNS[kind]])
+    sink = _Sink()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        write = lambda cols: writer.write_table(pa.Table.from_pydict(cols, schema=schema))
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = lambda cols: writer.write_batch(pa.RecordBatch.from_pydict(cols, schema=schema))
+    batch: List[Dict] = []
+
+    def flush():
+        write({name: [_js(r[name]) if t == "json" else r[name] for r in batch] for name, t in COLUMNS[kind]}); batch.clear()
+        return sink.drain()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield flush()
+    if batch:
+        yield flush()
+    writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def export(kind: str, fmt: str = "jsonl", since: Optional[datetime] = None, until: Optional[datetime] = None,
+           session_id: Optional[str] = None, batch_rows: int = 10_000, st: InMemoryStore = None, billing: BillingStore = None) -> Iterator[bytes]:
+    """Encoded chunks of an export. Arguments are checked here, before the first chunk is produced."""
+    check(kind, fmt, session_id)
+    rows = iter_rows(kind, since, until, session_id, st, billing)
+    return jsonl_chunks(rows) if fmt == "jsonl" else columnar_chunks(rows, kind, fmt, batch_rows)
+
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    """ISO-8601 time (naive values are taken as UTC)."""
+    if not value:
+        return None
+    t = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+
+def read_rows(path: str) -> Iterator[Dict]:
+    """Records of an interaction journal or an export file: JSONL, or Parquet (needs pyarrow)."""
+    if path.endswith(".parquet"):
+        _pyarrow()
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line: yield json.loads(line)
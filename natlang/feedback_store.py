@@ -1,3 +1,4 @@
-from .storage import store
+from .audit import audit_bus, AuditEvent
 def log_feedback(session_id: str, ticket_id: str | None, text: str, sentiments: dict):
-    store.add_feedback(session_id, ticket_id, text, sentiments)
+    # emotions may be passed as the raw EmotionScore list; the audit consumer flattens them
+    audit_bus.emit(AuditEvent("feedback", session_id, ticket_id, text, sentiments))
@@ -1,14 +1,19 @@
 from __future__ import annotations
 from typing import Optional, Dict, Any
 from .models import SentimentResult, Domain, Ticket, Priority
-from .config import THRESHOLDS
 from .storage import store
 from .accounts import get_account
 from .oms_stub import get_outage_status
 from .agent_selector import select_best_available_agent
-from .scheduler import next_business_slot
+from .scheduler import next_business_slot, ZONE
+from .callback_calendar import callback_calendar
 from .feedback_store import log_feedback
 from .billing_store import billing_store
+from .ids import SR_ID_RE
+from .config import NOTIFY_MIN_INTERVAL_MINUTES
+from .notifications import notification_scheduler
+from .lexicon import scan
+from .rules import matches
 from .logger import get_logger
 
 log = get_logger("natlang.flows")
@@ -18,20 +23,14 @@ def emo(sr: SentimentResult, name: str) -> float:
 
     If the user message contains profanity, treat their 'angry' score as belligerent (max).
     This implements the rule: profane language => belligerent (highest anger threshold).
+    Entry conditions built on these scores are compiled in natlang.rules.
     """
-    val = sr.score(name)
-    # Belligerent override: any profanity bumps angry to max
-    if name.lower() == 'angry' and getattr(sr, 'profanity', False):
-        # log that we are overriding to belligerent
-        try:
-            log.info("Profanity detected; overriding angry score to 1.0 for session (belligerent)")
-        except Exception:
-            pass
+    if name == 'angry' and sr.profanity:
         return 1.0
-    return val
+    return sr.score(name)
 
 def is_positive(sr: SentimentResult) -> bool:
-    return max(emo(sr,'positive'), emo(sr,'happy'), emo(sr,'neutral')) >= min(THRESHOLDS['positive'], THRESHOLDS['neutral'])
+    return "positive" in matches(sr)
 
 # --- Menu routing (from greeting buttons/CLI) ---
 def flow_menu_route(session_id: str, user_text: str) -> Dict[str,Any]:
@@ -55,9 +54,8 @@ def flow_outage_impatient(session_id: str, account_number: Optional[str], sr: Se
     # when the sentiment analyzer doesn't mark the user as 'impatient'.
     sess = store.get_session(session_id)
     awaiting_account = sess.get("stage") == "await_account_outage"
-    angry = emo(sr, 'angry'); impatient = emo(sr,'impatient')
     if not awaiting_account:
-        if not (impatient >= THRESHOLDS['impatient'] and angry < THRESHOLDS['angry']): 
+        if "outage_impatient" not in matches(sr): 
             return {}
     if not account_number:
         store.set_session(session_id, 'await_account_outage', last_rule='R-OUT-01')
@@ -90,14 +88,14 @@ def flow_outage_acceptance(session_id: str, user_text: str, sr: SentimentResult)
     if sess.get("stage") != "await_accept_outage": 
         return {}
     t_id = sess["ctx"].get("ticket_id")
-    log_feedback(session_id, t_id, "SNAPSHOT_OUTAGE_ACCEPT_STEP", {"event":"outage_accept_step","emotions":[(e.type,e.score) for e in sr.emotions]})
+    log_feedback(session_id, t_id, "SNAPSHOT_OUTAGE_ACCEPT_STEP", {"event":"outage_accept_step","emotions":sr.emotions})
     # Require an explicit acceptance (yes/intent) AND a positive sentiment to close the ticket.
     affirmative = user_text.strip().lower() in {"yes","y","ok","okay","sure","sounds good"} or ("accept_solution" in sr.intents)
     if affirmative and is_positive(sr):
         store.close_ticket(t_id); store.reset_session(session_id)
-        log_feedback(session_id, t_id, "ACCEPT_OUTAGE_SOLUTION", {"event":"outage_accept","emotions":[(e.type,e.score) for e in sr.emotions]})
+        log_feedback(session_id, t_id, "ACCEPT_OUTAGE_SOLUTION", {"event":"outage_accept","emotions":sr.emotions})
         return {"message":f"Great—thanks for your patience. We’ll confirm once service is restored. Ticket {t_id} is closed. Stay safe.","ticket_id":t_id,"actions":["CLOSE_TICKET"]}
-    log_feedback(session_id, t_id, "DECLINE_OUTAGE_SOLUTION", {"event":"outage_decline","emotions":[(e.type,e.score) for e in sr.emotions]})
+    log_feedback(session_id, t_id, "DECLINE_OUTAGE_SOLUTION", {"event":"outage_decline","emotions":sr.emotions})
     store.set_session(session_id, "await_feedback_outage", ticket_id=t_id)
     return {"message":"I’m sorry this doesn’t fully solve it. Could you share a bit more about what you need? I’ll pass the details to our team.","ticket_id":t_id,"actions":["ASK_FEEDBACK"]}
 
@@ -106,10 +104,35 @@ def flow_outage_feedback(session_id: str, user_text: str, sr: SentimentResult) -
     if sess.get("stage") != "await_feedback_outage": 
         return {}
     t_id = sess["ctx"].get("ticket_id")
-    log_feedback(session_id, t_id, user_text, {"event":"outage_feedback","emotions":[(e.type,e.score) for e in sr.emotions]})
+    log_feedback(session_id, t_id, user_text, {"event":"outage_feedback","emotions":sr.emotions})
+    cadence = _parse_update_interval(user_text)
     store.reset_session(session_id)
+    if cadence and t_id:
+        seconds, label = cadence
+        channel = "EMAIL" if "email" in user_text.lower() else "SMS"
+        notification_scheduler.subscribe(session_id, sess["ctx"].get("account_number"), t_id, seconds, channel=channel)
+        return {"message":f"Thanks for the details. Crews are working diligently to restore power safely and as soon as they can. We’ll send you {channel} updates every {label} until ticket {t_id} is closed.","ticket_id":t_id,"actions":["STORE_FEEDBACK","SUBSCRIBE_UPDATES"]}
     return {"message":"Thanks for the details. Crews are working diligently to restore power safely and as soon as they can. We’ll keep you posted.","ticket_id":t_id,"actions":["STORE_FEEDBACK"]}
 
+def _parse_update_interval(text: str) -> Optional[tuple]:
+    """Parse a recurring-update cadence like 'every hour', 'every 30 minutes' or 'hourly'.
+
+    Returns (seconds, human label) or None. "every 0 minutes" is not a cadence;
+    anything faster than NOTIFY_MIN_INTERVAL_MINUTES is raised to it.
+    """
+    import re
+    txt = (text or "").lower()
+    if re.search(r"\bhourly\b", txt):
+        return 3600, "hour"
+    m = re.search(r"\bevery\s+(\d{1,3})?\s*(minute|min|hour|hr)s?\b", txt)
+    if not m: return None
+    n = int(m.group(1) or 1); unit = "hour" if m.group(2) in {"hour","hr"} else "minute"
+    if n < 1: return None
+    if unit == "minute" and n < NOTIFY_MIN_INTERVAL_MINUTES:
+        n = NOTIFY_MIN_INTERVAL_MINUTES
+    seconds = n * (3600 if unit == "hour" else 60)
+    return seconds, (unit if n == 1 else f"{n} {unit}s")
+
 
 # New handler: create ticket after user supplies additional account details (or 'no')
 def flow_outage_account_details(session_id: str, user_text: str, sr: SentimentResult) -> Dict[str,Any]:
@@ -141,19 +164,12 @@ def flow_outage_angry_profanity(session_id: str, user_text: str, sr: SentimentRe
     """Trigger when the customer is angry and uses profanity. Use user_text as a fallback
     profanity detector if Gemini's `sr.profanity` is False or missing.
     """
-    angry_ok = emo(sr, 'angry') >= THRESHOLDS['angry']
+    angry_ok = "angry" in matches(sr)
     profanity_flag = bool(sr.profanity)
 
     # Basic profanity fallback: common tokens (word-boundary, case-insensitive)
-    if not profanity_flag:
-        import re
-        profane_words = [
-            r"fuck", r"shit", r"damn", r"bastard", r"asshole", r"crap",
-            r"screw", r"piss", r"bloody", r"motherfucker", r"cunt"
-        ]
-        pattern = re.compile(r"\b(?:" + r"|".join(profane_words) + r")\b", re.I)
-        if pattern.search(user_text or ""):
-            profanity_flag = True
+    if not profanity_flag and "profanity" in scan(user_text):
+        profanity_flag = True
 
     if not (angry_ok and profanity_flag):
         return {}
@@ -164,12 +180,12 @@ def flow_outage_angry_profanity(session_id: str, user_text: str, sr: SentimentRe
         log.info("ESCALATION_TRIGGERED session=%s account=%s user_text=%s sentiment=%s", session_id, account_number, user_text, str(sr))
 
     t = Ticket(id=Ticket.new_id(), priority=Priority.P1, domain=Domain.OUTAGE, reason="Outage—angry+profanity", tags=["de-escalation","priority-callback"], fields={"account_number": account_number})
-    t.assigned_agent_id = select_best_available_agent("OUTAGE")
+    t.assigned_agent_id = select_best_available_agent("OUTAGE", t)
     store.create_ticket(t)
     log.info("ESCALATION_CREATED ticket=%s session=%s assigned_agent=%s", t.id, session_id, t.assigned_agent_id)
     # log a feedback snapshot for audit
     try:
-        log_feedback(session_id, t.id, "ANGRY_PROFANITY_CAPTURE", {"user_text": user_text, "emotions": [(e.type, e.score) for e in sr.emotions]})
+        log_feedback(session_id, t.id, "ANGRY_PROFANITY_CAPTURE", {"user_text": user_text, "emotions": sr.emotions})
     except Exception:
         pass
     # Clear the session and immediately notify the customer that a live agent
@@ -187,22 +203,18 @@ def flow_outage_safety_text_router(session_id: str, user_text: str, sr: Sentimen
     sess = store.get_session(session_id)
     if sess.get("stage") != "await_account_outage":
         return {}
-    txt = (user_text or "").lower()
-    # simple keyword list for explicit safety reports
-    safety_keywords = ["sparking","sparks","smoke","gas","smell of gas","downed line","downed wire","live wire","electrical","on fire","fire","dangerous","could kill","killed","injury"]
-    if not any(k in txt for k in safety_keywords):
+    # keyword lexicon for explicit safety reports
+    if "safety" not in scan(user_text):
         return {}
     # create emergency ticket and assign to CSR emergency queue
     account_number = account_number or sess.get("ctx", {}).get("account_number")
     t = Ticket(id=Ticket.new_id(), priority=Priority.P0, domain=Domain.OUTAGE, reason="Emergency safety text report", tags=["emergency","safety","csr-emergency"], fields={"account_number": account_number, "text": user_text})
-    try:
-        t.assigned_agent_id = select_best_available_agent("CSR_EMERGENCY")
-    except Exception:
-        t.assigned_agent_id = select_best_available_agent("OUTAGE")
+    # no emergency CSR on shift: any outage agent (P0 is never left waiting in a pool that has agents)
+    t.assigned_agent_id = select_best_available_agent("CSR_EMERGENCY", t) or select_best_available_agent("OUTAGE", t)
     store.create_ticket(t)
     try:
         log.info("EMERGENCY_TEXT_TICKET_CREATED ticket=%s session=%s assigned_agent=%s text=%s", t.id, session_id, t.assigned_agent_id, user_text)
-        log_feedback(session_id, t.id, "EMERGENCY_TEXT_CAPTURE", {"event":"safety_text_emergency","emotions":[(e.type,e.score) for e in getattr(sr,'emotions',[])], "text": user_text})
+        log_feedback(session_id, t.id, "EMERGENCY_TEXT_CAPTURE", {"event":"safety_text_emergency","emotions":getattr(sr,"emotions",[]), "text": user_text})
     except Exception:
         pass
     store.set_session(session_id, None)
@@ -221,32 +233,23 @@ def flow_safety_fear_entry(session_id: str, user_text: str, sr: SentimentResult)
     that a live CSR will join on priority. Otherwise ask for a safety
     confirmation to escalate.
     """
-    fearful_score = emo(sr, 'fearful')
-    if fearful_score < THRESHOLDS['fearful']:
+    if "fearful" not in matches(sr):
         return {}
 
-    txt = (user_text or "").lower()
-    safety_keywords = [
-        "sparking", "sparks", "smoke", "gas", "smell of gas", "downed line",
-        "downed wire", "live wire", "electrical", "on fire", "fire", "dangerous",
-        "could kill", "killed", "injury", "shock", "electrocute"
-    ]
-    explicit_safety = bool(getattr(sr, 'safety_flag', False)) or any(k in txt for k in safety_keywords)
+    explicit_safety = bool(getattr(sr, 'safety_flag', False)) or "safety" in scan(user_text)
 
     if explicit_safety:
         # create emergency ticket and route to CSR emergency queue for immediate action
         t = Ticket(id=Ticket.new_id(), priority=Priority.P0, domain=Domain.OUTAGE,
                    reason="Emergency safety concern", tags=["emergency", "safety", "csr-emergency"],
                    fields={"safety_flag": True, "text": user_text})
-        try:
-            t.assigned_agent_id = select_best_available_agent("CSR_EMERGENCY")
-        except Exception:
-            t.assigned_agent_id = select_best_available_agent("OUTAGE")
+        # no emergency CSR on shift: any outage agent (P0 is never left waiting in a pool that has agents)
+        t.assigned_agent_id = select_best_available_agent("CSR_EMERGENCY", t) or select_best_available_agent("OUTAGE", t)
         store.create_ticket(t)
         store.set_session(session_id, None)
         try:
             log.info("EMERGENCY_TICKET_CREATED ticket=%s session=%s assigned_agent=%s", t.id, session_id, t.assigned_agent_id)
-            log_feedback(session_id, t.id, "EMERGENCY_CAPTURE", {"event": "safety_emergency", "emotions": [(e.type, e.score) for e in sr.emotions], "text": user_text})
+            log_feedback(session_id, t.id, "EMERGENCY_CAPTURE", {"event": "safety_emergency", "emotions": sr.emotions, "text": user_text})
         except Exception:
             pass
         return {"message":(
@@ -274,7 +277,7 @@ def flow_safety_confirm(session_id: str, user_text: str, sr: SentimentResult) ->
 
 # 2.4: neutral billing dispute -> time -> accept -> escalate if not
 def flow_billing_dispute_entry(session_id: str, sr: SentimentResult, account_number: Optional[str]) -> Dict[str,Any]:
-    if "billing_dispute" not in sr.intents and emo(sr,'neutral') < THRESHOLDS['neutral']: 
+    if "billing_dispute" not in matches(sr): 
         return {}
     store.set_session(session_id, "await_billing_time", account_number=account_number)
     return {"message":"A billing specialist handles reviews on weekdays 9am–5pm ET. What time works best for a callback? (e.g., 10:30am)","actions":["ASK_TIME"]}
@@ -290,25 +293,25 @@ def flow_billing_issue_router(session_id: str, user_text: str, sr: SentimentResu
     sess = store.get_session(session_id)
     if sess.get("stage") != "await_billing_issue":
         return {}
-    txt = (user_text or "").strip().lower()
     # phrases that should be handled as 'disappointed / poor service'
-    complaint_phrases = ["poor customer service","bad service","rude","unprofessional","didn't help","hung up","was rude","customer service was"]
-    if any(p in txt for p in complaint_phrases):
+    if "complaint" in scan(user_text):
         # route to prior SR prompt (same message as flow_billing_disappointed)
         store.set_session(session_id, "await_prior_sr", account_number=account_number or sess.get("ctx", {}).get("account_number"))
         return {"message":"I’m sorry we fell short. Do you have your previous billing service request number? If so, please paste it here; otherwise just tell me what happened.","actions":["ASK_PRIOR_SR"]}
     return {}
 
 def _parse_time_simple(text: str) -> Optional[str]:
+    """Parse '10:30am'-style times as local (TZ) wall-clock time on the next day that time occurs."""
     import re
     m = re.search(r"\b(1[0-2]|0?[1-9])(?::([0-5][0-9]))?\s*(am|pm)\b", text, re.I)
     if not m: return None
     hh = int(m.group(1)); mm = int(m.group(2) or 0); ampm = m.group(3).lower()
     if ampm == 'pm' and hh != 12: hh += 12
     if ampm == 'am' and hh == 12: hh = 0
-    from datetime import datetime, timezone
-    now = datetime.now(timezone.utc)
+    from datetime import datetime, timedelta
+    now = datetime.now(ZONE)
     dt = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if dt <= now: dt = dt + timedelta(days=1)
     return dt.isoformat()
 
 def flow_billing_time_collect(session_id: str, user_text: str, sr: SentimentResult) -> Dict[str,Any]:
@@ -317,9 +320,14 @@ def flow_billing_time_collect(session_id: str, user_text: str, sr: SentimentResu
         return {}
     iso = _parse_time_simple(user_text)
     from datetime import datetime, timezone
-    if not iso:
-        dt = next_business_slot(datetime.now(timezone.utc))
-        iso = dt.isoformat()
+    now = datetime.now(timezone.utc)
+    desired = datetime.fromisoformat(iso) if iso else now
+    # nearest slot with a free specialist; only overbook if the whole horizon is full
+    slot = callback_calendar.book(desired, now=now)
+    if slot is None:
+        log.warning("Callback calendar full; overbooking next business slot for session %s", session_id)
+        slot = next_business_slot(desired)
+    iso = slot.isoformat()
     t = Ticket(id=Ticket.new_id(), priority=Priority.P2, domain=Domain.BILLING, reason="Billing dispute—neutral", tags=["callback"], fields={"callback_time_et": iso})
     store.create_ticket(t)
     account_number = sess["ctx"].get("account_number")
@@ -335,19 +343,28 @@ def flow_billing_acceptance(session_id: str, user_text: str, sr: SentimentResult
     if sess.get("stage") != "await_billing_accept": 
         return {}
     t_id = sess["ctx"].get("ticket_id")
-    log_feedback(session_id, t_id, "SNAPSHOT_BILLING_ACCEPT_STEP", {"event":"billing_accept_step","emotions":[(e.type,e.score) for e in sr.emotions]})
+    log_feedback(session_id, t_id, "SNAPSHOT_BILLING_ACCEPT_STEP", {"event":"billing_accept_step","emotions":sr.emotions})
     if is_positive(sr) or "accept_solution" in sr.intents or user_text.strip().lower() in {"yes","y","ok","okay","sure","sounds good"}:
         store.reset_session(session_id)
-        log_feedback(session_id, t_id, "ACCEPT_BILLING_CALLBACK", {"event":"billing_accept","emotions":[(e.type,e.score) for e in sr.emotions]})
+        log_feedback(session_id, t_id, "ACCEPT_BILLING_CALLBACK", {"event":"billing_accept","emotions":sr.emotions})
         return {"message":f"Great—your billing review is scheduled. We’ll talk then. SR {t_id}.","ticket_id":t_id,"actions":["CONFIRM"]}
-    agent = select_best_available_agent("BILLING")
-    log_feedback(session_id, t_id, "REJECT_BILLING_CALLBACK", {"event":"billing_reject","emotions":[(e.type,e.score) for e in sr.emotions]})
+    t = store.get_ticket(t_id)
+    # the live agent takes over: give the declined callback slot back to the calendar
+    iso = (t.fields or {}).get("callback_time_et") if t else None
+    from datetime import datetime
+    if iso and callback_calendar.release(datetime.fromisoformat(iso)):
+        t.fields.pop("callback_time_et", None)
+    # keep an agent this ticket already holds; assigning again would count it twice
+    agent = (t.assigned_agent_id if t else None) or select_best_available_agent("BILLING", t)
+    if t: t.assigned_agent_id = agent
+    agent = agent or "next available"
+    log_feedback(session_id, t_id, "REJECT_BILLING_CALLBACK", {"event":"billing_reject","emotions":sr.emotions})
     store.set_session(session_id, None)
     return {"message":f"Understood. I’m connecting you to a live billing agent now (agent: {agent}). Your SR is {t_id}.","ticket_id":t_id,"actions":["ESCALATE_AGENT"]}
 
 # 2.5: disappointed billing service
 def flow_billing_disappointed(session_id: str, sr: SentimentResult, account_number: Optional[str]) -> Dict[str,Any]:
-    if emo(sr,'disappointed') < THRESHOLDS['disappointed']:
+    if "billing_disappointed" not in matches(sr):
         return {}
     # Ask the user if they have a prior SR and prompt for feedback next
     store.set_session(session_id, "await_prior_sr", account_number=account_number)
@@ -357,21 +374,31 @@ def flow_billing_prior_sr_and_feedback(session_id: str, user_text: str, sr: Sent
     sess = store.get_session(session_id)
     if sess.get("stage") not in {"await_prior_sr","await_billing_feedback"}: 
         return {}
-    import re
-    m = re.search(r"\bSR-([A-F0-9]{8})\b", user_text, re.I)
+    m = SR_ID_RE.search(user_text)  # time-ordered (16 hex) or legacy (8 hex) ids
     if sess.get("stage") == "await_prior_sr":
         if m:
             sr_id = f"SR-{m.group(1).upper()}"
-            store.set_session(session_id, "await_billing_feedback", prior_sr=sr_id)
-            return {"message":"Thanks. Please share what happened and how we can improve.","actions":["ASK_FEEDBACK"]}
+            # with an account on the session the SR must be filed for it; without one it only has to exist
+            account_number = sess["ctx"].get("account_number")
+            if billing_store.owned_by(sr_id, account_number) if account_number else billing_store.exists(sr_id):
+                store.set_session(session_id, "await_billing_feedback", prior_sr=sr_id)
+                return {"message":"Thanks. Please share what happened and how we can improve.","actions":["ASK_FEEDBACK"]}
+            # unknown, or filed for another account: ask once more, then carry on without it
+            where = " on your account" if account_number else ""
+            if not sess["ctx"].get("prior_sr_retry"):
+                store.set_session(session_id, "await_prior_sr", prior_sr_retry=True)
+                return {"message":f"I couldn’t find {sr_id}{where}. Could you check the number and paste it again? Otherwise just tell me what happened.",
+                        "actions":["PRIOR_SR_NOT_FOUND","ASK_PRIOR_SR"]}
+            store.set_session(session_id, "await_billing_feedback")
+            return {"message":f"I still can’t find that number{where}, so let’s continue without it. Please share what happened and how we can improve.",
+                    "actions":["PRIOR_SR_NOT_FOUND","ASK_FEEDBACK"]}
         else:
             store.set_session(session_id, "await_billing_feedback")
             return {"message":"No problem. If you don’t have it handy, just tell me what happened.","actions":["ASK_FEEDBACK"]}
     prior = sess["ctx"].get("prior_sr"); text = user_text
     # Log the feedback and determine if the issue concerns CSR conduct
-    log_feedback(session_id, prior, text, {"event":"billing_service_feedback","emotions":[(e.type,e.score) for e in sr.emotions]})
-    conduct_terms = ["rude","unprofessional","hung up","insult","rude behavior","didn't care","didn't help","yelled"]
-    needs_supervisor = ("csr_conduct" in sr.intents) or any(k in text.lower() for k in conduct_terms)
+    log_feedback(session_id, prior, text, {"event":"billing_service_feedback","emotions":sr.emotions})
+    needs_supervisor = ("csr_conduct" in sr.intents) or "conduct" in scan(text)
     if needs_supervisor:
         # Reopen original ticket if provided and create a supervisor escalation
         prio = Priority.P1
@@ -396,3 +423,46 @@ def flow_billing_prior_sr_and_feedback(session_id: str, user_text: str, sr: Sent
     return {"message":("Thanks for the details. I’ve recorded your feedback and our team will review it. "
                        f"If necessary, a supervisor will follow up. Your reference is {t.id}."),
             "ticket_id": t.id, "actions":["STORE_FEEDBACK"]}
+
+# --- Handler chain ---
+# Staged flows are resumed first (immediate escalations before the rest), then the
+# new-intent entries are tried (safety first). Order is significant: the first
+# handler that returns a result answers the turn. Replays (natlang.replay) run
+# the same chain with other orders.
+RESUME_HANDLERS = (
+    flow_outage_angry_profanity, flow_outage_acceptance, flow_outage_feedback, flow_outage_safety_text_router,
+    flow_outage_account_details, flow_safety_fear_entry, flow_safety_confirm, flow_billing_time_collect,
+    flow_billing_prior_sr_and_feedback, flow_billing_issue_router, flow_billing_acceptance, flow_outage_impatient,
+)
+ENTRY_HANDLERS = (
+    flow_safety_fear_entry, flow_outage_angry_profanity, flow_outage_impatient,
+    flow_billing_disappointed, flow_billing_dispute_entry,
+)
+HANDLERS = {h.__name__: h for h in RESUME_HANDLERS + ENTRY_HANDLERS}
+
+
+def call_handler(handler, session_id: str, user_text: str, account_number: Optional[str], sr: SentimentResult, resume: bool) -> Dict[str,Any]:
+    # call convention: most handlers take (session_id, user_text, sr); the exceptions are spelled out here
+    if handler is flow_outage_impatient:
+        # when resuming, the reply itself may be the account number being collected
+        return handler(session_id, (account_number or user_text) if resume else account_number, sr)
+    if handler is flow_outage_angry_profanity:
+        return handler(session_id, user_text, sr, account_number)
+    if handler in (flow_billing_dispute_entry, flow_billing_disappointed):
+        return handler(session_id, sr, account_number)
+    return handler(session_id, user_text, sr)
+
+
+def route_turn(session_id: str, user_text: str, account_number: Optional[str], sr: SentimentResult,
+               resume=RESUME_HANDLERS, entry=ENTRY_HANDLERS, timed=None):
+    """(handler name, result) of the first handler in the chain that answers, or (None, {})."""
+    for handlers, resuming in ((resume, True), (entry, False)):
+        for handler in handlers:
+            if timed is None:
+                result = call_handler(handler, session_id, user_text, account_number, sr, resuming)
+            else:
+                with timed(handler.__name__):
+                    result = call_handler(handler, session_id, user_text, account_number, sr, resuming)
+            if result:
+                return handler.__name__, result
+    return None, {}
@@ -1,11 +1,11 @@
 from __future__ import annotations
 import json
 import os
-from jsonschema import validate, ValidationError
-import google.generativeai as genai
+import threading
 from .config import get_gemini_api_key
 from .models import SentimentResult, EmotionScore, Domain
 from .json_schemas import SENTIMENT_SCHEMA
+from .metrics import LLM_CALLS, span
 from .logger import get_logger
 
 log = get_logger("natlang.gemini")
@@ -15,11 +15,25 @@ log = get_logger("natlang.gemini")
 # Outcome: defers raising missing-key errors until the first call, allowing tests
 # or notebooks to set keys dynamically.
 _GENAI_CONFIGURED = False
+# google.generativeai takes a large share of server import time, so it is imported
+# on first use; the model handle is built once and shared (see warm_up()).
+_genai = None
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
 # Allow overriding the model via env var; default to a recent model available to most keys.
 # Outcome: you can switch models without code changes by setting GEMINI_MODEL_NAME.
 MODEL_NAME = os.getenv("GEMINI_MODEL_NAME") or "models/gemini-2.5-flash"
 
 
+def _client():
+    """Import google.generativeai on first use."""
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        _genai = genai
+    return _genai
+
+
 def _ensure_configured():
     """Ensure the google.generativeai client is configured.
 
@@ -41,10 +55,30 @@ def _ensure_configured():
             "from natlang.config import set_gemini_api_key; set_gemini_api_key('YOUR_KEY')\n"
             "or set the environment variable GEMINI_API_KEY before importing natlang."
         )
-    genai.configure(api_key=key)
+    _client().configure(api_key=key)
     _GENAI_CONFIGURED = True
 
 
+def _model():
+    """The shared GenerativeModel, configured and built on first use."""
+    global _MODEL
+    if _MODEL is None:
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                _ensure_configured()
+                _MODEL = _client().GenerativeModel(
+                    model_name=MODEL_NAME,
+                    generation_config={"response_mime_type": "application/json"},
+                    system_instruction=SYSTEM_PROMPT,
+                )
+    return _MODEL
+
+
+def warm_up():
+    """Import the SDK, configure it and build the model ahead of the first chat turn."""
+    _model()
+
+
 def is_configured() -> bool:
     """Return True if a Gemini/Generative API key is available for use.
 
@@ -132,49 +166,47 @@ def analyze_text(text: str) -> SentimentResult:
     """Call Gemini and convert its JSON reply into a SentimentResult.
 
     High-level flow and expected outcomes at each block:
-    1. _ensure_configured(): ensures the genai client is configured or raises.
-       Outcome: genai ready for calls.
-    2. model = genai.GenerativeModel(...): constructs a model handle with
-       the system instruction asking for JSON output.
+    1. model = _model(): imports and configures the genai client (or raises)
+       and builds the model handle with the system instruction asking for
+       JSON output, once per process.
        Outcome: model object prepared to generate JSON responses.
-    3. payload/prompt + model.generate_content([...]): sends user text to
+    2. payload/prompt + model.generate_content([...]): sends user text to
        Gemini and receives a response object `resp`. Outcome: `resp` contains
        either `text` or `candidates` depending on SDK/runtime.
-    4. Parsing: try json.loads(raw) first, else call _parse_response(resp).
+    3. Parsing: try json.loads(raw) first, else call _parse_response(resp).
        Outcome: `parsed` is a dict with keys like `sentiment`, `profanity`,
        possibly `safety_flag`, `emotions`, `intents`, and `confidence` if the
        model returned them according to SYSTEM_PROMPT.
-    5. Exception handling: if the API call fails at network/SDK level the
+    4. Exception handling: if the API call fails at network/SDK level the
        except block logs and sets `parsed` to a neutral fallback.
        Outcome: no exception escapes; caller receives a safe default.
-    6. Mapping parsed -> SentimentResult: this code currently maps only
+    5. Mapping parsed -> SentimentResult: this code currently maps only
        `sentiment` and `profanity` into EmotionScore and a Domain heuristic.
        Outcome: returns SentimentResult(domain, emotions, profanity,...).
        Note: safety_flag/intents/confidence are not yet derived from parsed
        and are set to defaults; see recommended improvements below.
     """
-    _ensure_configured()
-    model = genai.GenerativeModel(
-        model_name=MODEL_NAME,
-        generation_config={"response_mime_type": "application/json"},
-        system_instruction=SYSTEM_PROMPT,
-    )
+    model = _model()
     try:
         payload = {"text": text}
         # send the JSON-like prompt; many SDKs accept strings, so embed the payload
         prompt = json.dumps(payload)
         log.info("Sending JSON payload to Gemini: %s", prompt)
-        resp = model.generate_content([prompt])
+        with span("llm_call"):
+            resp = model.generate_content([prompt])
         raw = getattr(resp, 'text', None)
         log.info("Raw response: %s", raw)
         parsed = None
-        try:
-            # primary parse path: if resp.text contains JSON, load it directly
-            parsed = json.loads(raw) if raw else _parse_response(resp)
-        except Exception:
-            # fallback parser handles fenced/prose-wrapped JSON
-            parsed = _parse_response(resp)
+        with span("llm_parse"):
+            try:
+                # primary parse path: if resp.text contains JSON, load it directly
+                parsed = json.loads(raw) if raw else _parse_response(resp)
+            except Exception:
+                # fallback parser handles fenced/prose-wrapped JSON
+                parsed = _parse_response(resp)
+        LLM_CALLS.inc(outcome="ok")
     except Exception as e:
+        LLM_CALLS.inc(outcome="error")
         log.error("Gemini call failed: %s", e)
         # fallback neutral parsed object — outcome: safe neutral mapping below
         parsed = {"sentiment": "neutral", "profanity": False}
@@ -0,0 +1,96 @@
+"""Idempotency-key response cache for /chat.
+
+A client retry carries the same key as the original request. The first request
+with a key computes the response; a duplicate that arrives while it is still
+running waits for that result instead of running the flows (and the LLM call)
+again, and later duplicates are answered from the cache until the entry expires
+or is evicted (LRU, bounded). Failures are not cached: waiters get the same
+error, and the next retry computes afresh.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+from .config import IDEMPOTENCY_MAX_ENTRIES, IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_WAIT_SECONDS
+from .logger import get_logger
+
+log = get_logger("natlang.idempotency")
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request body."""
+
+
+class IdempotencyTimeout(Exception):
+    """The original request is still running after the wait limit."""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "done", "value", "error", "expires")
+
+    def __init__(self, fingerprint: Hashable):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.expires = float("inf")  # set when the result lands
+
+
+class IdempotencyCache:
+    def __init__(self, maxsize: int = IDEMPOTENCY_MAX_ENTRIES, ttl: float = IDEMPOTENCY_TTL_SECONDS,
+                 wait: float = IDEMPOTENCY_WAIT_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize; self.ttl = ttl; self.wait = wait; self.clock = clock
+        self.entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def run(self, key: Hashable, fingerprint: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, replayed). `compute` runs at most once per live key."""
+        now = self.clock()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires <= now:
+                del self.entries[key]; entry = None
+            if entry is None:
+                entry = self.entries[key] = _Entry(fingerprint)
+                owner = True
+                self._evict(now)
+            else:
+                self.entries.move_to_end(key)
+                owner = False
+        if entry.fingerprint != fingerprint:
+            raise IdempotencyConflict("Idempotency key was already used with a different request.")
+        if not owner:
+            if not entry.done.wait(self.wait):
+                raise IdempotencyTimeout("The original request with this idempotency key is still in progress.")
+            if entry.error is not None:
+                raise entry.error
+            log.info("Idempotent replay key=%s", key)
+            return entry.value, True
+        try:
+            entry.value = compute()
+        except BaseException as e:
+            entry.error = e
+            with self._lock:
+                if self.entries.get(key) is entry:
+                    del self.entries[key]
+            raise
+        finally:
+            entry.expires = self.clock() + self.ttl
+            entry.done.set()
+        return entry.value, False
+
+    def _evict(self, now: float):
+        # oldest-first: drop expired entries at the front, then anything beyond maxsize
+        while self.entries:
+            key, oldest = next(iter(self.entries.items()))
+            if oldest.expires <= now or len(self.entries) > self.maxsize:
+                del self.entries[key]
+            else:
+                break
+
+
+idempotency_cache = IdempotencyCache()
@@ -0,0 +1,109 @@
+"""Time-ordered, collision-safe ticket ids.
+
+A ticket id is "SR-" plus 16 upper-case hex digits of a Snowflake-style 64-bit value:
+
+    42 bits  milliseconds since ID_EPOCH (2024-01-01 UTC, good until 2163)
+    10 bits  worker id: config.WORKER_ID (NATLANG_WORKER_ID), else host name hash xor pid
+    12 bits  sequence within the millisecond (4096 ids/ms per worker)
+
+The width is fixed, so string order is allocation order and the tickets of a
+time range are a contiguous run of ids (`id_floor(since) <= id < id_floor(until)`).
+Ids allocated by one worker never repeat: the clock is never allowed to run
+backwards and a spent sequence borrows the next millisecond. Distinct workers
+differ in the worker bits. A derived worker id is re-derived in forked
+children and distinct for the processes of one host (pids differ mod 1024);
+across hosts, or containers that all run as PID 1, only the host name hash
+tells them apart, so a deployment of several replicas must set
+NATLANG_WORKER_ID per process (`check_worker_id()` enforces this at start-up).
+
+Ids from before the allocator ("SR-" plus 8 hex digits) remain valid everywhere
+an id is parsed (SR_ID_RE) but carry no time.
+"""
+from __future__ import annotations
+import os
+import re
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from .config import WORKER_ID, REPLICAS
+
+PREFIX = "SR-"
+ID_EPOCH_MS = 1_704_067_200_000   # 2024-01-01T00:00:00Z
+WORKER_BITS, SEQUENCE_BITS = 10, 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+_SEQUENCE_MASK = (1 << SEQUENCE_BITS) - 1
+_TIME_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+# a ticket id in free text: time-ordered (16 hex) or legacy (8 hex)
+SR_ID_RE = re.compile(r"\bSR-([A-F0-9]{16}|[A-F0-9]{8})\b", re.I)
+_TIME_ORDERED = re.compile(r"SR-[0-9A-F]{16}")
+
+
+def is_time_ordered(ticket_id: str) -> bool:
+    return len(ticket_id) == 19 and _TIME_ORDERED.fullmatch(ticket_id) is not None
+
+
+def id_floor(t: datetime) -> str:
+    """The smallest id that can be allocated at or after `t` (naive = UTC)."""
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    ms = max(0, int(t.timestamp() * 1000) - ID_EPOCH_MS)
+    return f"{PREFIX}{ms << _TIME_SHIFT:016X}"
+
+
+def id_time(ticket_id: str) -> Optional[datetime]:
+    """When a time-ordered id was allocated (to the millisecond); None for legacy ids."""
+    if not is_time_ordered(ticket_id):
+        return None
+    ms = (int(ticket_id[3:], 16) >> _TIME_SHIFT) + ID_EPOCH_MS
+    return datetime.fromtimestamp(ms / 1000, timezone.utc)
+
+
+def derived_worker_id() -> int:
+    """Worker bits for a process without a configured id: the host name hash xor the pid."""
+    return (zlib.crc32(socket.gethostname().encode()) ^ os.getpid()) & MAX_WORKER
+
+
+def check_worker_id(worker_id: Optional[int] = WORKER_ID, replicas: int = REPLICAS):
+    """Refuse to run several replicas on derived worker ids: they can collide between hosts."""
+    if replicas > 1 and worker_id is None:
+        raise RuntimeError(f"NATLANG_REPLICAS={replicas} but NATLANG_WORKER_ID is unset; "
+                           f"give each process a distinct worker id in [0, {MAX_WORKER}]")
+
+
+class TicketIdAllocator:
+    def __init__(self, worker_id: Optional[int] = None):
+        if worker_id is not None and not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"worker id {worker_id} outside [0, {MAX_WORKER}]")
+        self.configured = worker_id
+        self.worker_id = worker_id if worker_id is not None else derived_worker_id()
+        self.last_ms = -1
+        self.sequence = 0
+        self._lock = threading.Lock()
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        if self.configured is None:
+            self.worker_id = derived_worker_id()
+            self.last_ms, self.sequence = -1, 0
+
+    def next(self) -> str:
+        with self._lock:
+            ms = time.time_ns() // 1_000_000 - ID_EPOCH_MS
+            if ms > self.last_ms:
+                self.last_ms, self.sequence = ms, 0
+            else:  # same millisecond, or the clock stepped back: keep counting from the last one
+                self.sequence = (self.sequence + 1) & _SEQUENCE_MASK
+                if self.sequence == 0:
+                    self.last_ms += 1  # 4096 in one millisecond: borrow the next
+            value = (self.last_ms << _TIME_SHIFT) | (self.worker_id << SEQUENCE_BITS) | self.sequence
+        return f"{PREFIX}{value:016X}"
+
+
+ticket_ids = TicketIdAllocator(WORKER_ID)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ticket_ids._after_fork)
@@ -0,0 +1,89 @@
+"""Keyword lexicon shared by sanitize and the flows.
+
+Every category (prompt injection, profanity, safety hazards, service complaints,
+CSR conduct) is compiled once into a single regex. `scan()` makes one pass over
+the (length-capped) text and returns every category that matched; results are
+memoized so the several handlers that look at the same turn share that pass.
+"""
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set
+from .config import MAX_MESSAGE_CHARS
+
+# Regexes, matched case-insensitively; quantifiers are bounded so long inputs cannot backtrack.
+INJECTION_PATTERNS = [
+    r"ignore\s+previous\s+instructions",
+    r"disregard\s+all\s+prior",
+    r"you\s+are\s+now\s+[^\n]{0,80}?system",
+    r"pretend\s+to\s+be",
+    r"execute\s+shell\s+command",
+    r"call\s+tool",
+]
+# Whole words only ("screw" but not "screwdriver")
+PROFANITY_WORDS = [
+    "fuck", "shit", "damn", "bastard", "asshole", "crap",
+    "screw", "piss", "bloody", "motherfucker", "cunt",
+]
+# Substring matches
+SAFETY_KEYWORDS = [
+    "sparking", "sparks", "smoke", "gas", "smell of gas", "downed line",
+    "downed wire", "live wire", "electrical", "on fire", "fire", "dangerous",
+    "could kill", "killed", "injury", "shock", "electrocute",
+]
+COMPLAINT_PHRASES = ["poor customer service", "bad service", "rude", "unprofessional", "didn't help", "hung up", "was rude", "customer service was"]
+CONDUCT_TERMS = ["rude", "unprofessional", "hung up", "insult", "rude behavior", "didn't care", "didn't help", "yelled"]
+
+TERMS: Dict[str, List[str]] = {
+    "profanity": PROFANITY_WORDS,
+    "safety": SAFETY_KEYWORDS,
+    "complaint": COMPLAINT_PHRASES,
+    "conduct": CONDUCT_TERMS,
+}
+WORD_BOUNDED = {"profanity"}
+
+INJECTION_RE = re.compile("|".join(f"(?:{p})" for p in INJECTION_PATTERNS), re.I)
+
+
+def _term_regex(term: str, bounded: bool) -> str:
+    return rf"\b{re.escape(term)}\b" if bounded else re.escape(term)
+
+
+def _compile(terms: Dict[str, Iterable[str]], bounded_cats: Set[str]):
+    regex_by_term: Dict[str, str] = {}
+    cats_by_term: Dict[str, Set[str]] = {}
+    for cat, words in terms.items():
+        for w in words:
+            w = w.lower()
+            regex_by_term.setdefault(w, _term_regex(w, cat in bounded_cats))
+            cats_by_term.setdefault(w, set()).add(cat)
+    # The scan reports only the longest term starting at each position, so a term
+    # also carries the categories of every other term that matches inside it
+    # ("was rude" is a complaint *and* contains the conduct term "rude").
+    closed: Dict[str, FrozenSet[str]] = {}
+    for term in regex_by_term:
+        cats = set()
+        for other, rx in regex_by_term.items():
+            if re.search(rx, term):
+                cats |= cats_by_term[other]
+        closed[term] = frozenset(cats)
+    alternation = "|".join(regex_by_term[t] for t in sorted(regex_by_term, key=len, reverse=True))
+    # zero-width lookahead so overlapping terms at successive positions are all seen
+    pattern = re.compile(rf"(?=(?P<term>{alternation})|(?P<injection>{INJECTION_RE.pattern}))", re.I)
+    return pattern, closed
+
+
+_SCAN_RE, _CATS_BY_TERM = _compile(TERMS, WORD_BOUNDED)
+
+
+@lru_cache(maxsize=4096)
+def scan(text: str) -> FrozenSet[str]:
+    """Return every lexicon category found in `text` (injection, profanity, safety, complaint, conduct)."""
+    found: Set[str] = set()
+    for m in _SCAN_RE.finditer((text or "")[:MAX_MESSAGE_CHARS]):
+        term = m.group("term")
+        if term is not None:
+            found |= _CATS_BY_TERM[term.lower()]
+        else:
+            found.add("injection")
+    return frozenset(found)
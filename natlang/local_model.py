@@ -0,0 +1,205 @@
+"""Small local classifier distilled from the LLM's own labels.
+
+Features are hashed word unigrams/bigrams and character trigrams (`DIM` buckets,
+log-scaled, L2-normalized). One weight matrix maps them to every output at once:
+
+- domain: softmax over DOMAINS
+- emotion scores: sigmoid per EMOTIONS, trained on the LLM's scores (soft targets)
+- emotion "over threshold": sigmoid per EMOTIONS, trained on score >= THRESHOLDS,
+  i.e. the decision the flows actually make
+- intents and profanity: sigmoid per label
+
+`predict()` returns a SentimentResult plus a confidence: the least certain of the
+domain probability and every binary head. The training loop (Adam, L2) lives here
+too; tools/train_local_model.py feeds it interaction journals.
+"""
+from __future__ import annotations
+import json
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .config import THRESHOLDS
+from .lexicon import scan
+from .models import SentimentResult, EmotionScore, Domain
+from .export import read_rows
+
+DIM = 2048
+DOMAINS = ["BILLING", "OUTAGE", "UNKNOWN"]
+EMOTIONS = ["angry", "impatient", "fearful", "neutral", "disappointed", "positive", "happy"]
+INTENTS = ["billing_dispute", "outage_status", "prior_ticket", "csr_conduct", "refund_request", "accept_solution",
+           "reject_solution", "provide_account", "provide_callback_time", "provide_feedback"]
+# column layout of the single output matrix
+_D = slice(0, len(DOMAINS))
+_ES = slice(_D.stop, _D.stop + len(EMOTIONS))
+_EO = slice(_ES.stop, _ES.stop + len(EMOTIONS))
+_IN = slice(_EO.stop, _EO.stop + len(INTENTS))
+_PR = _IN.stop
+OUTPUTS = _PR + 1
+
+_WORD_RE = re.compile(r"[a-z0-9']+|[*!?]+")
+
+
+def sparse_features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(bucket indices, values) of the non-zero features; the bias is not included."""
+    words = _WORD_RE.findall((text or "").lower())
+    s = f" {' '.join(words)} "
+    counts: Dict[int, int] = {}
+    crc = zlib.crc32
+    for g in ([b"w:" + w.encode() for w in words] + [b"b:" + f"{a} {b}".encode() for a, b in zip(words, words[1:])]
+              + [b"c:" + s[i:i + 3].encode() for i in range(len(s) - 2)]):
+        k = crc(g) % DIM
+        counts[k] = counts.get(k, 0) + 1
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    vals = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    return idx, vals / np.linalg.norm(vals)
+
+
+def featurize(text: str) -> np.ndarray:
+    """Dense feature row (DIM buckets + bias), as used for training."""
+    idx, vals = sparse_features(text)
+    v = np.zeros(DIM + 1, dtype=np.float32)
+    v[idx] = vals; v[DIM] = 1.0
+    return v
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+def _activate(z: np.ndarray) -> np.ndarray:
+    out = _sigmoid(z)
+    d = z[..., _D] - z[..., _D].max(axis=-1, keepdims=True)
+    e = np.exp(d)
+    out[..., _D] = e / e.sum(axis=-1, keepdims=True)
+    return out
+
+
+def targets(sentiment: Dict) -> Optional[np.ndarray]:
+    """Training target row from a journaled sentiment dict, or a flat export row (None if it carries no LLM label)."""
+    if not isinstance(sentiment, dict) or "domain" not in sentiment:
+        return None
+    if sentiment.get("source", "llm") != "llm" or not sentiment.get("confidence"):
+        return None  # local / fallback predictions and LLM-error placeholders are not labels
+    y = np.zeros(OUTPUTS, dtype=np.float32)
+    dom = str(sentiment.get("domain") or "UNKNOWN").upper()
+    y[_D.start + (DOMAINS.index(dom) if dom in DOMAINS else DOMAINS.index("UNKNOWN"))] = 1.0
+    emotions, intents = sentiment.get("emotions") or [], sentiment.get("intents") or []
+    if isinstance(emotions, str): emotions = json.loads(emotions)  # JSON-text columns of a Parquet export
+    if isinstance(intents, str): intents = json.loads(intents)
+    for e in emotions:
+        t, sc = (e.get("type"), e.get("score")) if isinstance(e, dict) else (e[0], e[1])
+        t = str(t).lower()
+        if t in EMOTIONS:
+            k = EMOTIONS.index(t); sc = float(sc)
+            y[_ES.start + k] = max(y[_ES.start + k], sc)
+            y[_EO.start + k] = max(y[_EO.start + k], 1.0 if sc >= THRESHOLDS.get(t, 0.7) else 0.0)
+    for i in intents:
+        if i in INTENTS: y[_IN.start + INTENTS.index(i)] = 1.0
+    y[_PR] = 1.0 if sentiment.get("profanity") else 0.0
+    return y
+
+
+class LocalModel:
+    def __init__(self, W: np.ndarray, meta: Optional[Dict] = None):
+        self.W = W.astype(np.float32)
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path: str) -> "LocalModel":
+        with np.load(path, allow_pickle=False) as f:
+            meta = json.loads(str(f["meta"]))
+            if meta.get("dim") != DIM or meta.get("outputs") != OUTPUTS:
+                raise ValueError(f"{path}: model layout {meta.get('dim')}x{meta.get('outputs')} does not match this build")
+            return cls(f["W"], meta)
+
+    def save(self, path: str):
+        meta = dict(self.meta, dim=DIM, outputs=OUTPUTS, domains=DOMAINS, emotions=EMOTIONS, intents=INTENTS)
+        np.savez_compressed(path, W=self.W, meta=np.array(json.dumps(meta)))
+
+    def probabilities(self, X: np.ndarray) -> np.ndarray:
+        return _activate(X @ self.W)
+
+    def predict(self, text: str) -> Tuple[SentimentResult, float]:
+        # only the few dozen active rows of W are touched
+        idx, vals = sparse_features(text)
+        p = _activate(vals @ self.W[idx] + self.W[DIM])
+        return self.decode(p, text)
+
+    def decode(self, p: np.ndarray, text: str) -> Tuple[SentimentResult, float]:
+        dom_p = p[_D]; d = int(dom_p.argmax())
+        binary = np.concatenate([p[_EO], p[_IN], p[_PR:_PR + 1]])
+        confidence = float(min(dom_p[d], np.maximum(binary, 1.0 - binary).min()))
+        emotions = []
+        for k, name in enumerate(EMOTIONS):
+            score, over, thr = float(p[_ES.start + k]), p[_EO.start + k] >= 0.5, THRESHOLDS.get(name, 0.7)
+            # keep the reported score on the same side of the flow threshold as the decision head
+            score = max(score, thr) if over else min(score, thr - 0.01)
+            if score >= 0.1: emotions.append(EmotionScore(name, round(score, 3)))
+        emotions.sort(key=lambda e: -e.score)
+        cats = scan(text)
+        sr = SentimentResult(domain=Domain(DOMAINS[d]), emotions=emotions or [EmotionScore("neutral", 0.6)],
+                             profanity=bool(p[_PR] >= 0.5 or "profanity" in cats), safety_flag="safety" in cats,
+                             intents=[n for k, n in enumerate(INTENTS) if p[_IN.start + k] >= 0.5],
+                             confidence=round(confidence, 3), source="local_model")
+        return sr, confidence
+
+
+def train(texts: Sequence[str], Y: np.ndarray, epochs: int = 60, lr: float = 0.05, l2: float = 1e-4,
+          batch_size: int = 256, seed: int = 7) -> LocalModel:
+    """Fit the output matrix with Adam on softmax / sigmoid cross-entropy."""
+    X = np.stack([featurize(t) for t in texts])
+    rng = np.random.default_rng(seed)
+    W = np.zeros((DIM + 1, OUTPUTS), dtype=np.float32)
+    m = np.zeros_like(W); v = np.zeros_like(W)
+    b1, b2, eps, step = 0.9, 0.999, 1e-8, 0
+    n = len(X)
+    for _ in range(epochs):
+        order = rng.permutation(n)
+        for start in range(0, n, batch_size):
+            idx = order[start:start + batch_size]
+            xb, yb = X[idx], Y[idx]
+            # softmax/sigmoid + cross-entropy share the gradient form (p - y)
+            grad = xb.T @ (_activate(xb @ W) - yb) / len(idx) + l2 * W
+            step += 1
+            m = b1 * m + (1 - b1) * grad; v = b2 * v + (1 - b2) * grad * grad
+            W -= lr * (m / (1 - b1 ** step)) / (np.sqrt(v / (1 - b2 ** step)) + eps)
+    return LocalModel(W, {"examples": n, "epochs": epochs})
+
+
+def load_journal(paths: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+    """Read interaction journals into (texts, targets).
+
+    Accepts journal records ({"user_text", "sentiment", ...} per line) and the flat rows of an
+    interactions export (GET /export/interactions, tools/export_data.py): JSONL, or Parquet with pyarrow.
+    """
+    texts, rows = [], []
+    for path in paths:
+        for rec in read_rows(path):
+            y = targets(rec["sentiment"] if "sentiment" in rec else rec)
+            if y is None or not rec.get("user_text"): continue
+            texts.append(rec["user_text"]); rows.append(y)
+    return texts, (np.stack(rows) if rows else np.zeros((0, OUTPUTS), dtype=np.float32))
+
+
+def evaluate(model: LocalModel, texts: Sequence[str], Y: np.ndarray, min_confidence: float) -> Dict:
+    """Accuracy per head, and how much traffic the confidence gate would serve locally (and how well)."""
+    if not len(texts):
+        return {}
+    P = model.probabilities(np.stack([featurize(t) for t in texts]))
+    dom_ok = P[:, _D].argmax(1) == Y[:, _D].argmax(1)
+    bin_cols = np.r_[np.arange(_EO.start, _EO.stop), np.arange(_IN.start, _IN.stop), [_PR]]
+    bin_ok = ((P[:, bin_cols] >= 0.5) == (Y[:, bin_cols] >= 0.5)).all(1)
+    conf = np.array([model.decode(p, t)[1] for p, t in zip(P, texts)])
+    local = conf >= min_confidence
+    exact = dom_ok & bin_ok
+    return {
+        "examples": len(texts),
+        "domain_accuracy": round(float(dom_ok.mean()), 4),
+        "decision_accuracy": round(float(exact.mean()), 4),  # domain + every emotion/intent/profanity decision right
+        "served_locally": round(float(local.mean()), 4),
+        "local_decision_accuracy": round(float(exact[local].mean()), 4) if local.any() else None,
+        "emotion_score_mae": round(float(np.abs(P[:, _ES] - Y[:, _ES]).mean()), 4),
+    }
@@ -0,0 +1,54 @@
+"""Keyword-based sentiment/intent analyzer that needs no network.
+
+Mirrors the heuristics of the scripted scenarios in tests/ so flows behave the
+same as under Gemini for those conversations. Used as the "stub" backend for
+load tests; the simulated upstream latency is configurable.
+"""
+from __future__ import annotations
+import random
+import time
+from .config import STUB_LATENCY_MS, STUB_LATENCY_JITTER_MS
+from .lexicon import scan
+from .models import SentimentResult, EmotionScore, Domain
+
+AFFIRMATIVE = {"yes", "y", "ok", "okay", "sure", "sounds good"}
+NEGATIVE = {"no", "nah", "nope"}
+
+def analyze_text_local(text: str) -> SentimentResult:
+    t = (text or "").lower()
+    cats = scan(text)
+    domain = Domain.UNKNOWN
+    emotions = [EmotionScore("neutral", 0.6)]
+    profanity = "profanity" in cats or "f***" in t
+    safety_flag = False
+    intents = []
+    if "outage" in t or "power" in t: domain = Domain.OUTAGE
+    if "bill" in t or "charge" in t: domain = Domain.BILLING
+    if "impatient" in t or "still out" in t:
+        emotions = [EmotionScore("impatient", 0.85), EmotionScore("angry", 0.2)]; intents = ["outage_status"]
+    if profanity:
+        emotions = [EmotionScore("angry", 0.92)]
+        if domain == Domain.UNKNOWN: domain = Domain.OUTAGE
+    if "safety" in cats or "scared" in t:
+        domain = Domain.OUTAGE; emotions = [EmotionScore("fearful", 0.9)]; safety_flag = True
+    elif "afraid" in t or "anxious" in t:
+        domain = Domain.OUTAGE if domain == Domain.UNKNOWN else domain; emotions = [EmotionScore("fearful", 0.85)]
+    if "overcharged" in t and domain in (Domain.UNKNOWN, Domain.BILLING):
+        domain = Domain.BILLING; emotions = [EmotionScore("neutral", 0.7)]; intents.append("billing_dispute")
+    if "disappointed" in t and "billing" in t:
+        domain = Domain.BILLING; emotions = [EmotionScore("disappointed", 0.85)]
+    if "conduct" in cats:
+        intents.append("csr_conduct")
+    stripped = t.strip()
+    if stripped in AFFIRMATIVE:
+        emotions = [EmotionScore("happy", 0.8)]; intents.append("accept_solution")
+    elif stripped in NEGATIVE:
+        emotions = [EmotionScore("angry", 0.6), EmotionScore("disappointed", 0.7)]; intents.append("reject_solution")
+    return SentimentResult(domain=domain, emotions=emotions, profanity=profanity, safety_flag=safety_flag, intents=intents, confidence=0.5, source="local")
+
+def analyze_text_stub(text: str) -> SentimentResult:
+    """Local analysis plus a simulated upstream round trip of STUB_LATENCY_MS (+/- jitter)."""
+    delay = STUB_LATENCY_MS + (random.uniform(-STUB_LATENCY_JITTER_MS, STUB_LATENCY_JITTER_MS) if STUB_LATENCY_JITTER_MS else 0.0)
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+    return analyze_text_local(text)
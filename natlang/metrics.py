@@ -0,0 +1,163 @@
+"""Low-overhead in-process metrics with Prometheus text exposition.
+
+`span(stage)` times a block into the `natlang_stage_seconds` histogram and, when
+a request is being timed (`begin_request()`), also into that request's list of
+timings so the server can emit a `Server-Timing` header.
+"""
+from __future__ import annotations
+import contextvars
+import math
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def percentile(sorted_vals: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending sequence (0.0 when empty)."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, math.ceil(pct / 100.0 * len(sorted_vals)) - 1)
+    return sorted_vals[k]
+
+
+def _fmt_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra: parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name; self.help = help; self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        return []
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {v:g}" for k, v in sorted(self.values.items())]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help)
+        self.value = 0.0; self.fn = fn
+
+    def set(self, value: float):
+        self.value = value
+
+    def _samples(self):
+        value = self.fn() if self.fn else self.value
+        return [f"{self.name} {value:g}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple[str, ...], List[float]] = {}  # key -> per-bucket counts + [+Inf, sum]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = [0.0] * (len(self.buckets) + 2)
+            s[i] += 1; s[-1] += value
+
+    def _samples(self):
+        out = []
+        for key, s in sorted(self.series.items()):
+            cumulative = 0.0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                le = 'le="%g"' % bound
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cumulative:g}")
+            cumulative += s[len(self.buckets)]
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cumulative:g}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {s[-1]:.6f}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {cumulative:g}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self.metrics.values():
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+STAGE_SECONDS = REGISTRY.register(Histogram("natlang_stage_seconds", "Time spent per /chat stage and flow handler.", ["stage"]))
+CHAT_REQUESTS = REGISTRY.register(Counter("natlang_chat_requests_total", "Chat turns by outcome.", ["outcome"]))
+LLM_CALLS = REGISTRY.register(Counter("natlang_llm_calls_total", "Sentiment LLM calls by outcome.", ["outcome"]))
+CACHE_HITS = REGISTRY.register(Counter("natlang_cache_hits_total", "Cache hits by cache.", ["cache"]))
+TICKETS_CREATED = REGISTRY.register(Counter("natlang_tickets_created_total", "Tickets created by priority.", ["priority"]))
+
+_timings: contextvars.ContextVar = contextvars.ContextVar("natlang_request_timings", default=None)
+
+
+def begin_request() -> List[Tuple[str, float]]:
+    """Start collecting span timings for the current request (context-local)."""
+    timings: List[Tuple[str, float]] = []
+    _timings.set(timings)
+    return timings
+
+
+@contextmanager
+def span(stage: str):
+    t0 = perf_counter()
+    try:
+        yield
+    finally:
+        dt = perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, dt))
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    return ", ".join(f"{stage};dur={dt * 1000:.2f}" for stage, dt in timings)
@@ -1,9 +1,10 @@
 from __future__ import annotations
 from dataclasses import dataclass, field, asdict
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
-import uuid
+import numpy as np
+from .ids import ticket_ids
 
 class Domain(str, Enum):
     BILLING = "BILLING"
@@ -13,6 +14,12 @@ class Domain(str, Enum):
 class Priority(str, Enum):
     P0 = "P0"; P1 = "P1"; P2 = "P2"; P3 = "P3"
 
+class EmotionKind(IntEnum):
+    """Position of each emotion in SentimentResult.vector (same order as config.THRESHOLDS)."""
+    ANGRY = 0; IMPATIENT = 1; FEARFUL = 2; NEUTRAL = 3; DISAPPOINTED = 4; POSITIVE = 5; HAPPY = 6
+
+EMOTION_INDEX = {k.name.lower(): int(k) for k in EmotionKind}
+
 @dataclass
 class EmotionScore:
     type: str
@@ -26,8 +33,23 @@ class SentimentResult:
     safety_flag: bool
     intents: List[str] = field(default_factory=list)
     confidence: float = 1.0
-    def score(self, emotion: str) -> float:
+    source: str = "llm"   # "llm" | "local_model" | "local" (keyword fallback); training uses only "llm"
+    def __post_init__(self):
+        # fixed emotion vector indexed by EmotionKind; the first score listed for a type wins.
+        # Built once: results are treated as read-only after construction (and may be shared via the cache).
+        self.vector = np.zeros(len(EmotionKind))
+        seen = 0
         for e in self.emotions:
+            i = EMOTION_INDEX.get(str(e.type).lower())
+            if i is not None and not seen & (1 << i):
+                self.vector[i] = float(e.score); seen |= 1 << i
+    def score(self, emotion: str) -> float:
+        i = EMOTION_INDEX.get(emotion)
+        if i is None:
+            i = EMOTION_INDEX.get(emotion.lower())
+        if i is not None:
+            return float(self.vector[i])
+        for e in self.emotions:  # types outside EmotionKind, e.g. "other"
             if e.type.lower() == emotion.lower():
                 return float(e.score)
         return 0.0
@@ -39,6 +61,7 @@ class SentimentResult:
             "safety_flag": self.safety_flag,
             "intents": list(self.intents),
             "confidence": float(self.confidence),
+            "source": self.source,
         }
 
 @dataclass
@@ -57,4 +80,4 @@ class Ticket:
     fields: Dict = field(default_factory=dict)
     @staticmethod
     def new_id() -> str:
-        return "SR-" + uuid.uuid4().hex[:8].upper()
+        return ticket_ids.next()  # time-ordered, see natlang.ids
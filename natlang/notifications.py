@@ -0,0 +1,200 @@
+from __future__ import annotations
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+from .config import NOTIFY_TICK_SECONDS, NOTIFY_BATCH_SIZE
+from .storage import store
+from .logger import get_logger
+
+log = get_logger("natlang.notifications")
+
+
+class Subscription:
+    """A recurring per-account update job (e.g. 'SMS me every hour until restored')."""
+    __slots__ = ("id", "session_id", "account_number", "ticket_id", "channel", "interval", "due", "bucket")
+
+    def __init__(self, id: str, session_id: str, account_number: Optional[str], ticket_id: Optional[str], channel: str, interval: int, due: int):
+        self.id = id; self.session_id = session_id; self.account_number = account_number
+        self.ticket_id = ticket_id; self.channel = channel
+        self.interval = interval  # in ticks
+        self.due = due            # absolute tick
+        self.bucket: Optional[Dict] = None  # the wheel slot currently holding this job
+
+
+class TimerWheel:
+    """Hierarchical timer wheel (Varghese & Lauck).
+
+    `levels` wheels of 2**bits slots each; level k holds jobs whose due tick first
+    differs from the current tick in digit k. Insert and cancel are O(1) dict
+    operations; a slot on level k>0 is cascaded down once every 2**(bits*k) ticks.
+    With the defaults (6 bits, 5 levels) the wheel spans 2**30 ticks; anything
+    further out waits in `overflow` until the top wheel wraps.
+    """
+
+    def __init__(self, bits: int = 6, levels: int = 5, tick: int = 0):
+        self.bits = bits; self.levels = levels; self.mask = (1 << bits) - 1
+        self.tick = tick
+        self.wheels: List[List[Dict[str, Subscription]]] = [[{} for _ in range(1 << bits)] for _ in range(levels)]
+        self.overflow: Dict[str, Subscription] = {}
+        self._span_mask = (1 << (bits * levels)) - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def insert(self, job: Subscription):
+        # the current tick's slot has already been drained; never schedule into it
+        if job.due <= self.tick:
+            job.due = self.tick + 1
+        self._place(job); self._count += 1
+
+    def remove(self, job: Subscription) -> bool:
+        if job.bucket is None or job.bucket.pop(job.id, None) is None:
+            return False
+        job.bucket = None; self._count -= 1
+        return True
+
+    def _place(self, job: Subscription):
+        diff = job.due ^ self.tick
+        level = (diff.bit_length() - 1) // self.bits if diff else 0
+        if level >= self.levels:
+            bucket = self.overflow
+        else:
+            bucket = self.wheels[level][(job.due >> (self.bits * level)) & self.mask]
+        bucket[job.id] = job; job.bucket = bucket
+
+    def advance_to(self, target: int) -> List[Subscription]:
+        """Move the wheel forward to `target` and return every job that came due."""
+        expired: List[Subscription] = []
+        if not self._count:
+            self.tick = max(self.tick, target)
+            return expired
+        while self.tick < target:
+            self.tick += 1
+            t = self.tick
+            if not (t & self._span_mask) and self.overflow:
+                parked, self.overflow = self.overflow, {}
+                for job in parked.values(): self._place(job)
+            # cascade from the top down so jobs can fall through several levels in one tick
+            for level in range(self.levels - 1, 0, -1):
+                if t & ((1 << (self.bits * level)) - 1):
+                    continue
+                idx = (t >> (self.bits * level)) & self.mask
+                slot = self.wheels[level][idx]
+                if slot:
+                    self.wheels[level][idx] = {}
+                    for job in slot.values(): self._place(job)
+            idx = t & self.mask
+            slot = self.wheels[0][idx]
+            if slot:
+                self.wheels[0][idx] = {}
+                for job in slot.values():
+                    job.bucket = None
+                    expired.append(job)
+                self._count -= len(slot)
+        return expired
+
+
+def log_sender(batch: List[Dict]):
+    """Default sender: log the batch. Swap in an SMS/IVR gateway via NotificationScheduler.sender."""
+    log.info("NOTIFY_BATCH size=%d channels=%s", len(batch), sorted({n["channel"] for n in batch}))
+
+
+class NotificationScheduler:
+    """Recurring customer update notifications backed by a TimerWheel.
+
+    Jobs are linked to a ticket and cancelled automatically when it closes.
+    Due notifications are handed to `sender` in batches of at most `batch_size`.
+    """
+
+    def __init__(self, sender: Optional[Callable[[List[Dict]], None]] = None, tick_seconds: float = NOTIFY_TICK_SECONDS,
+                 batch_size: int = NOTIFY_BATCH_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.sender = sender or log_sender
+        self.tick_seconds = tick_seconds; self.batch_size = batch_size; self.clock = clock
+        self.wheel = TimerWheel()
+        self.jobs: Dict[str, Subscription] = {}
+        self.by_ticket: Dict[str, Set[str]] = {}
+        self._origin = clock()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _now_tick(self, now: Optional[float] = None) -> int:
+        return int(((self.clock() if now is None else now) - self._origin) / self.tick_seconds)
+
+    def subscribe(self, session_id: str, account_number: Optional[str], ticket_id: Optional[str], interval_seconds: float, channel: str = "SMS") -> str:
+        interval = max(1, round(interval_seconds / self.tick_seconds))
+        with self._lock:
+            # count from the clock, not the wheel: the wheel lags whenever run_pending has not caught up
+            due = max(self._now_tick(), self.wheel.tick) + interval
+            job = Subscription(f"N-{next(self._ids)}", session_id, account_number, ticket_id, channel, interval, due)
+            self.wheel.insert(job)
+            self.jobs[job.id] = job
+            if ticket_id:
+                self.by_ticket.setdefault(ticket_id, set()).add(job.id)
+        log.info("NOTIFY_SUBSCRIBED job=%s session=%s ticket=%s every=%ss channel=%s", job.id, session_id, ticket_id, interval_seconds, channel)
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self.jobs.pop(job_id, None)
+            if not job:
+                return False
+            self.wheel.remove(job)
+            ids = self.by_ticket.get(job.ticket_id)
+            if ids is not None:
+                ids.discard(job_id)
+                if not ids: del self.by_ticket[job.ticket_id]
+            return True
+
+    def cancel_ticket(self, ticket_id: str) -> int:
+        with self._lock:
+            ids = self.by_ticket.pop(ticket_id, ())
+            for job_id in ids:
+                job = self.jobs.pop(job_id, None)
+                if job: self.wheel.remove(job)
+        if ids:
+            log.info("NOTIFY_CANCELLED ticket=%s jobs=%d", ticket_id, len(ids))
+        return len(ids)
+
+    def run_pending(self, now: Optional[float] = None) -> int:
+        """Advance the wheel to `now`, reschedule recurring jobs and dispatch what came due."""
+        with self._lock:
+            expired = self.wheel.advance_to(self._now_tick(now))
+            tick = self.wheel.tick
+            batch = []
+            for job in expired:
+                batch.append({"job_id": job.id, "session_id": job.session_id, "account_number": job.account_number,
+                              "ticket_id": job.ticket_id, "channel": job.channel})
+                # skip missed periods rather than firing a burst after a stall
+                job.due += job.interval
+                if job.due <= tick:
+                    job.due = tick + job.interval
+                self.wheel.insert(job)
+        for i in range(0, len(batch), self.batch_size):
+            try:
+                self.sender(batch[i:i + self.batch_size])
+            except Exception as e:
+                log.error("Notification sender failed for %d items: %s", len(batch[i:i + self.batch_size]), e)
+        return len(batch)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="natlang-notify", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.wait(self.tick_seconds):
+            self.run_pending()
+
+
+notification_scheduler = NotificationScheduler()
+store.add_listener("ticket_closed", lambda t: notification_scheduler.cancel_ticket(t.id))
@@ -0,0 +1,112 @@
+"""On-demand profiling for a running server.
+
+- `sample_stacks()` is a time-boxed sampling profiler: it periodically snapshots
+  every thread's stack via `sys._current_frames()` and aggregates them into
+  flamegraph-ready collapsed stacks ("frame;frame;frame count").
+- `request_tracer` deterministically profiles a configurable fraction of /chat
+  turns with cProfile and keeps the natlang functions of the most recent traces.
+"""
+from __future__ import annotations
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List
+from .config import PROFILE_MAX_SECONDS, TRACE_SAMPLE_RATE
+from .logger import get_logger
+
+log = get_logger("natlang.profiling")
+
+_PKG_DIR = os.path.dirname(os.path.abspath(__file__))
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter:
+    """Sample all other threads for `seconds` (capped at PROFILE_MAX_SECONDS).
+
+    Returns a Counter of collapsed stacks (root first). Only one sampling run is
+    allowed at a time; a concurrent call raises ProfilerBusy.
+    """
+    seconds = max(0.0, min(seconds, PROFILE_MAX_SECONDS))
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        log.info("PROFILE_START seconds=%.1f interval=%.4f", seconds, interval)
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+        log.info("PROFILE_DONE samples=%d unique_stacks=%d", sum(stacks.values()), len(stacks))
+        return stacks
+    finally:
+        _profile_lock.release()
+
+
+def collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+
+class RequestTracer:
+    """cProfile a sampled fraction of requests and keep the last `keep` summaries."""
+
+    def __init__(self, rate: float = TRACE_SAMPLE_RATE, keep: int = 50, top: int = 25):
+        self.rate = rate; self.top = top
+        self.traces: Deque[Dict] = deque(maxlen=keep)
+        # cProfile cannot run concurrently on every Python version; skip rather than wait
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def maybe_trace(self, label: str):
+        """Yield a record dict when this call is sampled (callers may add fields), else None."""
+        if self.rate <= 0 or random.random() >= self.rate or not self._lock.acquire(blocking=False):
+            yield None
+            return
+        record: Dict = {"label": label, "ts": time.time()}
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        try:
+            prof.enable()
+            try:
+                yield record
+            finally:
+                prof.disable()
+        finally:
+            self._lock.release()
+            record["total_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            record["functions"] = self._summarize(prof)
+            self.traces.append(record)
+
+    def _summarize(self, prof: cProfile.Profile) -> List[Dict]:
+        rows = []
+        for (filename, lineno, func), (cc, nc, tt, ct, _callers) in pstats.Stats(prof).stats.items():
+            if not filename.startswith(_PKG_DIR):
+                continue
+            rows.append({"function": f"{os.path.basename(filename)}:{lineno}({func})", "calls": nc,
+                         "own_ms": round(tt * 1000, 3), "cumulative_ms": round(ct * 1000, 3)})
+        rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+        return rows[:self.top]
+
+
+request_tracer = RequestTracer()
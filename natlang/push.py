@@ -0,0 +1,128 @@
+"""Server-pushed events per chat session (delivered to the browser as SSE).
+
+`publish()` may be called from any thread (request workers, the notification
+scheduler, store listeners); delivery is handed to each subscriber's event loop
+with `call_soon_threadsafe`, so a slow or vanished browser never blocks a
+caller. Each connection has a bounded queue (oldest event dropped when full),
+and the last few events per session are kept so a reconnecting EventSource can
+resume from its Last-Event-ID.
+"""
+from __future__ import annotations
+import asyncio
+import itertools
+import json
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from .config import PUSH_QUEUE_MAX, PUSH_BACKLOG_EVENTS, PUSH_BACKLOG_SESSIONS
+from .metrics import REGISTRY, Counter, Gauge
+from .notifications import notification_scheduler
+from .storage import store
+from .logger import get_logger
+
+log = get_logger("natlang.push")
+
+PUSHED = REGISTRY.register(Counter("natlang_push_events_total", "Server-pushed events by type and delivery.", ["event", "delivery"]))
+
+Event = Tuple[int, str, Dict[str, Any]]  # (id, event name, payload)
+
+
+class Subscriber:
+    def __init__(self, session_id: str, loop: asyncio.AbstractEventLoop, maxsize: int = PUSH_QUEUE_MAX):
+        self.session_id = session_id; self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def _offer(self, item: Event):
+        # runs on the subscriber's loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            PUSHED.inc(event=item[1], delivery="dropped_oldest")
+        self.queue.put_nowait(item)
+
+
+class PushHub:
+    def __init__(self, backlog_events: int = PUSH_BACKLOG_EVENTS, backlog_sessions: int = PUSH_BACKLOG_SESSIONS):
+        self.backlog_events = backlog_events; self.backlog_sessions = backlog_sessions
+        self.subscribers: Dict[str, Set[Subscriber]] = {}
+        self.backlog: "OrderedDict[str, Deque[Event]]" = OrderedDict()
+        self.ticket_sessions: "OrderedDict[str, str]" = OrderedDict()  # ticket id -> session id (bounded like the backlog)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def connections(self) -> int:
+        return sum(len(s) for s in self.subscribers.values())
+
+    def subscribe(self, session_id: str, last_event_id: Optional[int] = None) -> Tuple[Subscriber, List[Event]]:
+        """Register a connection (call from its event loop). Returns it plus any backlog newer than `last_event_id`."""
+        sub = Subscriber(session_id, asyncio.get_running_loop())
+        with self._lock:
+            self.subscribers.setdefault(session_id, set()).add(sub)
+            missed = [e for e in self.backlog.get(session_id, ()) if last_event_id is not None and e[0] > last_event_id]
+        return sub, missed
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            subs = self.subscribers.get(sub.session_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs: del self.subscribers[sub.session_id]
+
+    def publish(self, session_id: str, event: str, data: Dict[str, Any]) -> int:
+        """Queue an event for every connection of the session; returns how many were reached."""
+        with self._lock:
+            item: Event = (next(self._ids), event, data)
+            q = self.backlog.get(session_id)
+            if q is None:
+                q = self.backlog[session_id] = deque(maxlen=self.backlog_events)
+                if len(self.backlog) > self.backlog_sessions: self.backlog.popitem(last=False)
+            else:
+                self.backlog.move_to_end(session_id)
+            q.append(item)
+            subs = list(self.subscribers.get(session_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, item)
+            except RuntimeError:
+                self.unsubscribe(sub)  # its loop is gone
+        PUSHED.inc(event=event, delivery="live" if subs else "backlog_only")
+        return len(subs)
+
+    def link_ticket(self, ticket_id: str, session_id: str):
+        with self._lock:
+            self.ticket_sessions[ticket_id] = session_id
+            if len(self.ticket_sessions) > self.backlog_sessions * 4: self.ticket_sessions.popitem(last=False)
+
+    def session_for_ticket(self, ticket_id: str) -> Optional[str]:
+        return self.ticket_sessions.get(ticket_id)
+
+
+def format_sse(item: Event) -> str:
+    event_id, event, data = item
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+push_hub = PushHub()
+REGISTRY.register(Gauge("natlang_push_connections", "Open server-sent event connections.", fn=push_hub.connections))
+
+
+def _ticket_event(kind: str):
+    def handler(t):
+        sid = push_hub.session_for_ticket(t.id)
+        if sid:
+            push_hub.publish(sid, "ticket_update", {"ticket_id": t.id, "update": kind, "status": t.status,
+                                                    "priority": t.priority.value, "assigned_agent_id": t.assigned_agent_id})
+    return handler
+
+
+def push_sender(batch: List[Dict]):
+    """Notification sender: push each due update to the customer's open chat, then hand the batch on."""
+    for n in batch:
+        push_hub.publish(n["session_id"], "notification", {"ticket_id": n["ticket_id"], "channel": n["channel"],
+                                                          "message": "Update on your outage: crews are still working on restoration. We'll keep you posted."})
+    _downstream(batch)
+
+
+_downstream = notification_scheduler.sender  # log_sender unless an SMS/IVR gateway was plugged in
+notification_scheduler.sender = push_sender
+store.add_listener("ticket_closed", _ticket_event("closed"))
+store.add_listener("ticket_assigned", _ticket_event("assigned"))
@@ -0,0 +1,355 @@
+"""What-if replay of journaled conversations under alternate flow configurations.
+
+Recorded turns (interaction journal JSONL as kept in store.interactions, or an
+interactions export: JSONL or Parquet) are grouped by session and fed back
+through the flow state machine: the menu shortcut, then the handler chain of
+natlang.flows. Sentiment is never recomputed; each turn gets the result that
+was journaled for it (the menu prompts, journaled without one, are re-analyzed
+with the local keyword analyzer if a replay routes them past the menu).
+
+Every session is replayed once under the baseline configuration and once per
+variant. A configuration is a set of THRESHOLDS overrides (the entry rules are
+recompiled with them, natlang.rules.build_rules) and the resume / entry handler
+order. The outcome of each turn (answering flow, stage before and after,
+actions, tickets created) is compared with the baseline's, and the differences
+are totalled per variant: tickets by priority, escalations, flow usage and
+stage transitions, plus a few example turns that changed.
+
+Sessions are independent: whatever a replayed session created (tickets and
+their agent assignments, callback bookings and notification jobs, billing
+requests, feedback) is undone before the next one. Chunks of sessions are
+spread over a process pool, so a month of traffic takes minutes. Replays run on
+the process-wide store and flow singletons, so run them in an offline process
+(tools/replay_whatif.py), not inside the server.
+"""
+from __future__ import annotations
+import json
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from .config import THRESHOLDS
+from .models import SentimentResult, EmotionScore, Domain
+from .sanitize import sanitize_user_text
+from .local_sentiment import analyze_text_local
+from .storage import store
+from .billing_store import billing_store
+from .notifications import notification_scheduler
+from .stats import ESCALATION_ACTIONS, PRIORITIES
+from .export import read_rows
+from .flows import flow_menu_route, route_turn, RESUME_HANDLERS, ENTRY_HANDLERS, HANDLERS
+from . import rules
+
+# (text, account_number, sentiment, journaled flow); sentiment slimmed to a tuple, None for menu turns
+Turn = Tuple[str, Optional[str], Optional[tuple], Optional[str]]
+Session = Tuple[str, List[Turn]]
+# (flow, stage before, stage after, actions, priorities of the tickets created)
+Outcome = Tuple[str, Optional[str], Optional[str], Tuple[str, ...], Tuple[str, ...]]
+
+
+@dataclass
+class ReplayConfig:
+    name: str = "baseline"
+    thresholds: Dict[str, float] = field(default_factory=lambda: dict(THRESHOLDS))
+    resume: Tuple[str, ...] = tuple(h.__name__ for h in RESUME_HANDLERS)
+    entry: Tuple[str, ...] = tuple(h.__name__ for h in ENTRY_HANDLERS)
+
+    @classmethod
+    def from_spec(cls, name: str, spec: Dict) -> "ReplayConfig":
+        """Baseline with overrides: {"thresholds": {emotion: value}, "resume": [handler, ...], "entry": [handler, ...]}."""
+        unknown = set(spec) - {"thresholds", "resume", "entry"}
+        if unknown:
+            raise ValueError(f"{name}: unknown config keys {sorted(unknown)}")
+        cfg = cls(name=name)
+        for emotion, value in (spec.get("thresholds") or {}).items():
+            if emotion not in THRESHOLDS:
+                raise ValueError(f"{name}: unknown threshold {emotion!r}; expected one of {', '.join(THRESHOLDS)}")
+            if not 0.0 <= float(value) <= 1.0:
+                raise ValueError(f"{name}: threshold {emotion}={value} outside [0, 1]")
+            cfg.thresholds[emotion] = float(value)
+        for key in ("resume", "entry"):
+            if key in spec:
+                order = tuple(spec[key])
+                bad = [h for h in order if h not in HANDLERS]
+                if bad:
+                    raise ValueError(f"{name}: unknown {key} handlers {bad}")
+                setattr(cfg, key, order)
+        return cfg
+
+    def to_dict(self) -> Dict:
+        return {"thresholds": dict(self.thresholds), "resume": list(self.resume), "entry": list(self.entry)}
+
+
+class _Compiled:
+    def __init__(self, cfg: ReplayConfig):
+        self.name = cfg.name
+        self.table = rules.RuleTable(rules.build_rules(cfg.thresholds))
+        self.resume = tuple(HANDLERS[h] for h in cfg.resume)
+        self.entry = tuple(HANDLERS[h] for h in cfg.entry)
+
+
+# --- Loading journals ---
+
+def _slim(s) -> Optional[tuple]:
+    """Journaled sentiment (nested dict, or the columns of an export row: nested in JSONL, JSON text in Parquet) -> compact tuple; None for menu turns."""
+    if not isinstance(s, dict) or s.get("emotions") is None:
+        return None
+    emotions, intents = s["emotions"], s.get("intents") or []
+    if isinstance(emotions, str): emotions = json.loads(emotions)
+    if isinstance(intents, str): intents = json.loads(intents)
+    pairs = tuple((str(e["type"]), float(e["score"])) if isinstance(e, dict) else (str(e[0]), float(e[1])) for e in emotions)
+    return (s.get("domain") or "UNKNOWN", pairs, bool(s.get("profanity")), bool(s.get("safety_flag")), tuple(intents),
+            float(s.get("confidence") if s.get("confidence") is not None else 1.0), s.get("source") or "llm")
+
+
+def to_result(slim: tuple) -> SentimentResult:
+    domain, pairs, profanity, safety_flag, intents, confidence, source = slim
+    try:
+        domain = Domain(domain)
+    except ValueError:
+        domain = Domain.UNKNOWN
+    return SentimentResult(domain=domain, emotions=[EmotionScore(t, s) for t, s in pairs], profanity=profanity,
+                           safety_flag=safety_flag, intents=list(intents), confidence=confidence, source=source)
+
+
+def load_sessions(paths: Iterable[str]) -> List[Session]:
+    """Turns grouped by session, each session in time order (files may come in any order)."""
+    grouped: Dict[str, List[Tuple[str, Turn]]] = {}
+    for path in paths:
+        for rec in read_rows(path):
+            if not rec.get("session_id") or not rec.get("user_text"):
+                continue
+            sentiment = rec["sentiment"] if "sentiment" in rec else rec  # journal record or flat export row
+            grouped.setdefault(rec["session_id"], []).append(
+                (str(rec.get("ts") or ""), (rec["user_text"], rec.get("account_number"), _slim(sentiment), rec.get("flow"))))
+    out = []
+    for session_id, turns in grouped.items():
+        turns.sort(key=lambda t: t[0])  # stable: journal order breaks ties
+        out.append((session_id, [t for _, t in turns]))
+    return out
+
+
+# --- Replaying ---
+
+def _undo(session_id: str, tickets: Sequence[str], feedback_len: int):
+    for ticket_id in tickets:
+        store.close_ticket(ticket_id)  # listeners free the agent, the callback slot and the notification jobs
+        store.remove_ticket(ticket_id)
+        billing_store.remove(ticket_id)
+    for job_id in [j for j, job in notification_scheduler.jobs.items() if job.session_id == session_id]:
+        notification_scheduler.cancel(job_id)
+    del store.feedback[feedback_len:]
+    store.sessions.pop(session_id, None)
+
+
+def replay_session(session_id: str, turns: Sequence[Tuple[str, Optional[str], Optional[SentimentResult]]],
+                   cfg: _Compiled, matched: Optional[Sequence[FrozenSet[str]]] = None) -> List[Outcome]:
+    """Outcome of every turn of one session under `cfg`; the session's side effects are undone afterwards.
+
+    `matched` holds the rule matches of the turns that have a sentiment, in order, when they were
+    evaluated in bulk (see _match_sets); otherwise each turn is matched as the flows ask.
+    """
+    previous = rules.rule_table
+    rules.rule_table = cfg.table
+    created: List[str] = []
+    feedback_len = len(store.feedback)
+    out: List[Outcome] = []
+    try:
+        store.sessions.pop(session_id, None)
+        k = 0
+        for text, account_number, sr in turns:
+            if sr is not None:
+                if matched is None:
+                    sr.__dict__.pop("_rule_matches", None)  # matched under another configuration
+                else:
+                    sr._rule_matches = matched[k]; k += 1
+            before = store.get_session(session_id)["stage"]
+            n = len(store.tickets)
+            flow, result = "flow_menu_route", flow_menu_route(session_id, text)
+            if not result:
+                if sr is None:
+                    sr = analyze_text_local(text)
+                flow, result = route_turn(session_id, text, account_number, sr, cfg.resume, cfg.entry)
+                flow = flow or "fallback"
+            new = list(store.tickets)[n:] if len(store.tickets) > n else []
+            created.extend(new)
+            out.append((flow, before, store.get_session(session_id)["stage"], tuple(result.get("actions") or ()),
+                        tuple(store.tickets[t].priority.value for t in new)))
+    finally:
+        rules.rule_table = previous
+        _undo(session_id, created, feedback_len)
+    return out
+
+
+class Diff:
+    """A variant's outcomes against the baseline's, totalled over sessions (mergeable across workers)."""
+
+    def __init__(self, max_examples: int = 20):
+        self.max_examples = max_examples
+        self.sessions = 0; self.turns = 0; self.changed_turns = 0; self.changed_sessions = 0
+        self.tickets: Counter = Counter()       # (side, priority)
+        self.escalations: Counter = Counter()   # (side, flow)
+        self.flows: Counter = Counter()         # (side, flow)
+        self.transitions: Counter = Counter()   # (side, stage before, stage after), stage changes only
+        self.examples: List[Dict] = []
+
+    def add(self, session_id: str, texts: Sequence[str], base: Sequence[Outcome], variant: Sequence[Outcome]):
+        self.sessions += 1; self.turns += len(base)
+        changed = False
+        for i, (b, v) in enumerate(zip(base, variant)):
+            for side, o in (("baseline", b), ("variant", v)):
+                flow, before, after, actions, tickets = o
+                self.flows[side, flow] += 1
+                if ESCALATION_ACTIONS.intersection(actions): self.escalations[side, flow] += 1
+                if before != after: self.transitions[side, before, after] += 1
+                for p in tickets: self.tickets[side, p] += 1
+            if b != v:
+                self.changed_turns += 1; changed = True
+                if len(self.examples) < self.max_examples:
+                    self.examples.append({"session_id": session_id, "turn": i, "text": texts[i],
+                                          "baseline": _outcome_dict(b), "variant": _outcome_dict(v)})
+        self.changed_sessions += changed
+
+    def merge(self, other: "Diff") -> "Diff":
+        self.sessions += other.sessions; self.turns += other.turns
+        self.changed_turns += other.changed_turns; self.changed_sessions += other.changed_sessions
+        self.tickets += other.tickets; self.escalations += other.escalations
+        self.flows += other.flows; self.transitions += other.transitions
+        self.examples.extend(other.examples[:self.max_examples - len(self.examples)])
+        return self
+
+    def report(self) -> Dict:
+        def sides(counter: Counter, keys) -> Dict:
+            return {str(k): _delta(counter["baseline", k], counter["variant", k]) for k in keys}
+        flows = sorted({k[1] for k in self.flows})
+        esc_flows = sorted({k[1] for k in self.escalations})
+        pairs = {k[1:] for k in self.transitions}
+        transitions = [dict(zip(("from", "to"), p), **_delta(self.transitions[("baseline",) + p], self.transitions[("variant",) + p]))
+                       for p in pairs]
+        transitions.sort(key=lambda t: (-abs(t["delta"]), str(t["from"]), str(t["to"])))
+        return {
+            "sessions": self.sessions, "turns": self.turns,
+            "changed": {"turns": self.changed_turns, "sessions": self.changed_sessions,
+                        "turn_share": round(self.changed_turns / self.turns, 4) if self.turns else 0.0},
+            "tickets": dict(sides(self.tickets, PRIORITIES), total=_delta(
+                sum(self.tickets["baseline", p] for p in PRIORITIES), sum(self.tickets["variant", p] for p in PRIORITIES))),
+            "escalations": dict(_delta(sum(self.escalations["baseline", f] for f in esc_flows),
+                                       sum(self.escalations["variant", f] for f in esc_flows)),
+                                by_flow=sides(self.escalations, esc_flows)),
+            "flows": sides(self.flows, flows),
+            "transitions": [t for t in transitions if t["delta"]],
+            "examples": self.examples,
+        }
+
+
+def _delta(b: int, v: int) -> Dict:
+    return {"baseline": b, "variant": v, "delta": v - b}
+
+
+def _outcome_dict(o: Outcome) -> Dict:
+    flow, before, after, actions, tickets = o
+    return {"flow": flow, "stage": [before, after], "actions": list(actions), "tickets": list(tickets)}
+
+
+_configs: List[_Compiled] = []
+_max_examples = 20
+
+
+def _init_worker(configs: Sequence[ReplayConfig], max_examples: int, quiet: bool = True):
+    global _configs, _max_examples
+    _configs = [_Compiled(c) for c in configs]; _max_examples = max_examples
+    if quiet:  # flows log every step at INFO; a replay would spend its time formatting log lines
+        for name in list(logging.root.manager.loggerDict):
+            if name.startswith("natlang"): logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def _match_sets(table: rules.RuleTable, X: np.ndarray) -> List[FrozenSet[str]]:
+    """Rule matches of every row of X, decided in one vectorized pass."""
+    M = table.evaluate(X) if len(X) else np.zeros((0, len(table.names)), dtype=bool)
+    bits = M.astype(np.int64) @ (np.int64(1) << np.arange(len(table.names), dtype=np.int64))
+    sets: Dict[int, FrozenSet[str]] = {}
+    out = []
+    for b in bits.tolist():
+        m = sets.get(b)
+        if m is None:
+            m = sets[b] = frozenset(n for j, n in enumerate(table.names) if b >> j & 1)
+        out.append(m)
+    return out
+
+
+def _replay_chunk(sessions: Sequence[Session]) -> Tuple[Dict[str, Diff], Counter]:
+    base, variants = _configs[0], _configs[1:]
+    prepared = []; srs: List[SentimentResult] = []
+    for session_id, turns in sessions:
+        rows = []; lo = len(srs)
+        for text, account_number, s, flow in turns:
+            text = sanitize_user_text(text)
+            if not text:
+                continue  # the server answers empty messages with a 400 and journals nothing
+            sr = to_result(s) if s else None
+            if sr is not None: srs.append(sr)
+            rows.append((text, account_number, sr, flow))
+        prepared.append((session_id, rows, lo, len(srs)))
+    X = np.stack([rules.features(sr) for sr in srs]) if srs else np.zeros((0, len(rules.FEATURES)))
+    matched = {c.name: _match_sets(c.table, X) for c in _configs}
+    diffs = {v.name: Diff(_max_examples) for v in variants}
+    journal: Counter = Counter()  # does the baseline reproduce the journaled flows?
+    for session_id, rows, lo, hi in prepared:
+        turns = [r[:3] for r in rows]; texts = [r[0] for r in rows]
+        baseline = replay_session(session_id, turns, base, matched[base.name][lo:hi])
+        for o, r in zip(baseline, rows):
+            if r[3]:
+                journal["turns"] += 1; journal["matching"] += o[0] == r[3]
+        for v in variants:
+            diffs[v.name].add(session_id, texts, baseline, replay_session(session_id, turns, v, matched[v.name][lo:hi]))
+    return diffs, journal
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def replay(sessions: Sequence[Session], variants: Sequence[ReplayConfig], baseline: Optional[ReplayConfig] = None,
+           workers: int = 0, chunk_size: int = 200, max_examples: int = 20) -> Dict:
+    """Diff report per variant. `workers` > 0 spreads chunks of sessions over that many processes; 0 runs in this one."""
+    if not variants:
+        raise ValueError("at least one variant configuration is needed")
+    configs = [baseline or ReplayConfig()] + list(variants)
+    if len({c.name for c in configs}) != len(configs):
+        raise ValueError("configuration names must be unique")
+    t0 = time.perf_counter()
+    diffs = {v.name: Diff(max_examples) for v in variants}
+    journal: Counter = Counter()
+    if workers > 0:
+        # spawned, not forked: the parent may hold locks (audit bus, routing) that a fork would copy mid-use
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=_init_worker,
+                                 initargs=(configs, max_examples)) as pool:
+            for part, seen in pool.map(_replay_chunk, _chunks(sessions, chunk_size)):
+                for name, d in part.items(): diffs[name].merge(d)
+                journal += seen
+    else:
+        saved = (_configs, _max_examples)
+        _init_worker(configs, max_examples, quiet=False)
+        try:
+            for chunk in _chunks(sessions, chunk_size):
+                part, seen = _replay_chunk(chunk)
+                for name, d in part.items(): diffs[name].merge(d)
+                journal += seen
+        finally:
+            _restore(*saved)
+    seconds = time.perf_counter() - t0
+    turns = sum(len(t) for _, t in sessions)
+    return {"seconds": round(seconds, 3), "turns_per_second": round(turns * len(configs) / seconds) if seconds else None,
+            "baseline": dict(config=configs[0].to_dict(), journal_agreement=dict(
+                journal, share=round(journal["matching"] / journal["turns"], 4) if journal["turns"] else None)),
+            "variants": {v.name: dict(config=v.to_dict(), **diffs[v.name].report()) for v in variants}}
+
+
+def _restore(configs, max_examples):
+    global _configs, _max_examples
+    _configs, _max_examples = configs, max_examples
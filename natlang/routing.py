@@ -0,0 +1,227 @@
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .config import AGENT_ROSTER, AGENT_MAX_LOAD, AGENT_HANDOFF_MINUTES
+from .metrics import percentile
+from .logger import get_logger
+
+log = get_logger("natlang.routing")
+
+PRIORITY_RANK = {"P0": 0, "P1": 1, "P2": 2, "P3": 3}
+PRIORITIES = tuple(PRIORITY_RANK)
+
+
+class Agent:
+    __slots__ = ("id", "skills", "max_load", "load", "available")
+
+    def __init__(self, id: str, skills: Iterable[str], max_load: int):
+        self.id = id; self.skills = set(skills); self.max_load = max_load
+        self.load = 0; self.available = True
+
+
+class RoutingEngine:
+    """Skill-based, load-aware ticket routing.
+
+    Each skill keeps a min-heap of (load, seq, agent_id) with lazy invalidation
+    (an entry is stale once the agent's load or availability changed), so the
+    least-loaded agent is found in O(log n). Tickets that find no free agent wait
+    in a per-skill heap ordered by (priority, enqueue time): P0 always drains first.
+    A P0 ticket never waits: with every agent at capacity it goes to the least-loaded
+    one anyway. An assignment is released when its ticket closes or, failing that,
+    once its hold (seconds per priority) has passed.
+    """
+
+    def __init__(self, roster: Optional[Dict[str, List[str]]] = None, max_load: int = AGENT_MAX_LOAD,
+                 clock: Callable[[], float] = time.time, on_assigned: Optional[Callable[[str, str], None]] = None,
+                 hold_seconds: Optional[Dict[str, float]] = None):
+        self.clock = clock
+        self.hold_seconds = {p: m * 60.0 for p, m in AGENT_HANDOFF_MINUTES.items()} if hold_seconds is None else hold_seconds
+        self.on_assigned = on_assigned  # called as (ticket_id, agent_id) when a queued ticket gets an agent
+        self.agents: Dict[str, Agent] = {}
+        self.pools: Dict[str, List[Tuple[int, int, str]]] = {}
+        self.queues: Dict[str, List[Tuple[int, float, int, str]]] = {}
+        self.assignments: Dict[str, str] = {}   # ticket_id -> agent_id
+        self.queued: Dict[str, str] = {}        # ticket_id -> skill, while waiting
+        self.expires: Dict[str, float] = {}     # ticket_id -> when its hold runs out
+        self._expiry: List[Tuple[float, int, str]] = []  # heap of (expires, seq, ticket_id); stale once released
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        for skill, ids in (AGENT_ROSTER if roster is None else roster).items():
+            for agent_id in ids:
+                self.add_agent(agent_id, [skill], max_load)
+
+    def add_agent(self, agent_id: str, skills: Iterable[str], max_load: int = AGENT_MAX_LOAD):
+        with self._lock:
+            agent = self.agents.get(agent_id)
+            if agent:
+                agent.skills.update(skills); agent.max_load = max_load
+            else:
+                agent = self.agents[agent_id] = Agent(agent_id, skills, max_load)
+            self._push(agent)
+
+    def set_available(self, agent_id: str, available: bool):
+        with self._lock:
+            agent = self.agents[agent_id]
+            agent.available = available
+            if available:
+                self._push(agent)
+                self._drain(agent)
+
+    def _push(self, agent: Agent):
+        if not agent.available:
+            return
+        for skill in agent.skills:
+            heap = self.pools.setdefault(skill, [])
+            heapq.heappush(heap, (agent.load, next(self._seq), agent.id))
+            if len(heap) > 4 * len(self.agents) + 16:
+                self._compact(skill)
+
+    def _compact(self, skill: str):
+        self.pools[skill] = [(a.load, next(self._seq), a.id) for a in self.agents.values() if skill in a.skills and a.available]
+        heapq.heapify(self.pools[skill])
+
+    def _least_loaded(self, skill: str, over_capacity: bool = False) -> Optional[Agent]:
+        heap = self.pools.get(skill, [])
+        while heap:
+            load, _, agent_id = heap[0]
+            agent = self.agents[agent_id]
+            if not agent.available or agent.load != load:
+                heapq.heappop(heap); continue
+            return agent if over_capacity or agent.load < agent.max_load else None
+        return None
+
+    def expire(self) -> List[Tuple[str, str, float]]:
+        """Release every assignment whose hold has run out; returns the queued tickets that got an agent."""
+        with self._lock:
+            assigned = []
+            now = self.clock()
+            while self._expiry and self._expiry[0][0] <= now:
+                expires, _, ticket_id = heapq.heappop(self._expiry)
+                if self.expires.get(ticket_id) == expires:
+                    assigned.extend(self.release(ticket_id))
+            return assigned
+
+    def peek(self, skill: str) -> Optional[str]:
+        """Least-loaded available agent for `skill` without assigning anything."""
+        with self._lock:
+            self.expire()
+            agent = self._least_loaded(skill)
+            return agent.id if agent else None
+
+    def assign(self, ticket_id: str, priority: str, skill: str) -> Optional[str]:
+        """Assign a ticket to the least-loaded agent, or queue it by priority and return None (never for P0)."""
+        with self._lock:
+            if ticket_id in self.assignments:
+                return self.assignments[ticket_id]
+            self.expire()
+            agent = self._least_loaded(skill)
+            if agent is None and priority == "P0":
+                agent = self._least_loaded(skill, over_capacity=True)
+                if agent is not None:
+                    log.warning("P0_OVER_CAPACITY ticket=%s agent=%s load=%d", ticket_id, agent.id, agent.load)
+            if agent is None:
+                if ticket_id not in self.queued:
+                    heapq.heappush(self.queues.setdefault(skill, []), (PRIORITY_RANK.get(priority, 3), self.clock(), next(self._seq), ticket_id))
+                    self.queued[ticket_id] = skill
+                return None
+            self.queued.pop(ticket_id, None)  # waiting in another skill's queue (e.g. tried a specialist pool first)
+            self._give(agent, ticket_id, priority)
+            return agent.id
+
+    def _give(self, agent: Agent, ticket_id: str, priority: str):
+        agent.load += 1
+        self.assignments[ticket_id] = agent.id
+        hold = self.hold_seconds.get(priority)
+        if hold is not None:
+            self.expires[ticket_id] = expires = self.clock() + hold
+            heapq.heappush(self._expiry, (expires, next(self._seq), ticket_id))
+        self._push(agent)  # the agent's previous heap entries are now stale
+
+    def release(self, ticket_id: str) -> List[Tuple[str, str, float]]:
+        """Free the agent holding `ticket_id` and hand queued work to free agents.
+
+        Returns (ticket_id, agent_id, waited_seconds) for every queued ticket that was assigned.
+        """
+        with self._lock:
+            if self.queued.pop(ticket_id, None) is not None:
+                return []  # closed while waiting; its heap entry is skipped on pop
+            agent_id = self.assignments.pop(ticket_id, None)
+            if agent_id is None:
+                return []
+            self.expires.pop(ticket_id, None)
+            agent = self.agents[agent_id]
+            agent.load = max(0, agent.load - 1)
+            self._push(agent)
+            return self._drain(agent)
+
+    def _drain(self, agent: Agent) -> List[Tuple[str, str, float]]:
+        assigned = []
+        while agent.available and agent.load < agent.max_load:
+            best = None
+            for skill in agent.skills:
+                q = self.queues.get(skill)
+                while q and q[0][3] not in self.queued:
+                    heapq.heappop(q)
+                if q and (best is None or q[0] < self.queues[best][0]):
+                    best = skill
+            if best is None:
+                break
+            rank, enqueued_at, _, ticket_id = heapq.heappop(self.queues[best])
+            del self.queued[ticket_id]
+            self._give(agent, ticket_id, PRIORITIES[rank])
+            assigned.append((ticket_id, agent.id, self.clock() - enqueued_at))
+        for ticket_id, agent_id, waited in assigned:
+            log.info("ROUTED_FROM_QUEUE ticket=%s agent=%s waited=%.1fs", ticket_id, agent_id, waited)
+            if self.on_assigned:
+                self.on_assigned(ticket_id, agent_id)
+        return assigned
+
+    def queue_depths(self) -> Dict[str, int]:
+        with self._lock:
+            self.expire()
+            depths: Dict[str, int] = {}
+            for skill in self.queued.values():
+                depths[skill] = depths.get(skill, 0) + 1
+            return depths
+
+
+def simulate(trace: Iterable[Dict], roster: Optional[Dict[str, List[str]]] = None, max_load: int = AGENT_MAX_LOAD) -> Dict:
+    """Replay a ticket arrival trace through a fresh RoutingEngine (discrete-event, no sleeping).
+
+    Each trace item: {"ts": seconds, "priority": "P0".."P3", "skill": "OUTAGE"|..., "service_seconds": float}.
+    Returns queue wait percentiles per priority.
+    """
+    now = [0.0]
+    engine = RoutingEngine(roster, max_load=max_load, clock=lambda: now[0], hold_seconds={})  # the trace closes every ticket
+    events: List[Tuple[float, int, int, str, str, str]] = []  # (time, order, seq, kind, ticket_id, skill)
+    service: Dict[str, float] = {}; prio: Dict[str, str] = {}
+    seq = itertools.count()
+    for i, item in enumerate(sorted(trace, key=lambda x: float(x["ts"]))):
+        tid = f"T{i}"
+        service[tid] = float(item.get("service_seconds", 600)); prio[tid] = item.get("priority", "P2")
+        # completions sort before arrivals at the same instant so freed capacity is visible
+        heapq.heappush(events, (float(item["ts"]), 1, next(seq), "arrive", tid, item.get("skill", "OUTAGE")))
+    waits: Dict[str, List[float]] = {p: [] for p in PRIORITY_RANK}
+    while events:
+        t, _, _, kind, tid, skill = heapq.heappop(events)
+        now[0] = t
+        if kind == "arrive":
+            if engine.assign(tid, prio[tid], skill):
+                waits[prio[tid]].append(0.0)
+                heapq.heappush(events, (t + service[tid], 0, next(seq), "done", tid, skill))
+            continue
+        for qtid, _, waited in engine.release(tid):
+            waits[prio[qtid]].append(waited)
+            heapq.heappush(events, (t + service[qtid], 0, next(seq), "done", qtid, skill))
+    report = {}
+    for p, vals in waits.items():
+        if not vals:
+            continue
+        vals.sort()
+        report[p] = {"tickets": len(vals), "queued": sum(1 for v in vals if v > 0),
+                     "wait_p50": round(percentile(vals, 50), 3), "wait_p95": round(percentile(vals, 95), 3),
+                     "wait_p99": round(percentile(vals, 99), 3), "wait_max": round(vals[-1], 3)}
+    return {"by_priority": report, "unassigned": len(engine.queued)}
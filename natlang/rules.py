@@ -0,0 +1,136 @@
+"""Sentiment entry conditions of the flows, compiled into one predicate table.
+
+Every turn maps to a fixed feature row: the emotion vector (EmotionKind order)
+with the profanity override applied (profane => angry 1.0), then the
+profanity / safety flags and the intents the flows test. A rule is a list of
+clauses (any may hold), a clause a list of atoms (all must hold), and an atom
+is `feature >= threshold` or `feature < threshold`, with thresholds taken from
+config.THRESHOLDS (`build_rules()` takes others, for what-if replays).
+
+Compiling yields an atom table (column, threshold, negate) plus clause and rule
+incidence matrices, so `evaluate()` decides every rule for a whole matrix of
+turns in a few numpy operations; that is what offline analysis over journaled
+turns uses (tools/rule_stats.py). Flows ask `matches(sr)`, which evaluates a
+turn once and remembers the answer on the result.
+"""
+from __future__ import annotations
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+import numpy as np
+from .config import THRESHOLDS
+from .models import SentimentResult, EmotionKind
+
+EMOTIONS = [k.name.lower() for k in EmotionKind]
+INTENTS = ["billing_dispute", "accept_solution"]
+FEATURES = EMOTIONS + ["profanity", "safety_flag"] + [f"intent:{i}" for i in INTENTS]
+_COL = {f: i for i, f in enumerate(FEATURES)}
+_EMOTION_SET = frozenset(EMOTIONS)
+_ANGRY = _COL["angry"]; _PROFANITY = _COL["profanity"]; _SAFETY = _COL["safety_flag"]; _INTENT0 = _COL[f"intent:{INTENTS[0]}"]
+
+Atom = Tuple[str, str, float]   # (feature, ">=" | "<", threshold)
+
+
+def build_rules(thresholds: Dict[str, float] = THRESHOLDS) -> Dict[str, List[List[Atom]]]:
+    """The flows' entry conditions under the given emotion thresholds."""
+    T = thresholds
+    positive = min(T["positive"], T["neutral"])
+    return {
+        # flow_outage_impatient
+        "outage_impatient": [[("impatient", ">=", T["impatient"]), ("angry", "<", T["angry"])]],
+        # flow_outage_angry_profanity (it also accepts lexicon profanity found in the text)
+        "angry": [[("angry", ">=", T["angry"])]],
+        "angry_profanity": [[("angry", ">=", T["angry"]), ("profanity", ">=", 1)]],
+        # flow_safety_fear_entry / flow_safety_confirm
+        "fearful": [[("fearful", ">=", T["fearful"])]],
+        "safety_flag": [[("safety_flag", ">=", 1)]],
+        # is_positive(): outage and billing acceptance
+        "positive": [[(e, ">=", positive)] for e in ("positive", "happy", "neutral")],
+        # flow_billing_dispute_entry
+        "billing_dispute": [[("intent:billing_dispute", ">=", 1)], [("neutral", ">=", T["neutral"])]],
+        # flow_billing_disappointed
+        "billing_disappointed": [[("disappointed", ">=", T["disappointed"])]],
+    }
+
+
+RULES = build_rules()
+
+
+class RuleTable:
+    def __init__(self, rules: Dict[str, List[List[Atom]]]):
+        self.names = list(rules)
+        atoms: Dict[Tuple[int, float, bool], int] = {}
+        clauses: List[List[int]] = []; owner: List[int] = []
+        for r, name in enumerate(self.names):
+            for clause in rules[name]:
+                ids = []
+                for feature, op, thr in clause:
+                    if op not in (">=", "<"):
+                        raise ValueError(f"rule {name}: unsupported operator {op!r}")
+                    ids.append(atoms.setdefault((_COL[feature], float(thr), op == "<"), len(atoms)))
+                clauses.append(ids); owner.append(r)
+        table = list(atoms)
+        self.cols = np.array([c for c, _, _ in table], dtype=np.intp)
+        self.thresholds = np.array([t for _, t, _ in table])
+        self.negate = np.array([n for _, _, n in table])
+        # float32 incidence matrices: the products below then run through BLAS (integer matmul does not)
+        self.clauses = np.zeros((len(clauses), len(table)), dtype=np.float32)
+        for k, ids in enumerate(clauses):
+            self.clauses[k, ids] = 1
+        self.required = self.clauses.sum(axis=1)
+        self.owners = np.zeros((len(clauses), len(self.names)), dtype=np.float32)
+        self.owners[np.arange(len(clauses)), owner] = 1
+
+    def evaluate(self, X: np.ndarray) -> np.ndarray:
+        """(turns x features) -> (turns x rules) boolean match matrix."""
+        X = np.atleast_2d(X)
+        A = (X[:, self.cols] >= self.thresholds) ^ self.negate
+        held = (A.astype(np.float32) @ self.clauses.T) == self.required
+        return (held.astype(np.float32) @ self.owners) > 0
+
+    def matched(self, row: np.ndarray) -> FrozenSet[str]:
+        return frozenset(n for n, m in zip(self.names, self.evaluate(row)[0]) if m)
+
+
+def features(sr: SentimentResult) -> np.ndarray:
+    x = np.zeros(len(FEATURES))
+    x[:len(EMOTIONS)] = sr.vector
+    if sr.profanity:
+        x[_ANGRY] = 1.0; x[_PROFANITY] = 1.0
+    if sr.safety_flag:
+        x[_SAFETY] = 1.0
+    for k, intent in enumerate(INTENTS):
+        if intent in sr.intents: x[_INTENT0 + k] = 1.0
+    return x
+
+
+def features_from_dict(d: Dict) -> np.ndarray:
+    """Feature row from a journaled SentimentResult.to_dict()."""
+    x = np.zeros(len(FEATURES)); seen = set()
+    for e in d.get("emotions") or []:
+        t, s = (e.get("type"), e.get("score")) if isinstance(e, dict) else (e[0], e[1])
+        t = str(t).lower()
+        if t in _EMOTION_SET and t not in seen:
+            x[_COL[t]] = float(s); seen.add(t)
+    if d.get("profanity"):
+        x[_ANGRY] = 1.0; x[_PROFANITY] = 1.0
+    if d.get("safety_flag"):
+        x[_SAFETY] = 1.0
+    intents = d.get("intents") or ()
+    for k, intent in enumerate(INTENTS):
+        if intent in intents: x[_INTENT0 + k] = 1.0
+    return x
+
+
+def feature_matrix(rows: Iterable[Dict]) -> np.ndarray:
+    rows = [features_from_dict(r) for r in rows]
+    return np.stack(rows) if rows else np.zeros((0, len(FEATURES)))
+
+
+rule_table = RuleTable(RULES)
+
+
+def matches(sr: SentimentResult) -> FrozenSet[str]:
+    """Names of the rules this turn's sentiment satisfies (computed once per result)."""
+    m = getattr(sr, "_rule_matches", None)
+    if m is None:
+        m = sr._rule_matches = rule_table.matched(features(sr))
+    return m
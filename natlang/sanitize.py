@@ -1,15 +1,8 @@
-import re
-INJECTION_PATTERNS = [
-    r"(?i)ignore\s+previous\s+instructions",
-    r"(?i)disregard\s+all\s+prior",
-    r"(?i)you\s+are\s+now\s+.*system",
-    r"(?i)pretend\s+to\s+be",
-    r"(?i)execute\s+shell\s+command",
-    r"(?i)call\s+tool",
-]
+from .config import MAX_MESSAGE_CHARS
+from .lexicon import INJECTION_RE
+# C0 control characters except tab, LF and CR
+_CONTROL_CHARS = {c: " " for c in (*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20))}
 def sanitize_user_text(text: str) -> str:
-    sanitized = text
-    for pat in INJECTION_PATTERNS:
-        sanitized = re.sub(pat, "[filtered]", sanitized)
-    sanitized = re.sub(r"[\x00-\x08\x0B\x0C\x0E-\x1F]", " ", sanitized)
+    sanitized = INJECTION_RE.sub("[filtered]", text[:MAX_MESSAGE_CHARS])
+    sanitized = sanitized.translate(_CONTROL_CHARS)
     return sanitized.strip()
@@ -1,18 +1,45 @@
 from __future__ import annotations
-from datetime import datetime, time, timedelta
+from datetime import datetime, date, time, timedelta
+from functools import lru_cache
 from zoneinfo import ZoneInfo
-from .config import TZ, BUSINESS_START_HOUR, BUSINESS_END_HOUR
+from .config import TZ, BUSINESS_START_HOUR, BUSINESS_END_HOUR, EXTRA_HOLIDAYS
+ZONE = ZoneInfo(TZ)
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th `weekday` (Mon=0) of the month; n=-1 is the last one."""
+    if n < 0:
+        d = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        return d - timedelta(days=(d.weekday() - weekday) % 7)
+    d = date(year, month, 1)
+    return d + timedelta(days=(weekday - d.weekday()) % 7 + 7 * (n - 1))
+def _observed(d: date) -> date:
+    # a fixed-date holiday on Saturday is observed Friday, on Sunday the Monday after
+    return d - timedelta(days=1) if d.weekday() == 5 else d + timedelta(days=1) if d.weekday() == 6 else d
+@lru_cache(maxsize=32)
+def federal_holidays(year: int) -> frozenset:
+    """Observed US federal holidays falling in `year`, as ISO dates."""
+    days = [_observed(date(y, 1, 1)) for y in (year, year + 1)]  # Jan 1 on a Saturday is observed Dec 31
+    days += [_observed(date(year, m, d)) for m, d in ((6, 19), (7, 4), (11, 11), (12, 25))]
+    days += [_nth_weekday(year, 1, 0, 3), _nth_weekday(year, 2, 0, 3), _nth_weekday(year, 5, 0, -1),
+             _nth_weekday(year, 9, 0, 1), _nth_weekday(year, 10, 0, 2), _nth_weekday(year, 11, 3, 4)]
+    return frozenset(d.isoformat() for d in days if d.year == year)
+@lru_cache(maxsize=32)
+def _closed(year: int) -> frozenset:
+    return federal_holidays(year) | EXTRA_HOLIDAYS
+def is_holiday(d: date) -> bool:
+    return d.isoformat() in _closed(d.year)
+def is_business_day(d: date) -> bool:
+    return d.weekday() < 5 and not is_holiday(d)
 def is_in_business_hours(dt: datetime) -> bool:
-    local = dt.astimezone(ZoneInfo(TZ))
+    local = dt.astimezone(ZONE)
     start = time(hour=BUSINESS_START_HOUR); end = time(hour=BUSINESS_END_HOUR)
-    return (local.weekday() < 5) and (start <= local.time() < end)
+    return is_business_day(local.date()) and (start <= local.time() < end)
 def next_business_slot(dt: datetime) -> datetime:
-    local = dt.astimezone(ZoneInfo(TZ))
-    if local.weekday() < 5 and local.time() < time(BUSINESS_START_HOUR):
+    local = dt.astimezone(ZONE)
+    if is_business_day(local.date()) and local.time() < time(BUSINESS_START_HOUR):
         return local.replace(hour=BUSINESS_START_HOUR, minute=0, second=0, microsecond=0)
     if is_in_business_hours(local):
         return local
-    local = local + timedelta(days=1)
-    while local.weekday() >= 5:
-        local = local + timedelta(days=1)
-    return local.replace(hour=BUSINESS_START_HOUR, minute=0, second=0, microsecond=0)
+    d = local.date() + timedelta(days=1)
+    while not is_business_day(d):
+        d = d + timedelta(days=1)
+    return datetime.combine(d, time(BUSINESS_START_HOUR), tzinfo=ZONE)
@@ -0,0 +1,63 @@
+"""Entry point the server uses for sentiment/intent analysis.
+
+Selects the configured backend (Gemini or the local stub). A near-duplicate of a
+recent message reuses its result. Otherwise the local distilled model (if one has
+been trained) answers when it is confident enough and the turn is not a safety
+report; the rest goes through the admission gate, which sheds to the local
+keyword analyzer under overload. Only backend results are cached.
+"""
+from __future__ import annotations
+import os
+from .config import SENTIMENT_BACKEND, SENTIMENT_CACHE_ENABLED, LOCAL_MODEL_PATH, LOCAL_MODEL_MIN_CONFIDENCE
+from .models import SentimentResult
+from .admission import sentiment_gate
+from .sentiment_cache import sentiment_cache, vectorize, band_keys
+from .local_sentiment import analyze_text_local
+from .local_model import LocalModel
+from .lexicon import scan
+from .metrics import REGISTRY, Counter
+from .logger import get_logger
+
+log = get_logger("natlang.sentiment")
+
+if SENTIMENT_BACKEND == "stub":
+    from .local_sentiment import analyze_text_stub as _backend
+    _warm_backend = None
+    log.info("Using stub sentiment backend (no Gemini calls)")
+else:
+    from .gemini_client import analyze_text as _backend, warm_up as _warm_backend
+
+ROUTES = REGISTRY.register(Counter("natlang_sentiment_route_total", "Where each turn's sentiment came from.", ["route"]))
+
+local_model = None
+if os.path.exists(LOCAL_MODEL_PATH):
+    try:
+        local_model = LocalModel.load(LOCAL_MODEL_PATH)
+        log.info("Loaded local sentiment model %s (%s)", LOCAL_MODEL_PATH, local_model.meta)
+    except Exception as e:
+        log.error("Could not load local sentiment model %s: %s", LOCAL_MODEL_PATH, e)
+
+def _backend_cached(text: str) -> SentimentResult:
+    sr = _backend(text)
+    sentiment_cache.put(text, sr)
+    return sr
+
+def analyze_text(text: str) -> SentimentResult:
+    if SENTIMENT_CACHE_ENABLED:
+        sr = sentiment_cache.get(text)
+        if sr is not None:
+            ROUTES.inc(route="cache"); return sr
+    if local_model is not None and "safety" not in scan(text):
+        sr, confidence = local_model.predict(text)
+        if confidence >= LOCAL_MODEL_MIN_CONFIDENCE:
+            ROUTES.inc(route="local_model"); return sr
+    ROUTES.inc(route="llm")
+    return sentiment_gate.run(text, _backend_cached if SENTIMENT_CACHE_ENABLED else _backend, analyze_text_local)
+
+def warmup_steps():
+    """One-off costs of the first turn, for natlang.warmup to pay at start-up."""
+    steps = [("sentiment_backend", _warm_backend)] if _warm_backend else []
+    steps.append(("sentiment_cache", lambda: band_keys(vectorize("warm up"))))
+    if local_model is not None:
+        steps.append(("local_model", lambda: local_model.predict("warm up")))
+    return steps
@@ -0,0 +1,158 @@
+"""Near-duplicate cache for sentiment results, computed locally.
+
+Each message is normalized into content words (stop words dropped, plurals and
+apostrophes folded: "power's been out for hours" -> power, out, hour) and turned
+into a hashed word-count vector (L2-normalized, `DIM` buckets), so rewordings of
+the same report land close together. A SimHash signature over random
+hyperplanes is split into bands; messages sharing any band are candidates, and
+a candidate is reused only if its cosine similarity reaches the configured
+threshold and it carries the same negation words, affect words and lexicon
+categories as the message: "my power is out" may answer "power's been out for
+hours", but never "my power is not out" or "my power is out and I'm furious".
+Entries live in a fixed-size ring with a TTL. Messages that hit the safety
+lexicon never read from or write to the cache.
+
+Cached SentimentResult objects are shared between turns; callers treat them as
+read-only (the flows do).
+"""
+from __future__ import annotations
+import re
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .config import SENTIMENT_CACHE_THRESHOLD, SENTIMENT_CACHE_SIZE, SENTIMENT_CACHE_TTL_SECONDS
+from .lexicon import scan
+from .metrics import REGISTRY, CACHE_HITS, Counter, Gauge
+from .models import SentimentResult
+
+DIM = 1024          # hashed word buckets
+BITS = 192          # SimHash signature length
+BANDS = 24          # LSH bands of BITS // BANDS bits each (~99% recall at cosine 0.8)
+
+CACHE_LOOKUPS = REGISTRY.register(Counter("natlang_sentiment_cache_lookups_total", "Near-duplicate sentiment cache lookups.", ["result"]))
+
+_NORM_RE = re.compile(r"[^a-z0-9 ]+")
+_SPACE_RE = re.compile(r"\s+")
+_PLANES = np.random.default_rng(20240601).standard_normal((DIM, BITS)).astype(np.float32)
+_BAND_BITS = BITS // BANDS
+_BAND_WEIGHTS = (1 << np.arange(_BAND_BITS, dtype=np.uint64)).astype(np.uint64)
+# all matched on normalized words, so contractions appear without their apostrophe
+STOP_WORDS = frozenset("""
+    a an the my our your his her their is are was were be been being am im i me we us you it its this that these
+    those for of to in on at by with and or but so just now really very too please hi hello hey there here do does
+    did has have had can could would will about since all any some up get got going ive weve
+""".split())
+NEGATIONS = frozenset({
+    "no", "not", "never", "nothing", "none", "nobody", "nor", "neither", "without", "cannot", "cant", "dont",
+    "doesnt", "didnt", "isnt", "wasnt", "arent", "werent", "wont", "wouldnt", "shouldnt", "couldnt", "hasnt",
+    "havent", "hadnt", "aint",
+})
+# words that change the emotion read from an otherwise identical report ("still out" reads as impatience)
+AFFECT_WORDS = frozenset({
+    "still", "again", "yet", "already", "impatient", "angry", "mad", "furious", "upset", "annoyed", "frustrated",
+    "frustrating", "ridiculous", "unacceptable", "tired", "sick", "fed", "hate", "terrible", "awful", "horrible",
+    "worst", "scared", "afraid", "anxious", "worried", "nervous", "panic", "happy", "glad", "great", "thank",
+    "appreciate", "love", "awesome", "perfect", "disappointed", "disappointing", "sad", "sorry", "urgent",
+})
+
+
+def normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", _NORM_RE.sub(" ", (text or "").lower().replace("'", "").replace("\u2019", ""))).strip()
+
+
+def _stem(w: str) -> str:
+    return w[:-1] if len(w) > 3 and w[-1] == "s" and w[-2] != "s" else w
+
+
+def guard(words: List[str], categories: frozenset) -> Tuple[frozenset, frozenset, frozenset]:
+    """What a cached result must agree on besides similarity: negation and affect words, lexicon categories."""
+    present = frozenset(words)
+    return present & NEGATIONS, present & AFFECT_WORDS, categories
+
+
+def vectorize(text: str, words: Optional[List[str]] = None) -> Optional[np.ndarray]:
+    """L2-normalized hashed count vector of the stemmed content words (all words if every one is a stop word),
+    or None for empty text."""
+    words = normalize(text).split() if words is None else words
+    if not words:
+        return None
+    content = [w for w in words if w not in STOP_WORDS] or words
+    v = np.bincount([zlib.crc32(_stem(w).encode()) % DIM for w in content], minlength=DIM).astype(np.float32)
+    return v / np.linalg.norm(v)
+
+
+def band_keys(v: np.ndarray) -> List[Tuple[int, int]]:
+    bits = (v @ _PLANES > 0).reshape(BANDS, _BAND_BITS).astype(np.uint64)
+    return [(b, int(k)) for b, k in enumerate(bits @ _BAND_WEIGHTS)]
+
+
+class SentimentCache:
+    def __init__(self, threshold: float = SENTIMENT_CACHE_THRESHOLD, size: int = SENTIMENT_CACHE_SIZE,
+                 ttl: float = SENTIMENT_CACHE_TTL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.threshold = threshold; self.size = size; self.ttl = ttl; self.clock = clock
+        self.vectors = np.zeros((size, DIM), dtype=np.float32)
+        self.results: List[Optional[SentimentResult]] = [None] * size
+        self.expires = [0.0] * size
+        self.keys: List[List[Tuple[int, int]]] = [[] for _ in range(size)]
+        self.guards: List[Optional[tuple]] = [None] * size
+        self.buckets: Dict[Tuple[int, int], set] = {}
+        self.next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        now = self.clock()
+        return sum(1 for r, e in zip(self.results, self.expires) if r is not None and e > now)
+
+    def get(self, text: str) -> Optional[SentimentResult]:
+        cats = scan(text)
+        if "safety" in cats:
+            CACHE_LOOKUPS.inc(result="bypass")
+            return None
+        words = normalize(text).split()
+        v = vectorize(text, words)
+        if v is None:
+            return None
+        keys = band_keys(v)
+        g = guard(words, cats)
+        now = self.clock()
+        with self._lock:
+            cands = set()
+            for k in keys:
+                cands |= self.buckets.get(k, set())
+            cands = [i for i in cands if self.expires[i] > now and self.guards[i] == g]
+            if cands:
+                sims = self.vectors[cands] @ v
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    CACHE_LOOKUPS.inc(result="hit"); CACHE_HITS.inc(cache="sentiment")
+                    return self.results[cands[best]]
+        CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    def put(self, text: str, result: SentimentResult):
+        # zero confidence is the LLM-error fallback: never pin that onto future look-alikes
+        cats = scan(text)
+        if "safety" in cats or result.safety_flag or not result.confidence:
+            return
+        words = normalize(text).split()
+        v = vectorize(text, words)
+        if v is None:
+            return
+        keys = band_keys(v)
+        with self._lock:
+            i = self.next; self.next = (i + 1) % self.size
+            for k in self.keys[i]:  # evict whatever occupied this ring slot
+                members = self.buckets.get(k)
+                if members is not None:
+                    members.discard(i)
+                    if not members: del self.buckets[k]
+            self.vectors[i] = v; self.results[i] = result
+            self.expires[i] = self.clock() + self.ttl; self.keys[i] = keys; self.guards[i] = guard(words, cats)
+            for k in keys:
+                self.buckets.setdefault(k, set()).add(i)
+
+
+sentiment_cache = SentimentCache()
+REGISTRY.register(Gauge("natlang_sentiment_cache_entries", "Live entries in the near-duplicate sentiment cache.", fn=sentiment_cache.__len__))
@@ -1,36 +1,47 @@
 from __future__ import annotations
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, Response, Header, Request
+from fastapi.responses import RedirectResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime, timezone
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List
+import asyncio
+import threading
 import uuid
+import hmac
 
+from .warmup import readiness
+from .ids import check_worker_id
 from .models import Message
 from .storage import store
-from .gemini_client import analyze_text
+from .billing_store import billing_store
+from .sentiment import analyze_text, warmup_steps
 from .sanitize import sanitize_user_text
 from .rate_limit import allow as allow_request
+from .notifications import notification_scheduler
+from .audit import audit_bus, AuditEvent
+from .idempotency import idempotency_cache, IdempotencyConflict, IdempotencyTimeout
+from .session_locks import session_locks, SessionBusy
+from .push import push_hub, format_sse
+from .static_assets import AssetBundle
+from .stats import live_stats
+from .export import export as export_chunks, parse_time, ExportUnavailable, FORMATS as EXPORT_FORMATS
+from .metrics import REGISTRY, CHAT_REQUESTS, CACHE_HITS, TICKETS_CREATED, begin_request, span, server_timing_header
+from .profiling import sample_stacks, collapsed, request_tracer, ProfilerBusy
+from .config import DEBUG_TOKEN, PROFILE_MAX_SECONDS, BATCH_MAX_ITEMS, BATCH_WORKERS, ASYNC_MAX_PENDING, PUSH_KEEPALIVE_SECONDS, WARMUP_ENABLED, BILLING_IMPORT_PATH
 from .logger import get_logger
-from .flows import (
-    flow_menu_route,
-    flow_outage_impatient, flow_outage_acceptance, flow_outage_feedback,
-    flow_outage_account_details,
-    flow_outage_angry_profanity,
-    flow_safety_fear_entry, flow_safety_confirm,
-    flow_billing_dispute_entry, flow_billing_time_collect, flow_billing_acceptance,
-    flow_billing_disappointed, flow_billing_prior_sr_and_feedback, flow_billing_issue_router
-    , flow_outage_safety_text_router
-)
+from .flows import flow_menu_route, route_turn
 
 log = get_logger("natlang.server")
 app = FastAPI(title="NatLang Utility Chat — Greeting + Menu + CLI")
+store.add_listener("ticket_created", lambda t: TICKETS_CREATED.inc(priority=t.priority.value))
 
 class ChatRequest(BaseModel):
     session_id: str
     text: str
     account_number: str | None = None
+    idempotency_key: str | None = None   # same key on a retry => the original reply, no recompute
 
 class ChatResponse(BaseModel):
     session_id: str
@@ -39,16 +50,228 @@ class ChatResponse(BaseModel):
     meta: dict
     correlation_id: str
 
+class ChatReceipt(BaseModel):
+    receipt_id: str
+    session_id: str
+    status: str
+
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+
+class BatchItemError(BaseModel):
+    status_code: int
+    detail: str
+
+class BatchItemResult(BaseModel):
+    index: int
+    ok: bool
+    response: ChatResponse | None = None
+    error: BatchItemError | None = None
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchItemResult]
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    if not allow_request(req.session_id):
+def chat(req: ChatRequest, response: Response, idempotency_key: str | None = Header(default=None)):
+    timings = begin_request()
+    key = req.idempotency_key or idempotency_key
+    replayed = False
+    try:
+        with request_tracer.maybe_trace(req.session_id) as trace, span("chat"):
+            if key:
+                resp, replayed = run_idempotent(req, key)
+            else:
+                resp = run_turn(req)
+            if trace is not None: trace["correlation_id"] = resp.correlation_id
+    except HTTPException as e:
+        CHAT_REQUESTS.inc(outcome=str(e.status_code))
+        raise
+    CHAT_REQUESTS.inc(outcome="replayed" if replayed else "ok")
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    response.headers["X-Correlation-ID"] = resp.correlation_id
+    if replayed: response.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+# runs /chat/batch sessions and /chat/async turns off the request thread
+turn_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="natlang-turn")
+# the executor's queue is unbounded: cap the async turns waiting in it
+async_slots = threading.BoundedSemaphore(ASYNC_MAX_PENDING)
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+def chat_batch(batch: BatchChatRequest, response: Response):
+    """Many turns in one call: sessions run in parallel, each session's turns in order.
+
+    Identical messages in the batch share one sentiment analysis. Every item gets
+    its own result or error; one failing item does not affect the others.
+    """
+    if len(batch.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch.")
+    timings = begin_request()
+    results: List[BatchItemResult | None] = [None] * len(batch.items)
+    by_session: Dict[str, List[int]] = {}
+    for i, item in enumerate(batch.items):
+        by_session.setdefault(item.session_id, []).append(i)
+    analyze = shared_analyzer()
+
+    def run_session(indices: List[int]):
+        for i in indices:
+            results[i] = run_batch_item(i, batch.items[i], analyze)
+
+    with span("chat_batch"):
+        for f in [turn_pool.submit(run_session, idx) for idx in by_session.values()]:
+            f.result()
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return BatchChatResponse(results=results)
+
+@app.post("/chat/async", response_model=ChatReceipt, status_code=202)
+def chat_async(req: ChatRequest, idempotency_key: str | None = Header(default=None)):
+    """Acknowledge at once; the reply (or a turn_error) is pushed on GET /events/{session_id}.
+
+    Empty and rate-limited messages are refused here, before they take a worker;
+    503 when ASYNC_MAX_PENDING accepted turns are still unfinished.
+    """
+    try:
+        admit(req)
+    except HTTPException as e:
+        CHAT_REQUESTS.inc(outcome=str(e.status_code))
+        raise
+    if not async_slots.acquire(blocking=False):
+        CHAT_REQUESTS.inc(outcome="503")
+        raise HTTPException(status_code=503, detail="Too many messages in progress. Please retry shortly.")
+    receipt = ChatReceipt(receipt_id=f"r-{uuid.uuid4().hex[:12]}", session_id=req.session_id, status="accepted")
+    push_hub.publish(req.session_id, "receipt", receipt.model_dump())
+    try:
+        turn_pool.submit(deliver_pending_turn, req, req.idempotency_key or idempotency_key, receipt.receipt_id)
+    except BaseException:
+        async_slots.release()
+        raise
+    return receipt
+
+def deliver_pending_turn(req: ChatRequest, key: str | None, receipt_id: str):
+    try:
+        deliver_async_turn(req, key, receipt_id, admitted=True)
+    finally:
+        async_slots.release()
+
+def deliver_async_turn(req: ChatRequest, key: str | None, receipt_id: str, admitted: bool = False):
+    try:
+        resp, replayed = run_idempotent(req, key, admitted=admitted) if key else (run_turn(req, admitted=admitted), False)
+    except HTTPException as e:
+        CHAT_REQUESTS.inc(outcome=str(e.status_code))
+        push_hub.publish(req.session_id, "turn_error", {"receipt_id": receipt_id, "status_code": e.status_code, "detail": str(e.detail)})
+        return
+    except Exception as e:
+        CHAT_REQUESTS.inc(outcome="500")
+        log.error("Async turn %s (session=%s) failed: %s", receipt_id, req.session_id, e)
+        push_hub.publish(req.session_id, "turn_error", {"receipt_id": receipt_id, "status_code": 500, "detail": "Internal error."})
+        return
+    CHAT_REQUESTS.inc(outcome="replayed" if replayed else "ok")
+    push_hub.publish(req.session_id, "reply", dict(resp.model_dump(), receipt_id=receipt_id))
+
+@app.get("/events/{session_id}")
+async def events(session_id: str, request: Request, last_event_id: str | None = Header(default=None)):
+    """Server-sent event stream for one chat session: receipt, reply, error, ticket_update, notification."""
+    try:
+        last = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last = None
+    sub, missed = push_hub.subscribe(session_id, last)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            for item in missed:
+                yield format_sse(item)
+            while True:
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), PUSH_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(item)
+        finally:
+            push_hub.unsubscribe(sub)
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def run_batch_item(i: int, req: ChatRequest, analyze: Callable) -> BatchItemResult:
+    try:
+        if req.idempotency_key:
+            resp, replayed = run_idempotent(req, req.idempotency_key, analyze)
+        else:
+            resp, replayed = run_turn(req, analyze), False
+    except HTTPException as e:
+        CHAT_REQUESTS.inc(outcome=str(e.status_code))
+        return BatchItemResult(index=i, ok=False, error=BatchItemError(status_code=e.status_code, detail=str(e.detail)))
+    except Exception as e:
+        CHAT_REQUESTS.inc(outcome="500")
+        log.error("Batch item %d (session=%s) failed: %s", i, req.session_id, e)
+        return BatchItemResult(index=i, ok=False, error=BatchItemError(status_code=500, detail="Internal error."))
+    CHAT_REQUESTS.inc(outcome="replayed" if replayed else "ok")
+    return BatchItemResult(index=i, ok=True, response=resp)
+
+def shared_analyzer() -> Callable:
+    """analyze_text memoized for one batch; concurrent callers with the same text wait for one call."""
+    futures: Dict[str, Future] = {}
+    lock = threading.Lock()
+    def analyze(text: str):
+        with lock:
+            fut = futures.get(text); owner = fut is None
+            if owner: fut = futures[text] = Future()
+        if owner:
+            try:
+                fut.set_result(analyze_text(text))
+            except BaseException as e:
+                fut.set_exception(e)
+        return fut.result()
+    return analyze
+
+def run_idempotent(req: ChatRequest, key: str, analyze: Callable | None = None, admitted: bool = False):
+    # keys are scoped to the session; reusing one for a different message is a client bug
+    try:
+        resp, replayed = idempotency_cache.run((req.session_id, key), (req.text, req.account_number), lambda: run_turn(req, analyze, admitted))
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyTimeout as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if replayed: CACHE_HITS.inc(cache="idempotency")
+    return resp, replayed
+
+def admit(req: ChatRequest):
+    """Cheap rejections, checked before a turn queues for its session or a worker thread."""
+    if not (req.text or "").strip():
+        raise HTTPException(status_code=400, detail="Empty message.")
+    with span("rate_limit"):
+        allowed = allow_request(req.session_id)
+    if not allowed:
         raise HTTPException(status_code=429, detail="Rate limit exceeded. Please wait a moment.")
+
+def run_turn(req: ChatRequest, analyze: Callable | None = None, admitted: bool = False) -> "ChatResponse":
+    if not admitted:  # /chat/async admits before it queues the turn
+        admit(req)
+    # one turn at a time per session (in arrival order); other sessions are unaffected
+    with span("session_wait"):
+        try:
+            session_locks.acquire(req.session_id)
+        except SessionBusy as e:
+            raise HTTPException(status_code=409, detail=str(e))
+    try:
+        resp = process_chat(req, analyze)
+    finally:
+        session_locks.release(req.session_id)
+    readiness.first_response()
+    return resp
+
+def process_chat(req: ChatRequest, analyze: Callable | None = None) -> "ChatResponse":
+    """One turn, without admission (run_turn) or the session lock; scripts and replays call it directly."""
     corr = str(uuid.uuid4())
-    clean_text = sanitize_user_text(req.text or "")
+    with span("sanitize"):
+        clean_text = sanitize_user_text(req.text or "")
     if not clean_text:
         raise HTTPException(status_code=400, detail="Empty message.")
 
-    log.info("Incoming chat: session=%s clean_text=%s account_number=%s", req.session_id, clean_text, req.account_number)
+    log.info("Incoming chat: corr=%s session=%s clean_text=%s account_number=%s", corr, req.session_id, clean_text, req.account_number)
 
     store.log_message(Message(
         id=f"m-{len(store.messages)+1}", session_id=req.session_id,
@@ -56,104 +279,103 @@ def chat(req: ChatRequest):
     ))
 
     # Menu routing shortcut (GUI/CLI buttons/choices)
-    menu = flow_menu_route(req.session_id, clean_text)
+    with span("flow_menu_route"):
+        menu = flow_menu_route(req.session_id, clean_text)
     if menu:
-        reply_and_log(req, menu, None, corr)   # sentiment not needed for menu prompt
-        return build_response(req.session_id, menu, corr)
+        reply_and_log(req, menu, None, corr, "flow_menu_route")   # sentiment not needed for menu prompt
+        return build_response(req.session_id, menu, corr, "flow_menu_route")
 
     # Sentiment/intent analysis
-    log.info("Calling sentiment analyzer (Gemini)")
-    sr = analyze_text(clean_text)
+    log.info("Calling sentiment analyzer (Gemini) corr=%s", corr)
+    with span("sentiment"):
+        sr = (analyze or analyze_text)(clean_text)
     try:
         log.info("Gemini sentiment result: %s", sr.to_dict())
     except Exception:
         log.info("Gemini sentiment result: %s", str(sr))
 
-    # Resume staged flows first
-    # Resume staged flows first (include outage account collection handler)
-    for handler in (
-        # check for immediate escalations (angry+profanity) first when resuming
-        flow_outage_angry_profanity,
-        flow_outage_acceptance,
-    flow_outage_feedback,
-    flow_outage_safety_text_router,
-    flow_outage_account_details,
-        flow_safety_fear_entry,
-        flow_safety_confirm,
-        flow_billing_time_collect,
-        flow_billing_prior_sr_and_feedback,
-    flow_billing_issue_router,
-        flow_billing_acceptance,
-        flow_outage_impatient,
-    ):
-        # call convention: many resume handlers accept (session_id, user_text, sr)
-        # but flow_outage_impatient expects (session_id, account_number, sr) so pass account or text as needed
-        if handler is flow_outage_impatient:
-            acct_arg = req.account_number or clean_text
-            log.info("Resuming staged handler %s with account_arg=%s", handler.__name__, acct_arg)
-            result = handler(req.session_id, acct_arg, sr)
-        elif handler is flow_outage_angry_profanity:
-            # this resume handler needs (session_id, user_text, sr, account_number)
-            log.info("Resuming staged handler %s", handler.__name__)
-            result = handler(req.session_id, clean_text, sr, req.account_number)
-        elif handler is flow_safety_fear_entry:
-            # flow_safety_fear_entry signature: (session_id, user_text, sr)
-            log.info("Resuming staged handler %s", handler.__name__)
-            result = handler(req.session_id, clean_text, sr)
-        else:
-            log.info("Resuming staged handler %s", handler.__name__)
-            result = handler(req.session_id, clean_text, sr)
-        if result:
-            log.info("Handler %s produced result: %s", handler.__name__, result.get("actions"))
-            reply_and_log(req, result, sr, corr)
-            return build_response(req.session_id, result, corr)
-
-    # New-intent handlers (safety first)
-    for handler in (
-        flow_safety_fear_entry,
-        flow_outage_angry_profanity,
-        flow_outage_impatient,
-        flow_billing_disappointed,
-        flow_billing_dispute_entry,
-    ):
-        if handler in (flow_outage_impatient,):
-            result = handler(req.session_id, req.account_number, sr)
-        elif handler in (flow_outage_angry_profanity,):
-            # flow_outage_angry_profanity signature: (session_id, user_text, sr, account_number)
-            result = handler(req.session_id, clean_text, sr, req.account_number)
-        elif handler in (flow_billing_dispute_entry,):
-            result = handler(req.session_id, sr, req.account_number)
-        elif handler in (flow_billing_disappointed,):
-            result = handler(req.session_id, sr, req.account_number)
-        elif handler in (flow_safety_fear_entry,):
-            # flow_safety_fear_entry signature: (session_id, user_text, sr)
-            result = handler(req.session_id, clean_text, sr)
-        else:
-            result = handler(req.session_id, sr)
-        if result:
-            reply_and_log(req, result, sr, corr)
-            return build_response(req.session_id, result, corr)
+    # Resume staged flows first, then new-intent entries (natlang.flows.route_turn)
+    flow, result = route_turn(req.session_id, clean_text, req.account_number, sr, timed=span)
+    if result:
+        log.info("Handler %s produced result: %s corr=%s", flow, result.get("actions"), corr)
+        reply_and_log(req, result, sr, corr, flow)
+        return build_response(req.session_id, result, corr, flow)
 
     # Fallback
     result = {"message":"I’m here to help with billing or outage status. Could you share a few more details?",
               "ticket_id":None,"meta":{"rule":"FALLBACK"}}
-    reply_and_log(req, result, sr, corr)
-    return build_response(req.session_id, result, corr)
-
-def reply_and_log(req: ChatRequest, result: dict, sr, corr: str):
-    # Interaction journal: user input, bot reply, and sentiment snapshot (if available)
-    if sr is not None:
-        store.add_interaction(req.session_id, req.text, result["message"], sr.to_dict())
-    else:
-        store.add_interaction(req.session_id, req.text, result["message"], {"note":"menu"})
-    store.log_message(Message(
-        id=f"m-{len(store.messages)+1}", session_id=req.session_id,
-        direction="bot", text=result["message"], timestamp=datetime.now(timezone.utc),
-        meta={"ticket_id": result.get("ticket_id"), "actions": result.get("actions"), "correlation_id": corr}
-    ))
+    reply_and_log(req, result, sr, corr, "fallback")
+    return build_response(req.session_id, result, corr, "fallback")
+
+def reply_and_log(req: ChatRequest, result: dict, sr, corr: str, flow: str | None = None):
+    # Interaction journal: user input, bot reply, sentiment snapshot (if available) and which flow answered
+    # (persisted by the audit bus consumer; sr.to_dict() runs there, not on the request thread)
+    with span("store"):
+        turn = {"bot_text": result["message"], "flow": flow, "actions": result.get("actions"), "account_number": req.account_number}
+        if sr is not None:
+            audit_bus.emit(AuditEvent("interaction", req.session_id, None, req.text, dict(turn, sr=sr)))
+        else:
+            audit_bus.emit(AuditEvent("interaction", req.session_id, None, req.text, dict(turn, sentiment={"note":"menu"})))
+        if result.get("ticket_id"):
+            push_hub.link_ticket(result["ticket_id"], req.session_id)  # later ticket updates go to this chat
+        store.log_message(Message(
+            id=f"m-{len(store.messages)+1}", session_id=req.session_id,
+            direction="bot", text=result["message"], timestamp=datetime.now(timezone.utc),
+            meta={"ticket_id": result.get("ticket_id"), "actions": result.get("actions"), "correlation_id": corr}
+        ))
+
+def build_response(session_id: str, result: dict, corr: str, flow: str | None = None):
+    return ChatResponse(session_id=session_id, reply=result["message"], ticket_id=result.get("ticket_id"), meta={"actions": result.get("actions"), "flow": flow}, correlation_id=corr)
 
-def build_response(session_id: str, result: dict, corr: str):
-    return ChatResponse(session_id=session_id, reply=result["message"], ticket_id=result.get("ticket_id"), meta={"actions": result.get("actions")}, correlation_id=corr)
+@app.get("/stats")
+def stats(response: Response, series: bool = False):
+    """Rolling-window turn, emotion, ticket and escalation aggregates (no history scans; cheap to poll every second)."""
+    response.headers["Cache-Control"] = "no-store"
+    return live_stats.snapshot(series=series)
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def require_debug_token(token: str | None):
+    # the debug surface does not exist unless NATLANG_DEBUG_TOKEN is set
+    if not DEBUG_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, DEBUG_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid debug token.")
+
+@app.post("/debug/profile")
+def debug_profile(seconds: float = 10.0, interval_ms: float = 5.0, x_debug_token: str | None = Header(default=None)):
+    """Sample every thread for `seconds` and return collapsed stacks (feed to flamegraph.pl / speedscope)."""
+    require_debug_token(x_debug_token)
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILE_MAX_SECONDS}].")
+    try:
+        stacks = sample_stacks(seconds, interval=max(interval_ms, 1.0) / 1000.0)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(collapsed(stacks), headers={"Content-Disposition": "attachment; filename=natlang.collapsed"})
+
+@app.get("/debug/traces")
+def debug_traces(x_debug_token: str | None = Header(default=None)):
+    require_debug_token(x_debug_token)
+    return {"sample_rate": request_tracer.rate, "traces": list(request_tracer.traces)}
+
+@app.get("/export/{kind}")
+def export_data(kind: str, format: str = "jsonl", since: str | None = None, until: str | None = None,
+                session_id: str | None = None, x_debug_token: str | None = Header(default=None)):
+    """Stream interactions | feedback | tickets | billing as JSONL, Arrow IPC or Parquet (debug token required)."""
+    require_debug_token(x_debug_token)
+    try:
+        chunks = export_chunks(kind, format, parse_time(since), parse_time(until), session_id)
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type, ext = EXPORT_FORMATS[format]
+    # a sync generator: Starlette pulls it from the threadpool, so the event loop keeps serving
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename=natlang-{kind}.{ext}"})
 
 @app.get("/healthz")
 def health():
@@ -163,10 +385,55 @@ def health():
         gemini_ok = gemini_is_configured()
     except Exception:
         gemini_ok = False
-    return {"ok": True, "gemini_configured": gemini_ok}
+    return {"ok": True, "gemini_configured": gemini_ok, "warmup": readiness.state,
+            "audit": dict(audit_bus.snapshot(), depth=audit_bus.depth())}
+
+@app.get("/readyz")
+def ready(response: Response):
+    """503 until the start-up warm-up has finished and the billing import (if configured) has succeeded,
+    so a balancer can hold traffic for cold replicas."""
+    if not readiness.ready():
+        response.status_code = 503
+    return readiness.snapshot()
+
+@app.on_event("startup")
+def start_background_workers():
+    check_worker_id()
+    notification_scheduler.start()
+    audit_bus.start()
+    steps = warmup_steps() if WARMUP_ENABLED else []
+    # prior-SR validation needs the ledger: not ready until the import has succeeded
+    required = [("billing_import", lambda: log.info("Imported %d billing requests from %s",
+                                                    billing_store.import_jsonl(BILLING_IMPORT_PATH), BILLING_IMPORT_PATH))] if BILLING_IMPORT_PATH else []
+    readiness.start(steps, required=required)
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    readiness.stop()
+    notification_scheduler.stop()
+    audit_bus.stop()
 
 WEB_DIR = Path(__file__).resolve().parent.parent / "web"
-app.mount("/ui", StaticFiles(directory=str(WEB_DIR), html=True), name="ui")
+ui_assets = AssetBundle(WEB_DIR)
+
+@app.get("/ui", include_in_schema=False)
+def ui_root(): return RedirectResponse(url="/ui/")
+
+@app.get("/ui/{path:path}", include_in_schema=False)
+def ui(path: str, accept_encoding: str | None = Header(default=None), if_none_match: str | None = Header(default=None)):
+    asset = ui_assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not found.")
+    encoding, body = asset.pick(accept_encoding)
+    headers = {"Cache-Control": asset.cache_control, "Vary": "Accept-Encoding", "ETag": asset.etag(encoding)}
+    if asset.not_modified(if_none_match):
+        CACHE_HITS.inc(cache="ui")
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=asset.content_type, headers=headers)
 
 @app.get("/")
 def root(): return RedirectResponse(url="/ui/")
+
+readiness.imported()
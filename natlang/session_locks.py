@@ -0,0 +1,88 @@
+"""Per-session turn serialization.
+
+Turns for the same session run one at a time in arrival order (FIFO hand-off,
+so a burst cannot starve an earlier turn); turns for different sessions never
+wait on each other. A session's slot exists only while some turn holds or waits
+for it and is dropped when the last one releases, so idle sessions cost nothing.
+At most `max_waiters` turns queue behind the running one; a flood beyond that is
+refused at once instead of parking a worker thread for the whole timeout.
+"""
+from __future__ import annotations
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Optional
+from .config import SESSION_LOCK_TIMEOUT_SECONDS, SESSION_MAX_WAITERS
+from .metrics import REGISTRY, Gauge
+
+
+class SessionBusy(Exception):
+    """Timed out waiting behind earlier turns of the same session, or too many already waiting."""
+
+
+class _Slot:
+    __slots__ = ("busy", "refs", "waiters")
+
+    def __init__(self):
+        self.busy = False
+        self.refs = 0  # holder + waiters; the slot is deleted when this drops to 0
+        self.waiters: Deque[threading.Event] = deque()
+
+
+class SessionLocks:
+    def __init__(self, timeout: float = SESSION_LOCK_TIMEOUT_SECONDS, max_waiters: int = SESSION_MAX_WAITERS):
+        self.timeout = timeout; self.max_waiters = max_waiters
+        self.slots: Dict[str, _Slot] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def acquire(self, session_id: str, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            slot = self.slots.get(session_id)
+            if slot is None:
+                slot = self.slots[session_id] = _Slot()
+            if slot.busy and len(slot.waiters) >= self.max_waiters:
+                raise SessionBusy(f"Session {session_id} has too many messages in progress.")
+            slot.refs += 1
+            if not slot.busy:
+                slot.busy = True
+                return
+            ev = threading.Event()
+            slot.waiters.append(ev)
+        if ev.wait(timeout):
+            return  # ownership was handed to us by release()
+        with self._lock:
+            if ev.is_set():
+                return  # handed over just as we timed out
+            slot.waiters.remove(ev)
+            self._unref(session_id, slot)
+        raise SessionBusy(f"Session {session_id} is still processing an earlier message.")
+
+    def release(self, session_id: str):
+        with self._lock:
+            slot = self.slots[session_id]
+            if slot.waiters:
+                slot.waiters.popleft().set()  # stays busy: direct hand-off to the next turn
+            else:
+                slot.busy = False
+            self._unref(session_id, slot)
+
+    def _unref(self, session_id: str, slot: _Slot):
+        slot.refs -= 1
+        if slot.refs == 0:
+            del self.slots[session_id]
+
+    @contextmanager
+    def hold(self, session_id: str, timeout: Optional[float] = None):
+        self.acquire(session_id, timeout)
+        try:
+            yield
+        finally:
+            self.release(session_id)
+
+
+session_locks = SessionLocks()
+REGISTRY.register(Gauge("natlang_session_locks", "Sessions with a turn running or queued.", fn=session_locks.__len__))
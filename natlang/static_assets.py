@@ -0,0 +1,119 @@
+"""Fingerprinted, precompressed serving of the chat UI (web/).
+
+At startup every asset is read once, hashed and compressed (gzip always,
+brotli when the `brotli` package is installed). Assets are published under a
+content-hashed name (app.3f2a9c01d4.js) with a year-long immutable cache
+lifetime; index.html is rewritten to point at those names and is served with
+`no-cache` plus an ETag, so a returning browser revalidates the shell with a
+304 and never refetches unchanged scripts or styles. Requests only pick a
+prebuilt variant: no file I/O or compression happens on the request path.
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+import mimetypes
+import re
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from .logger import get_logger
+
+try:
+    import brotli  # optional: adds the "br" variant
+except ImportError:
+    brotli = None
+
+log = get_logger("natlang.static_assets")
+
+INDEX = "index.html"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+SHORT = "public, max-age=300"   # plain (unhashed) names, for pages cached before a deploy
+MIN_COMPRESS_BYTES = 256
+
+_REF_RE = re.compile(r'(href|src)="([^"]+)"')
+
+
+@dataclass
+class Asset:
+    name: str
+    content_type: str
+    digest: str
+    cache_control: str
+    variants: Dict[str, bytes] = field(default_factory=dict)  # encoding ("identity", "gzip", "br") -> body
+
+    def etag(self, encoding: str) -> str:
+        # one strong validator per representation; all of them name the same content
+        return f'"{self.digest}"' if encoding == "identity" else f'"{self.digest}-{encoding}"'
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match: return False
+        tags = [t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")]
+        return "*" in tags or any(t.split("-", 1)[0] == self.digest for t in tags)
+
+    def pick(self, accept_encoding: Optional[str]) -> Tuple[str, bytes]:
+        accepted = parse_accept_encoding(accept_encoding)
+        for enc in ("br", "gzip"):
+            if enc in self.variants and accepted.get(enc, accepted.get("*", 0)) > 0:
+                return enc, self.variants[enc]
+        return "identity", self.variants["identity"]
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        if not token: continue
+        q = 1.0
+        if params.strip().startswith("q="):
+            try: q = float(params.strip()[2:])
+            except ValueError: q = 0.0
+        out[token.strip().lower()] = q
+    return out
+
+
+def _make(name: str, body: bytes, cache_control: str) -> Asset:
+    digest = hashlib.sha256(body).hexdigest()
+    ctype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if ctype.startswith("text/") or ctype in ("application/javascript", "application/json", "image/svg+xml"):
+        ctype += "; charset=utf-8"
+    asset = Asset(name, ctype, digest[:16], cache_control, {"identity": body})
+    if len(body) >= MIN_COMPRESS_BYTES:
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body): asset.variants["gzip"] = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            if len(br) < len(body): asset.variants["br"] = br
+    return asset
+
+
+def fingerprinted(name: str, body: bytes) -> str:
+    stem, dot, ext = name.rpartition(".")
+    return f"{stem}.{hashlib.sha256(body).hexdigest()[:10]}.{ext}" if dot else f"{name}.{hashlib.sha256(body).hexdigest()[:10]}"
+
+
+class AssetBundle:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.assets: Dict[str, Asset] = {}
+        self.build()
+
+    def build(self):
+        files = {p.relative_to(self.root).as_posix(): p.read_bytes() for p in sorted(self.root.rglob("*")) if p.is_file()}
+        assets: Dict[str, Asset] = {}
+        renamed: Dict[str, str] = {}
+        for name, body in files.items():
+            if name.endswith(".html"): continue
+            hashed = fingerprinted(name, body)
+            renamed[name] = hashed
+            assets[hashed] = _make(hashed, body, IMMUTABLE)
+            assets[name] = replace(assets[hashed], name=name, cache_control=SHORT)
+        for name, body in files.items():
+            if not name.endswith(".html"): continue
+            html = _REF_RE.sub(lambda m: f'{m.group(1)}="{renamed.get(m.group(2), m.group(2))}"', body.decode("utf-8"))
+            assets[name] = _make(name, html.encode("utf-8"), REVALIDATE)
+        self.assets = assets
+        log.info("Built %d UI assets from %s (brotli=%s)", len(files), self.root, brotli is not None)
+
+    def get(self, path: str) -> Optional[Asset]:
+        return self.assets.get(path or INDEX) or (self.assets.get(path.rstrip("/") + "/" + INDEX) if path else None)
@@ -0,0 +1,171 @@
+"""Live rolling-window analytics for ops dashboards (GET /stats).
+
+Counts are kept in a ring of time buckets (`STATS_BUCKET_SECONDS` wide,
+covering `STATS_WINDOW_SECONDS`) plus running totals: recording an event
+touches one bucket and the totals, and buckets that fall out of the window are
+subtracted as the clock moves on. A snapshot therefore reads only the totals
+(and, for the per-minute series, the ring), never the interaction journal or
+the ticket table.
+
+Fed by store listeners: "interaction_added" (turns by domain, emotions over
+their flow thresholds, turns and escalations per flow) and "ticket_created"
+(tickets per priority and domain).
+"""
+from __future__ import annotations
+import math
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from .config import THRESHOLDS, STATS_WINDOW_SECONDS, STATS_BUCKET_SECONDS
+from .storage import store
+
+# actions that hand the customer to a person (live agent, supervisor, emergency CSR)
+ESCALATION_ACTIONS = frozenset({"ESCALATE_AGENT", "NOTIFY_ASSIGNED_AGENT", "PRIORITY_AGENT_CONNECT", "EMERGENCY_ROUTE", "ASSIGN_SUPERVISOR"})
+PRIORITIES = ("P0", "P1", "P2", "P3")
+
+
+class WindowCounter:
+    """Keyed event counts over a sliding window of fixed-width buckets."""
+
+    def __init__(self, window: float = STATS_WINDOW_SECONDS, bucket: float = STATS_BUCKET_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.bucket = bucket; self.clock = clock
+        self.n = max(1, int(math.ceil(window / bucket)))
+        self.window = self.n * bucket
+        self.slots: List[Dict[Hashable, int]] = [{} for _ in range(self.n)]
+        self.head: Optional[int] = None   # newest bucket index seen
+        self.totals: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def _advance(self, idx: int):
+        if self.head is None:
+            self.head = idx; return
+        if idx <= self.head:
+            return
+        for k in range(self.head + 1, min(idx, self.head + self.n) + 1):
+            slot = self.slots[k % self.n]
+            for key, c in slot.items():
+                left = self.totals[key] - c
+                if left: self.totals[key] = left
+                else: del self.totals[key]
+            slot.clear()
+        self.head = idx
+
+    def add(self, keys, n: int = 1):
+        idx = int(self.clock() // self.bucket)
+        with self._lock:
+            self._advance(idx)
+            if idx <= self.head - self.n:
+                return  # older than the window (clock stepped back)
+            slot = self.slots[idx % self.n]
+            for key in keys:
+                slot[key] = slot.get(key, 0) + n
+                self.totals[key] = self.totals.get(key, 0) + n
+
+    def snapshot(self) -> Dict[Hashable, int]:
+        with self._lock:
+            self._advance(int(self.clock() // self.bucket))
+            return dict(self.totals)
+
+    def series(self, match: Callable[[Hashable], bool], per: float = 60.0) -> List[Tuple[float, Dict[Hashable, int]]]:
+        """(period start, counts) oldest first, buckets merged into `per`-second periods, keys filtered by `match`."""
+        with self._lock:
+            self._advance(int(self.clock() // self.bucket))
+            head = self.head
+            if head is None:
+                return []
+            merged: Dict[float, Dict[Hashable, int]] = {}
+            for idx in range(head - self.n + 1, head + 1):
+                start = (idx * self.bucket) // per * per
+                row = merged.setdefault(start, {})
+                for key, c in self.slots[idx % self.n].items():
+                    if match(key): row[key] = row.get(key, 0) + c
+            return sorted(merged.items())
+
+
+class LiveStats:
+    def __init__(self, counter: Optional[WindowCounter] = None):
+        self.counter = counter or WindowCounter()
+
+    def record_interaction(self, rec: Dict):
+        sentiment = rec.get("sentiment") or {}
+        flow = rec.get("flow") or "unknown"
+        keys: List[Hashable] = [("flow", flow)]
+        if set(rec.get("actions") or ()) & ESCALATION_ACTIONS:
+            keys.append(("escalation", flow))
+        if "emotions" in sentiment:
+            domain = str(sentiment.get("domain") or "UNKNOWN")
+            keys.append(("turn", domain))
+            over = set()
+            for e in sentiment["emotions"]:
+                t, s = (e.get("type"), e.get("score")) if isinstance(e, dict) else (e[0], e[1])
+                t = str(t).lower()
+                if t in THRESHOLDS and float(s) >= THRESHOLDS[t]: over.add(t)
+            if sentiment.get("profanity"): over.add("angry")  # same belligerent override as the flows
+            keys.extend(("emotion", domain, t) for t in over)
+        else:
+            keys.append(("turn", "MENU"))
+        self.counter.add(keys)
+
+    def record_ticket(self, ticket):
+        priority = getattr(ticket.priority, "value", ticket.priority)
+        domain = getattr(ticket.domain, "value", ticket.domain)
+        self.counter.add([("ticket", priority), ("ticket_domain", domain, priority)])
+
+    def snapshot(self, series: bool = False) -> Dict:
+        c = self.counter.snapshot()
+        minutes = self.counter.window / 60.0
+        turns_by_domain = {k[1]: v for k, v in c.items() if k[0] == "turn"}
+        analyzed = sum(v for d, v in turns_by_domain.items() if d != "MENU")
+        emotions: Dict[str, Dict] = {}
+        for k, v in c.items():
+            if k[0] != "emotion": continue
+            e = emotions.setdefault(k[2], {"turns": 0, "by_domain": {}})
+            e["turns"] += v; e["by_domain"][k[1]] = v
+        for e in emotions.values():
+            e["share"] = round(e["turns"] / analyzed, 4) if analyzed else 0.0
+            e["by_domain"] = {d: {"turns": n, "share": round(n / turns_by_domain[d], 4)} for d, n in e["by_domain"].items()}
+        for name in ("angry", "fearful"):
+            emotions.setdefault(name, {"turns": 0, "share": 0.0, "by_domain": {}})
+        tickets = {p: c.get(("ticket", p), 0) for p in PRIORITIES}
+        flows = {}
+        for k, v in c.items():
+            if k[0] != "flow": continue
+            esc = c.get(("escalation", k[1]), 0)
+            flows[k[1]] = {"turns": v, "escalations": esc, "escalation_rate": round(esc / v, 4)}
+        out = {
+            "window_seconds": self.counter.window, "bucket_seconds": self.counter.bucket,
+            "turns": {"total": sum(turns_by_domain.values()), "analyzed": analyzed, "by_domain": turns_by_domain},
+            "emotions": emotions,
+            "tickets": {"total": sum(tickets.values()),
+                        "by_priority": {p: {"count": n, "per_minute": round(n / minutes, 3)} for p, n in tickets.items()},
+                        "by_domain": _nest(c, "ticket_domain")},
+            "flows": flows,
+        }
+        if series:
+            out["series"] = {
+                "tickets_per_minute": [{"t": t, **{k[1]: n for k, n in row.items()}}
+                                       for t, row in self.counter.series(lambda k: k[0] == "ticket")],
+                "angry_fearful_per_minute": [{"t": t, **_sum_by(row, 2)}
+                                             for t, row in self.counter.series(lambda k: k[0] == "emotion" and k[2] in ("angry", "fearful"))],
+            }
+        return out
+
+
+def _nest(c: Dict, kind: str) -> Dict[str, Dict[str, int]]:
+    out: Dict[str, Dict[str, int]] = {}
+    for k, v in c.items():
+        if k[0] == kind: out.setdefault(k[1], {})[k[2]] = v
+    return out
+
+
+def _sum_by(row: Dict, pos: int) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for k, v in row.items():
+        out[k[pos]] = out.get(k[pos], 0) + v
+    return out
+
+
+live_stats = LiveStats()
+store.add_listener("interaction_added", live_stats.record_interaction)
+store.add_listener("ticket_created", live_stats.record_ticket)
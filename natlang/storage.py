@@ -1,25 +1,72 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
+from bisect import bisect_left
+from typing import List, Dict, Optional, Callable
 from datetime import datetime, timedelta, timezone
 from .models import Message, Ticket, Priority
 from .config import SLA_MINUTES
+from .ids import id_floor, is_time_ordered
+
+class DuplicateTicketId(ValueError):
+    """create_ticket was given an id that is already in the store."""
 
 class InMemoryStore:
     def __init__(self):
         self.messages: List[Message] = []
         self.tickets: Dict[str, Ticket] = {}
+        self.ticket_ids: List[str] = []         # time-ordered ids (natlang.ids), sorted: a time range is a slice
+        self.legacy_ticket_ids: List[str] = []  # ids without a time component (SR- + 8 hex, imports)
         self.sessions: Dict[str, Dict] = {}
         self.feedback: List[Dict] = []
         self.interactions: List[Dict] = []  # per-turn journal (user, bot, sentiment)
+        self.listeners: Dict[str, List[Callable]] = {}  # event name -> callbacks (e.g. "ticket_closed")
+
+    def add_listener(self, event: str, callback: Callable):
+        self.listeners.setdefault(event, []).append(callback)
+    def _emit(self, event: str, *args):
+        for cb in self.listeners.get(event, ()):
+            cb(*args)
 
     def log_message(self, msg: Message): self.messages.append(msg)
     def get_session_messages(self, session_id: str) -> List[Message]:
         return [m for m in self.messages if m.session_id == session_id]
 
     def create_ticket(self, ticket: Ticket) -> Ticket:
+        if ticket.id in self.tickets:
+            raise DuplicateTicketId(f"ticket {ticket.id} already exists")
         minutes = SLA_MINUTES.get(ticket.priority.value, 60*24*3)
         ticket.sla_deadline = ticket.created_at + timedelta(minutes=minutes)
-        self.tickets[ticket.id] = ticket; return ticket
+        self.tickets[ticket.id] = ticket
+        ids = self.ticket_ids
+        if not is_time_ordered(ticket.id): self.legacy_ticket_ids.append(ticket.id)
+        elif not ids or ids[-1] < ticket.id: ids.append(ticket.id)
+        else:  # another worker's id from a moment ago (or one left behind by tickets.clear())
+            i = bisect_left(ids, ticket.id)
+            if i == len(ids) or ids[i] != ticket.id: ids.insert(i, ticket.id)
+        self._emit("ticket_created", ticket); return ticket
+
+    def remove_ticket(self, ticket_id: str) -> Optional[Ticket]:
+        t = self.tickets.pop(ticket_id, None)
+        if t is not None and is_time_ordered(ticket_id):
+            i = bisect_left(self.ticket_ids, ticket_id)
+            if i < len(self.ticket_ids) and self.ticket_ids[i] == ticket_id: del self.ticket_ids[i]
+        elif t is not None and ticket_id in self.legacy_ticket_ids:
+            self.legacy_ticket_ids.remove(ticket_id)
+        return t
+
+    def tickets_between(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Ticket]:
+        """Tickets created in [since, until), oldest first.
+
+        Time-ordered ids are a bisected slice of the id index (by allocation time, which is
+        created_at for tickets the flows open); legacy ids are checked by created_at.
+        """
+        lo = 0 if since is None else bisect_left(self.ticket_ids, id_floor(since))
+        hi = len(self.ticket_ids) if until is None else bisect_left(self.ticket_ids, id_floor(until))
+        out = [self.tickets[i] for i in self.ticket_ids[lo:hi] if i in self.tickets]  # tolerate direct tickets.clear()
+        legacy = [self.tickets[i] for i in self.legacy_ticket_ids if i in self.tickets]
+        legacy = [t for t in legacy if (since is None or t.created_at >= since) and (until is None or t.created_at < until)]
+        if legacy:
+            out.extend(legacy); out.sort(key=lambda t: t.created_at)
+        return out
 
     def reopen_ticket(self, ticket_id: str, new_priority: Optional[Priority] = None) -> Optional[Ticket]:
         t = self.tickets.get(ticket_id); 
@@ -33,7 +80,12 @@ class InMemoryStore:
 
     def close_ticket(self, ticket_id: str) -> Optional[Ticket]:
         t = self.tickets.get(ticket_id); 
-        if t: t.status = "CLOSED"; 
+        if t: t.status = "CLOSED"; self._emit("ticket_closed", t)
+        return t
+
+    def assign_ticket(self, ticket_id: str, agent_id: str) -> Optional[Ticket]:
+        t = self.tickets.get(ticket_id)
+        if t: t.assigned_agent_id = agent_id; self._emit("ticket_assigned", t)
         return t
 
     def get_ticket(self, ticket_id: str) -> Optional[Ticket]:
@@ -45,10 +97,15 @@ class InMemoryStore:
         s = self.get_session(session_id); s["stage"] = stage; s["ctx"].update(ctx); self.sessions[session_id] = s; return s
     def reset_session(self, session_id: str): self.sessions[session_id] = {"stage": None, "ctx": {}}
 
-    def add_feedback(self, session_id: str, ticket_id: Optional[str], text: str, sentiments: Dict):
-        self.feedback.append({"session_id": session_id, "ticket_id": ticket_id, "text": text, "sentiments": sentiments})
+    def add_feedback(self, session_id: str, ticket_id: Optional[str], text: str, sentiments: Dict, ts: Optional[str] = None):
+        self.feedback.append({"session_id": session_id, "ticket_id": ticket_id, "text": text, "sentiments": sentiments,
+                              "ts": ts or datetime.now(timezone.utc).isoformat()})
 
-    def add_interaction(self, session_id: str, user_text: str, bot_text: str, sentiment: Dict):
-        self.interactions.append({"session_id": session_id, "user_text": user_text, "bot_text": bot_text, "sentiment": sentiment, "ts": datetime.now(timezone.utc).isoformat()})
+    def add_interaction(self, session_id: str, user_text: str, bot_text: str, sentiment: Dict, ts: Optional[str] = None,
+                        flow: Optional[str] = None, actions: Optional[List[str]] = None, account_number: Optional[str] = None):
+        rec = {"session_id": session_id, "user_text": user_text, "bot_text": bot_text, "sentiment": sentiment,
+               "ts": ts or datetime.now(timezone.utc).isoformat(), "flow": flow, "actions": actions,
+               "account_number": account_number}
+        self.interactions.append(rec); self._emit("interaction_added", rec)
 
 store = InMemoryStore()
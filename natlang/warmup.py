@@ -0,0 +1,105 @@
+"""Cold-start bookkeeping: background warm-up, readiness and start-up timings.
+
+The server starts answering as soon as it is imported; the one-off costs of the
+first turn (SDK import and client set-up, first numpy calls) are paid by a
+background thread instead. Every step runs even if an earlier one fails. A
+failed warm-up step only means the first turn pays the cost, so /readyz turns
+200 regardless; a failed required step (loading data the flows depend on) is
+retried every READINESS_RETRY_SECONDS and /readyz stays 503 until it succeeds.
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from . import IMPORT_STARTED
+from .config import READINESS_RETRY_SECONDS
+from .metrics import REGISTRY, Gauge
+from .logger import get_logger
+
+log = get_logger("natlang.warmup")
+
+
+class Readiness:
+    def __init__(self, started: float = IMPORT_STARTED, retry_seconds: float = READINESS_RETRY_SECONDS):
+        self.started = started; self.retry_seconds = retry_seconds
+        self.state = "pending"  # pending -> running -> done | failed, or skipped
+        self.error: Optional[str] = None
+        self.import_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.first_response_seconds: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}   # step -> last error
+        self.required: List[str] = []      # required steps that have not succeeded yet
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def ready(self) -> bool:
+        return self.state in ("done", "failed", "skipped") and not self.required
+
+    def imported(self):
+        self.import_seconds = time.perf_counter() - self.started
+
+    def first_response(self):
+        # racing turns may both set it; either value is right to within a few ms
+        if self.first_response_seconds is None:
+            self.first_response_seconds = time.perf_counter() - self.started
+
+    def start(self, steps: List[Tuple[str, Callable[[], None]]], background: bool = True,
+              required: List[Tuple[str, Callable[[], None]]] = ()):
+        """Run `required` steps, then `steps`. Without a background thread nothing is retried."""
+        if not steps and not required:
+            self.state = "skipped"; return
+        self.state = "running"
+        self.required = [name for name, _ in required]
+        if background:
+            self._thread = threading.Thread(target=self._run, args=(steps, list(required), True), name="natlang-warmup", daemon=True)
+            self._thread.start()
+        else:
+            self._run(steps, list(required), False)
+
+    def stop(self):
+        self._stop.set()
+
+    def _step(self, name: str, fn: Callable[[], None]) -> bool:
+        s0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            self.failed[name] = str(e)
+            self.error = self.error or f"{name}: {e}"
+            log.error("Start-up step %s failed: %s", name, e)
+            return False
+        self.steps[name] = round(time.perf_counter() - s0, 4)
+        self.failed.pop(name, None)
+        return True
+
+    def _run(self, steps: List[Tuple[str, Callable[[], None]]], required: List[Tuple[str, Callable[[], None]]], retry: bool):
+        t0 = time.perf_counter()
+        pending = [(name, fn) for name, fn in required if not self._step(name, fn)]
+        self.required = [name for name, _ in pending]
+        for name, fn in steps:  # independent: one failing does not skip the rest
+            self._step(name, fn)
+        self.state = "failed" if self.failed else "done"
+        self.warmup_seconds = time.perf_counter() - t0
+        log.info("Warm-up %s in %.2fs %s", self.state, self.warmup_seconds, self.steps)
+        while retry and pending and not self._stop.wait(self.retry_seconds):
+            pending = [(name, fn) for name, fn in pending if not self._step(name, fn)]
+            self.required = [name for name, _ in pending]
+            if not pending:
+                self.state = "failed" if self.failed else "done"
+                log.info("Required start-up steps done after retrying")
+
+    def snapshot(self) -> Dict:
+        r = lambda v: None if v is None else round(v, 4)
+        return {"ready": self.ready(), "warmup": self.state, "error": self.error, "steps": dict(self.steps),
+                "failed_steps": dict(self.failed), "waiting_for": list(self.required),
+                "import_seconds": r(self.import_seconds), "warmup_seconds": r(self.warmup_seconds),
+                "first_response_seconds": r(self.first_response_seconds)}
+
+
+readiness = Readiness()
+REGISTRY.register(Gauge("natlang_import_seconds", "Seconds from importing natlang to the server module being loaded.", fn=lambda: readiness.import_seconds or 0))
+REGISTRY.register(Gauge("natlang_warmup_seconds", "Seconds the background warm-up took.", fn=lambda: readiness.warmup_seconds or 0))
+REGISTRY.register(Gauge("natlang_first_response_seconds", "Seconds from process import to the first completed chat turn.",
+                        fn=lambda: readiness.first_response_seconds or 0))
+REGISTRY.register(Gauge("natlang_ready", "1 once start-up warm-up has finished and required steps have succeeded.", fn=lambda: 1 if readiness.ready() else 0))
@@ -0,0 +1,46 @@
+import os, sys, threading, time
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.admission import AdmissionGate, classify, PRIORITY_SAFETY, PRIORITY_ESCALATION, PRIORITY_ROUTINE
+from natlang.local_sentiment import analyze_text_local
+
+def test_classify():
+    assert classify("there are sparks coming from the pole") == PRIORITY_SAFETY
+    assert classify("the agent was rude") == PRIORITY_ESCALATION
+    assert classify("yes") == PRIORITY_ROUTINE
+
+def test_safety_jumps_queue_and_overload_sheds():
+    gate = AdmissionGate(limit=1, max_queue=10, max_wait=5)
+    release, order = threading.Event(), []
+    def call(text):
+        if text == "first": release.wait(5)
+        order.append(text); return analyze_text_local(text)
+    threads = [threading.Thread(target=gate.run, args=("first", call, analyze_text_local))]
+    threads[0].start(); time.sleep(0.05)
+    for text in ("yes", "ok", "smoke from the meter"):
+        t = threading.Thread(target=gate.run, args=(text, call, analyze_text_local))
+        t.start(); threads.append(t); time.sleep(0.02)
+    assert gate.depth() == 3
+    release.set()
+    for t in threads: t.join(5)
+    assert order == ["first", "smoke from the meter", "yes", "ok"]
+    assert gate.active == 0 and gate.depth() == 0
+
+def test_wait_limit_falls_back_to_local():
+    gate = AdmissionGate(limit=1, max_queue=1, max_wait=0.05)
+    release = threading.Event()
+    t = threading.Thread(target=gate.run, args=("busy", lambda x: release.wait(5), analyze_text_local))
+    t.start(); time.sleep(0.02)
+    called = []
+    sr = gate.run("there is smoke outside", lambda x: called.append(x), analyze_text_local)
+    assert called == [] and sr.safety_flag
+    release.set(); t.join(5)
+    assert gate.active == 0
+
+if __name__ == "__main__":
+    test_classify(); test_safety_jumps_queue_and_overload_sheds(); test_wait_limit_falls_back_to_local()
+    print("ok")
@@ -0,0 +1,59 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.audit import AuditBus, AuditEvent, store_sink
+from natlang.models import EmotionScore
+from natlang.storage import store
+
+def test_inline_until_started_and_emotions_flattened():
+    store.feedback.clear()
+    bus = AuditBus()
+    bus.emit(AuditEvent("feedback", "s1", "SR-1", "SNAP", {"event": "x", "emotions": [EmotionScore("happy", 0.8)]}))
+    assert store.feedback[-1]["sentiments"]["emotions"] == [("happy", 0.8)]
+
+def test_background_consumer_batches_and_backpressure():
+    batches = []
+    bus = AuditBus(maxsize=3, batch_size=2, flush_interval=60)
+    bus.sinks = [lambda b: batches.append([e.text for e in b])]
+    bus.start()
+    try:
+        bus._wake.clear()
+        bus.batch_size = 10  # keep the consumer asleep while the queue fills
+        for i in range(4):
+            bus.emit(AuditEvent("feedback", "s", None, f"e{i}"))
+        # the emitter that found the queue full drains it, its own event last
+        assert bus.stats["backpressure"] == 1 and batches == [["e0", "e1", "e2", "e3"]] and bus.depth() == 0
+        bus.batch_size = 2
+        bus.emit(AuditEvent("feedback", "s", None, "e4"))
+    finally:
+        bus.batch_size = 2
+        bus.stop()
+    assert batches[1:] == [["e4"]]
+    assert bus.snapshot()["written"] == 5 and bus.depth() == 0
+
+def test_concurrent_emitters_under_backpressure_keep_order_and_counts():
+    import threading
+    seen = []
+    bus = AuditBus(maxsize=4, batch_size=3, flush_interval=0.01)
+    bus.sinks = [lambda b: seen.extend(e.text for e in b)]
+    bus.start()
+    def emit(w):
+        for i in range(500):
+            bus.emit(AuditEvent("feedback", "s", None, f"{w}:{i}"))
+    workers = [threading.Thread(target=emit, args=(w,)) for w in range(4)]
+    try:
+        for t in workers: t.start()
+        for t in workers: t.join()
+    finally:
+        bus.stop()
+    assert len(seen) == 2000 and bus.snapshot()["written"] == bus.snapshot()["emitted"] == 2000
+    for w in range(4):  # each emitter's events land in the order it emitted them
+        assert [x for x in seen if x.startswith(f"{w}:")] == [f"{w}:{i}" for i in range(500)]
+
+if __name__ == "__main__":
+    test_inline_until_started_and_emotions_flattened(); test_background_consumer_batches_and_backpressure(); test_concurrent_emitters_under_backpressure_keep_order_and_counts()
+    print("ok")
@@ -0,0 +1,40 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from fastapi import Response
+from natlang.local_sentiment import analyze_text_local
+import natlang.server as srv
+from unittest import mock
+
+def test_batch_per_item_results_order_and_shared_sentiment():
+    calls = []
+    with mock.patch.object(srv, "analyze_text", lambda t: calls.append(t) or analyze_text_local(t)):
+        items = []
+        for n in range(5):
+            sid = f"batch-{n}"
+            items += [srv.ChatRequest(session_id=sid, text="I was overcharged on my bill this month", account_number="ACCT-BOWIE"),
+                      srv.ChatRequest(session_id=sid, text="10:30am", account_number="ACCT-BOWIE")]
+        items.append(srv.ChatRequest(session_id="batch-bad", text="   "))
+        out = srv.chat_batch(srv.BatchChatRequest(items=items), Response()).results
+        assert [r.index for r in out] == list(range(len(items)))
+        assert all(r.ok for r in out[:-1])
+        assert not out[-1].ok and out[-1].error.status_code == 400
+        # the second turn of every session saw the first turn's stage (ordered within the session)
+        assert all(r.response.ticket_id for r in out[1:-1:2])
+        assert sorted(calls) == ["10:30am", "I was overcharged on my bill this month"]
+
+def test_batch_size_limit():
+    items = [srv.ChatRequest(session_id="s", text="hi")] * (srv.BATCH_MAX_ITEMS + 1)
+    try:
+        srv.chat_batch(srv.BatchChatRequest(items=items), Response())
+        assert False, "expected 413"
+    except srv.HTTPException as e:
+        assert e.status_code == 413
+
+if __name__ == "__main__":
+    test_batch_per_item_results_order_and_shared_sentiment(); test_batch_size_limit()
+    print("ok")
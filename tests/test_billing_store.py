@@ -0,0 +1,102 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import json
+import tempfile
+from datetime import datetime, timezone, timedelta
+from natlang.billing_store import BillingStore, billing_store
+from natlang.storage import store
+from natlang.models import SentimentResult, EmotionScore, Domain
+from natlang.flows import flow_billing_prior_sr_and_feedback
+
+T0 = datetime(2026, 7, 1, tzinfo=timezone.utc)
+
+def ledger():
+    b = BillingStore()
+    for i in range(100):
+        b.create_request(f"ACCT-{i % 4}", None, None, ("overcharge_dispute", "service_feedback")[i % 2], f"SR-{i:08X}",
+                         created_at=T0 + timedelta(days=i))
+    return b
+
+def test_range_queries_use_the_indexes():
+    b = ledger()
+    q3 = b.query("ACCT-0", "overcharge_dispute", since=T0, until=T0 + timedelta(days=92))
+    assert [r["service_request"] for r in q3] == [f"SR-{i:08X}" for i in range(0, 92, 4)]
+    assert len(b.query(issue_type="service_feedback", since="2026-07-11", until="2026-07-21")) == 5
+    assert len(b.query(since=T0 + timedelta(days=95))) == 5 and len(b.query(limit=3)) == 3
+    assert b.issue_counts(T0, T0 + timedelta(days=10)) == {"overcharge_dispute": 5, "service_feedback": 5}
+    assert b.issue_counts(account_number="ACCT-1") == {"service_feedback": 25}
+    # a late arrival for an earlier time lands in order
+    b.create_request("ACCT-0", None, None, "overcharge_dispute", "SR-LATE0001", created_at=T0 - timedelta(days=1))
+    assert b.query("ACCT-0", limit=1)[0]["service_request"] == "SR-LATE0001"
+    assert b.ids_between(until=T0) == ["SR-LATE0001"]
+
+def test_existence_ownership_and_removal():
+    b = ledger()
+    assert b.exists("SR-00000005") and not b.exists("SR-FFFFFFFF")
+    assert b.owned_by("SR-00000005", "ACCT-1") and not b.owned_by("SR-00000005", "ACCT-2") and not b.owned_by("SR-00000005", None)
+    assert b.remove("SR-00000005")["account_number"] == "ACCT-1" and b.remove("SR-00000005") is None
+    assert not b.exists("SR-00000005") and b.issue_counts(account_number="ACCT-1") == {"service_feedback": 24}
+    # re-filing an id moves it in every index
+    b.create_request("ACCT-9", None, None, "refund", "SR-00000006", created_at=T0)
+    assert b.query("ACCT-2", "overcharge_dispute", limit=1)[0]["service_request"] == "SR-00000002"
+    assert [r["service_request"] for r in b.query("ACCT-9")] == ["SR-00000006"] and len(b.by_time) == 99
+
+def test_bulk_import():
+    b = ledger()
+    rows = [{"service_request": f"SR-H{i:07X}", "account_number": "ACCT-0", "issue_type": "refund",
+             "created_at": (T0 - timedelta(hours=i)).isoformat()} for i in range(50)]
+    assert b.bulk_import(rows + rows[:5] + [{"service_request": "SR-00000000", "issue_type": "x", "created_at": T0.isoformat()}]) == 50
+    assert b.bulk_import(rows) == 0 and len(b.requests) == 150
+    oldest = b.query("ACCT-0", "refund", limit=1)[0]
+    assert oldest["service_request"] == "SR-H0000031" and datetime.fromisoformat(oldest["created_at"]) == T0 - timedelta(hours=49)
+    assert b.issue_counts(until=T0)["refund"] == 49
+    try:
+        b.bulk_import([{"service_request": "SR-1"}]); assert False
+    except ValueError:
+        pass
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+        for r in rows: f.write(json.dumps(r) + "\n")
+    fresh = BillingStore()
+    assert fresh.import_jsonl(f.name) == 50 and fresh.query(since=T0 - timedelta(hours=1))[0]["service_request"] == "SR-H0000001"
+
+def test_prior_sr_must_belong_to_the_caller():
+    neutral = SentimentResult(domain=Domain.BILLING, emotions=[EmotionScore("neutral", 0.6)], profanity=False, safety_flag=False)
+    billing_store.create_request("ACCT-NICKS", "Stevie", "Nicks", "overcharge_dispute", "SR-0ABC1234")
+    billing_store.create_request("ACCT-BOWIE", "David", "Bowie", "overcharge_dispute", "SR-0ABC5678")
+    sid = "prior-sr"
+    store.set_session(sid, "await_prior_sr", account_number="ACCT-NICKS")
+    r = flow_billing_prior_sr_and_feedback(sid, "it was SR-0ABC5678", neutral)  # someone else's request
+    assert r["actions"] == ["PRIOR_SR_NOT_FOUND", "ASK_PRIOR_SR"] and store.get_session(sid)["stage"] == "await_prior_sr"
+    r = flow_billing_prior_sr_and_feedback(sid, "sr-0abc1234", neutral)
+    assert r["actions"] == ["ASK_FEEDBACK"] and store.get_session(sid)["ctx"]["prior_sr"] == "SR-0ABC1234"
+    sid = "prior-sr-2"
+    store.set_session(sid, "await_prior_sr", account_number="ACCT-NICKS")
+    flow_billing_prior_sr_and_feedback(sid, "SR-DEADBEEF", neutral)
+    r = flow_billing_prior_sr_and_feedback(sid, "SR-DEADBEEF", neutral)  # asked once already: carry on without it
+    assert r["actions"] == ["PRIOR_SR_NOT_FOUND", "ASK_FEEDBACK"]
+    assert store.get_session(sid)["stage"] == "await_billing_feedback" and "prior_sr" not in store.get_session(sid)["ctx"]
+
+def test_prior_sr_without_an_account_only_has_to_exist():
+    neutral = SentimentResult(domain=Domain.BILLING, emotions=[EmotionScore("neutral", 0.6)], profanity=False, safety_flag=False)
+    billing_store.create_request("ACCT-JOPLIN", "Janis", "Joplin", "overcharge_dispute", "SR-0ABC9999")
+    sid = "prior-sr-anon"
+    store.set_session(sid, "await_prior_sr", account_number=None)  # chat started without an account number
+    r = flow_billing_prior_sr_and_feedback(sid, "SR-0ABC9999", neutral)
+    assert r["actions"] == ["ASK_FEEDBACK"] and store.get_session(sid)["ctx"]["prior_sr"] == "SR-0ABC9999"
+    sid = "prior-sr-anon-2"
+    store.set_session(sid, "await_prior_sr", account_number=None)
+    r = flow_billing_prior_sr_and_feedback(sid, "SR-0BADF00D", neutral)
+    assert r["actions"] == ["PRIOR_SR_NOT_FOUND", "ASK_PRIOR_SR"] and "account" not in r["message"]
+
+if __name__ == "__main__":
+    test_range_queries_use_the_indexes()
+    test_existence_ownership_and_removal()
+    test_bulk_import()
+    test_prior_sr_must_belong_to_the_caller()
+    test_prior_sr_without_an_account_only_has_to_exist()
+    print("ok")
@@ -0,0 +1,65 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from datetime import datetime, date
+from natlang.scheduler import ZONE, federal_holidays, is_business_day
+from natlang.callback_calendar import CallbackCalendar, callback_calendar
+from natlang.models import SentimentResult, Domain, EmotionScore
+from natlang.storage import store
+from natlang.flows import flow_billing_time_collect, flow_billing_acceptance
+
+NOW = datetime(2026, 11, 23, 8, 0, tzinfo=ZONE)  # Monday before Thanksgiving
+
+def test_spreads_bookings_to_nearest_free_slot():
+    cal = CallbackCalendar(capacity=2, horizon_days=14, now=NOW)
+    want = datetime(2026, 11, 23, 10, 30, tzinfo=ZONE)
+    got = [cal.book(want, now=NOW).strftime("%H:%M") for _ in range(6)]
+    assert got[:2] == ["10:30", "10:30"]
+    assert sorted(got[2:]) == ["10:00", "10:00", "11:00", "11:00"]
+
+def test_skips_weekends_holidays_and_past():
+    cal = CallbackCalendar(capacity=1, horizon_days=14, holidays={"2026-11-26"}, now=NOW)
+    thanksgiving = datetime(2026, 11, 26, 10, 0, tzinfo=ZONE)
+    assert cal.book(thanksgiving, now=NOW) == datetime(2026, 11, 27, 10, 0, tzinfo=ZONE)
+    saturday = datetime(2026, 11, 28, 9, 0, tzinfo=ZONE)
+    assert cal.book(saturday, now=NOW) == datetime(2026, 11, 30, 9, 0, tzinfo=ZONE)
+    late = datetime(2026, 11, 23, 12, 0, tzinfo=ZONE)
+    assert cal.book(datetime(2026, 11, 23, 9, 0, tzinfo=ZONE), now=late) == late
+
+def test_release_and_full_calendar():
+    cal = CallbackCalendar(capacity=1, horizon_days=1, now=NOW)
+    slots = [cal.book(NOW, now=NOW) for _ in range(len(cal.slots))]
+    assert len(set(slots)) == len(cal.slots) and cal.book(NOW, now=NOW) is None
+    assert cal.release(slots[3]) and cal.book(NOW, now=NOW) == slots[3]
+
+def test_holidays_follow_the_federal_rules_in_any_year():
+    assert sorted(federal_holidays(2026)) == ["2026-01-01", "2026-01-19", "2026-02-16", "2026-05-25", "2026-06-19", "2026-07-03",
+                                              "2026-09-07", "2026-10-12", "2026-11-11", "2026-11-26", "2026-12-25"]
+    # 2028-01-01 is a Saturday, observed on the last day of 2027
+    assert "2027-12-31" in federal_holidays(2027) and "2028-01-01" not in federal_holidays(2028)
+    assert {"2031-05-26", "2031-11-27", "2031-12-25"} <= federal_holidays(2031) and not is_business_day(date(2031, 11, 27))
+    cal = CallbackCalendar(capacity=1, horizon_days=14, now=datetime(2031, 11, 24, 8, 0, tzinfo=ZONE))
+    assert cal.book(datetime(2031, 11, 27, 10, 0, tzinfo=ZONE), now=datetime(2031, 11, 24, 8, 0, tzinfo=ZONE)).day == 28
+
+def test_rejected_callback_gives_its_slot_back():
+    store.set_session("cb-reject", "await_billing_time")
+    no = SentimentResult(domain=Domain.BILLING, emotions=[EmotionScore("disappointed", 0.7)], profanity=False, safety_flag=False)
+    r = flow_billing_time_collect("cb-reject", "10am please", no)
+    t = store.get_ticket(r["ticket_id"])
+    slot = datetime.fromisoformat(t.fields["callback_time_et"])
+    left = callback_calendar.remaining(slot)
+    try:
+        assert flow_billing_acceptance("cb-reject", "no", no)["actions"] == ["ESCALATE_AGENT"]
+        assert callback_calendar.remaining(slot) == left + 1
+    finally:
+        store.close_ticket(t.id)  # closing later must not free the slot a second time
+    assert callback_calendar.remaining(slot) == left + 1
+
+if __name__ == "__main__":
+    test_spreads_bookings_to_nearest_free_slot(); test_skips_weekends_holidays_and_past(); test_release_and_full_calendar()
+    test_holidays_follow_the_federal_rules_in_any_year(); test_rejected_callback_gives_its_slot_back()
+    print("ok")
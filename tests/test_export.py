@@ -0,0 +1,77 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import importlib.util
+import json
+from datetime import datetime, timezone, timedelta
+from natlang.storage import InMemoryStore
+from natlang.billing_store import BillingStore
+from natlang.models import Ticket, Priority, Domain
+from natlang.export import export, iter_rows, jsonl_chunks, parse_time, ExportUnavailable
+
+T0 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+def make_store(n=500):
+    st = InMemoryStore()
+    for i in range(n):
+        st.add_interaction(f"s{i % 5}", f"msg {i}", "ok", {"domain": "OUTAGE", "emotions": [{"type": "angry", "score": 0.5}]},
+                           ts=(T0 + timedelta(minutes=i)).isoformat(), flow="fallback", actions=["NO_ACTION"])
+    st.add_feedback("s1", None, "great", {"event": "outage_feedback"}, ts=T0.isoformat())
+    st.create_ticket(Ticket(id="SR-00000001", priority=Priority.P1, domain=Domain.OUTAGE, reason="x", fields={"account_number": "ACCT-1"}))
+    return st
+
+def test_jsonl_filters_and_chunks():
+    st = make_store()
+    body = b"".join(export("interactions", since=T0 + timedelta(minutes=100), until=T0 + timedelta(minutes=200), session_id="s2", st=st))
+    rows = [json.loads(l) for l in body.decode().splitlines()]
+    assert len(rows) == 20 and {r["session_id"] for r in rows} == {"s2"}
+    assert rows[0]["ts"] == (T0 + timedelta(minutes=102)).isoformat() and rows[0]["domain"] == "OUTAGE"
+    # nested values stay nested in JSONL
+    assert rows[0]["actions"] == ["NO_ACTION"] and rows[0]["emotions"] == [{"type": "angry", "score": 0.5}]
+    chunks = list(jsonl_chunks(iter_rows("interactions", st=st), chunk_bytes=4096))
+    assert len(chunks) > 5 and all(len(c) < 4096 + 1024 for c in chunks)
+    ticket = json.loads(b"".join(export("tickets", st=st, billing=BillingStore())))
+    assert ticket["id"] == "SR-00000001" and ticket["account_number"] == "ACCT-1" and ticket["fields"] == {"account_number": "ACCT-1"}
+
+def test_rows_are_produced_lazily():
+    st = make_store(10)
+    rows = iter_rows("interactions", st=st)
+    first = next(rows)
+    st.add_interaction("late", "x", "y", {}, ts=T0.isoformat())  # appended mid-export: not part of this export
+    assert first["user_text"] == "msg 0" and len(list(rows)) == 9
+
+def test_argument_errors_before_streaming():
+    for kwargs in ({"kind": "nope"}, {"kind": "tickets", "session_id": "s1"}, {"kind": "interactions", "fmt": "xml"}):
+        try:
+            export(**kwargs); assert False, kwargs
+        except ValueError:
+            pass
+    if importlib.util.find_spec("pyarrow") is None:
+        try:
+            export("interactions", "parquet"); assert False
+        except ExportUnavailable:
+            pass
+    assert parse_time("2026-10-01") == T0 and parse_time("2026-10-01T00:00:00Z") == T0
+
+def test_columnar_roundtrip():
+    if importlib.util.find_spec("pyarrow") is None:
+        return  # optional dependency
+    import io
+    import pyarrow as pa, pyarrow.parquet as pq
+    st = make_store()
+    table = pa.ipc.open_stream(b"".join(export("interactions", "arrow", batch_rows=64, st=st))).read_all()
+    assert table.num_rows == 500 and table.column("ts")[0].as_py() == T0
+    assert json.loads(table.column("actions")[0].as_py()) == ["NO_ACTION"]  # flat schema: nested values as JSON text
+    table = pq.read_table(io.BytesIO(b"".join(export("interactions", "parquet", batch_rows=64, st=st))))
+    assert table.num_rows == 500
+
+if __name__ == "__main__":
+    test_jsonl_filters_and_chunks()
+    test_rows_are_produced_lazily()
+    test_argument_errors_before_streaming()
+    test_columnar_roundtrip()
+    print("ok")
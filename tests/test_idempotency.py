@@ -0,0 +1,78 @@
+import os, sys, threading, time
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from fastapi import Response, HTTPException
+from natlang.idempotency import IdempotencyCache, IdempotencyConflict
+from natlang.local_sentiment import analyze_text_local
+from natlang.storage import store
+import natlang.server as srv
+from unittest import mock
+
+def test_replay_and_conflict():
+    cache = IdempotencyCache()
+    calls = []
+    compute = lambda: calls.append(1) or "reply"
+    assert cache.run(("s", "k"), "hello", compute) == ("reply", False)
+    assert cache.run(("s", "k"), "hello", compute) == ("reply", True)
+    assert len(calls) == 1
+    try:
+        cache.run(("s", "k"), "different", compute)
+        assert False, "expected conflict"
+    except IdempotencyConflict:
+        pass
+
+def test_inflight_duplicate_waits_for_original():
+    cache = IdempotencyCache()
+    started, release, calls, results = threading.Event(), threading.Event(), [], []
+    def slow():
+        calls.append(1); started.set(); release.wait(5); return "done"
+    t1 = threading.Thread(target=lambda: results.append(cache.run("k", "x", slow)))
+    t1.start(); started.wait(5)
+    t2 = threading.Thread(target=lambda: results.append(cache.run("k", "x", slow)))
+    t2.start(); time.sleep(0.05); release.set()
+    t1.join(5); t2.join(5)
+    assert len(calls) == 1
+    assert sorted(results) == [("done", False), ("done", True)]
+
+def test_ttl_lru_bound_and_errors_not_cached():
+    now = [0.0]
+    cache = IdempotencyCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.run("a", 1, lambda: "A"); cache.run("b", 1, lambda: "B"); cache.run("c", 1, lambda: "C")
+    assert list(cache.entries) == ["b", "c"]
+    now[0] = 11
+    assert cache.run("b", 1, lambda: "B2") == ("B2", False)
+    def boom(): raise ValueError("upstream")
+    try:
+        cache.run("e", 1, boom)
+    except ValueError:
+        pass
+    assert "e" not in cache.entries
+    assert cache.run("e", 1, lambda: "ok") == ("ok", False)
+
+def test_chat_retry_does_not_create_second_ticket():
+    with mock.patch.object(srv, "analyze_text", analyze_text_local):  # restored for the tests that follow
+        sid = "idem-1"
+        def post(text, key, acct="ACCT-BOWIE"):
+            resp = Response()
+            return srv.chat(srv.ChatRequest(session_id=sid, text=text, account_number=acct), resp, idempotency_key=key), resp
+        post("I was overcharged on my bill this month", "k1")
+        before = len(store.tickets)
+        first, _ = post("10:30am", "k2")
+        again, resp = post("10:30am", "k2")
+        assert len(store.tickets) == before + 1
+        assert again.ticket_id == first.ticket_id and again.correlation_id == first.correlation_id
+        assert resp.headers["Idempotent-Replayed"] == "true"
+        try:
+            post("11:00am", "k2")
+            assert False, "expected 422"
+        except HTTPException as e:
+            assert e.status_code == 422
+
+if __name__ == "__main__":
+    test_replay_and_conflict(); test_inflight_duplicate_waits_for_original()
+    test_ttl_lru_bound_and_errors_not_cached(); test_chat_retry_does_not_create_second_ticket()
+    print("ok")
@@ -0,0 +1,73 @@
+import os, sys, json, tempfile
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import importlib.util
+import numpy as np
+from natlang.local_model import LocalModel, train, targets, load_journal, evaluate
+from natlang.local_sentiment import analyze_text_local
+from natlang.models import Domain
+from natlang.storage import InMemoryStore
+from natlang.export import export
+
+TEXTS = ["my power is still out and I'm getting impatient", "I was overcharged on my bill this month", "yes", "no",
+         "the representative hung up on me", "when is my power coming back", "my bill is too high"]
+
+def journal_rows():
+    rows = []
+    for i in range(40):
+        for t in TEXTS:
+            sd = analyze_text_local(t).to_dict(); sd.update(source="llm", confidence=0.9)
+            rows.append({"session_id": f"s{i}", "user_text": t, "bot_text": "", "sentiment": sd})
+    return rows
+
+def test_targets_skip_unlabelled_rows():
+    assert targets({"note": "menu"}) is None
+    assert targets(dict(analyze_text_local("yes").to_dict())) is None            # source "local"
+    assert targets({"domain": "OUTAGE", "emotions": [], "confidence": 0.0}) is None  # LLM error placeholder
+    y = targets({"domain": "BILLING", "emotions": [{"type": "angry", "score": 0.9}], "intents": ["billing_dispute"], "confidence": 0.8})
+    assert y is not None and y.sum() > 0
+
+def test_train_predict_roundtrip():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "journal.jsonl")
+        with open(path, "w") as f:
+            for r in journal_rows(): f.write(json.dumps(r) + "\n")
+        texts, Y = load_journal([path])
+        model = train(texts, Y, epochs=30)
+        model.save(os.path.join(d, "m.npz"))
+        model = LocalModel.load(os.path.join(d, "m.npz"))
+    sr, conf = model.predict("I was overcharged on my bill this month")
+    assert sr.domain == Domain.BILLING and "billing_dispute" in sr.intents and sr.source == "local_model"
+    sr, conf = model.predict("my power is still out and I'm getting impatient")
+    assert sr.domain == Domain.OUTAGE and sr.score("impatient") >= 0.7 and conf > 0.8
+    assert evaluate(model, texts, Y, 0.8)["decision_accuracy"] == 1.0
+    sr, _ = model.predict("there are sparks by the pole")
+    assert sr.safety_flag
+
+def test_export_rows_train_like_the_journal():
+    st = InMemoryStore()
+    for r in journal_rows()[:50]:
+        st.add_interaction(r["session_id"], r["user_text"], r["bot_text"], r["sentiment"])
+    st.add_interaction("s0", "Billing", "menu", {"note": "menu"})  # menu turn: no label
+    with tempfile.TemporaryDirectory() as d:
+        journal, exported = os.path.join(d, "journal.jsonl"), os.path.join(d, "export.jsonl")
+        with open(journal, "w") as f:
+            for r in st.interactions: f.write(json.dumps(r) + "\n")
+        with open(exported, "wb") as f:
+            for chunk in export("interactions", st=st): f.write(chunk)
+        texts, Y = load_journal([journal])
+        assert len(texts) == 50 and load_journal([exported])[0] == texts and np.array_equal(load_journal([exported])[1], Y)
+        if importlib.util.find_spec("pyarrow") is None:
+            return  # optional dependency
+        parquet = os.path.join(d, "export.parquet")
+        with open(parquet, "wb") as f:
+            for chunk in export("interactions", "parquet", st=st): f.write(chunk)
+        assert np.array_equal(load_journal([parquet])[1], Y)
+
+if __name__ == "__main__":
+    test_targets_skip_unlabelled_rows(); test_train_predict_roundtrip(); test_export_rows_train_like_the_journal()
+    print("ok")
@@ -0,0 +1,34 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.metrics import Histogram, Counter, Registry, begin_request, span, server_timing_header, STAGE_SECONDS
+
+def test_prometheus_rendering():
+    reg = Registry()
+    h = reg.register(Histogram("t_seconds", "help", ["stage"], buckets=(0.1, 1.0)))
+    c = reg.register(Counter("t_total", "help", ["priority"]))
+    for v in (0.05, 0.5, 5.0): h.observe(v, stage="llm")
+    c.inc(priority="P0"); c.inc(2, priority="P0")
+    text = reg.render()
+    assert 't_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="llm",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="llm"} 3' in text
+    assert 't_total{priority="P0"} 3' in text
+
+def test_spans_feed_request_timings():
+    timings = begin_request()
+    with span("unit_outer"):
+        with span("unit_inner"):
+            pass
+    assert [name for name, _ in timings] == ["unit_inner", "unit_outer"]
+    assert server_timing_header(timings).startswith("unit_inner;dur=")
+    assert ("unit_inner",) in STAGE_SECONDS.series
+
+if __name__ == "__main__":
+    test_prometheus_rendering(); test_spans_feed_request_timings()
+    print("ok")
@@ -0,0 +1,73 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.storage import InMemoryStore
+from natlang.models import Ticket, Priority, Domain
+from natlang.notifications import NotificationScheduler, TimerWheel, Subscription
+from natlang.flows import _parse_update_interval
+from natlang.config import NOTIFY_MIN_INTERVAL_MINUTES
+
+class FakeClock:
+    def __init__(self): self.now = 0.0
+    def __call__(self): return self.now
+
+def make_scheduler(batch_size=500):
+    clock = FakeClock(); sent = []
+    sched = NotificationScheduler(sender=lambda b: sent.append(list(b)), tick_seconds=1.0, batch_size=batch_size, clock=clock)
+    return sched, clock, sent
+
+def test_wheel_fires_across_levels():
+    wheel = TimerWheel(bits=2, levels=3)  # tiny wheel so cascades and overflow get exercised
+    dues = [1, 3, 4, 5, 17, 63, 64, 200]
+    for d in dues:
+        wheel.insert(Subscription(f"j{d}", "s", None, None, "SMS", 0, d))
+    fired = {}
+    for t in range(1, 201):
+        for job in wheel.advance_to(t):
+            fired[job.id] = t
+    assert fired == {f"j{d}": d for d in dues}
+    assert len(wheel) == 0
+
+def test_recurring_dispatch_in_batches():
+    sched, clock, sent = make_scheduler(batch_size=2)
+    for i in range(5):
+        sched.subscribe(f"s{i}", "ACCT-MERCURY", None, 60)
+    clock.now = 59; assert sched.run_pending() == 0
+    clock.now = 60; assert sched.run_pending() == 5
+    assert [len(b) for b in sent] == [2, 2, 1]
+    clock.now = 120; assert sched.run_pending() == 5
+
+def test_subscription_counts_from_now_when_the_wheel_lags():
+    sched, clock, sent = make_scheduler()
+    clock.now = 500  # the scheduler thread has not run since the start
+    sched.subscribe("s1", "ACCT-MERCURY", None, 60)
+    assert sched.run_pending() == 0
+    clock.now = 559; assert sched.run_pending() == 0
+    clock.now = 560; assert sched.run_pending() == 1
+
+def test_cancel_on_ticket_close():
+    sched, clock, sent = make_scheduler()
+    store = InMemoryStore()  # a listener on the shared store would outlive this test
+    store.add_listener("ticket_closed", lambda t: sched.cancel_ticket(t.id))
+    t = store.create_ticket(Ticket(id=Ticket.new_id(), priority=Priority.P2, domain=Domain.OUTAGE, reason="test"))
+    sched.subscribe("s1", "ACCT-MERCURY", t.id, 3600)
+    keep = sched.subscribe("s2", "ACCT-BOWIE", None, 3600)
+    store.close_ticket(t.id)
+    assert list(sched.jobs) == [keep] and len(sched.wheel) == 1
+    clock.now = 3600; sched.run_pending()
+    assert [n["session_id"] for n in sent[0]] == ["s2"]
+
+def test_update_cadence_has_a_floor():
+    assert _parse_update_interval("text me every 30 minutes") == (1800, "30 minutes")
+    assert _parse_update_interval("every hour please") == (3600, "hour")
+    assert _parse_update_interval("update me every minute") == (NOTIFY_MIN_INTERVAL_MINUTES * 60, f"{NOTIFY_MIN_INTERVAL_MINUTES} minutes")
+    assert _parse_update_interval("every 0 minutes") is None and _parse_update_interval("every 0 hours") is None
+    assert _parse_update_interval("no thanks") is None
+
+if __name__ == "__main__":
+    test_wheel_fires_across_levels(); test_recurring_dispatch_in_batches(); test_subscription_counts_from_now_when_the_wheel_lags(); test_cancel_on_ticket_close(); test_update_cadence_has_a_floor()
+    print("ok")
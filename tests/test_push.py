@@ -0,0 +1,103 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import asyncio
+import json
+import threading
+from natlang.push import PushHub, push_hub, format_sse
+from natlang.storage import store
+from natlang.models import Ticket, Priority, Domain
+
+def test_publish_from_other_thread_reaches_subscriber():
+    hub = PushHub()
+    async def main():
+        sub, missed = hub.subscribe("s1")
+        assert missed == []
+        t = threading.Thread(target=hub.publish, args=("s1", "reply", {"reply": "hi"}))
+        t.start(); t.join()
+        return await asyncio.wait_for(sub.queue.get(), 1.0)
+    event_id, event, data = asyncio.run(main())
+    assert event == "reply" and data == {"reply": "hi"}
+    assert hub.connections() == 1
+
+def test_resume_from_last_event_id_and_bounded_queue():
+    hub = PushHub(backlog_events=3)
+    for n in range(5):
+        hub.publish("s1", "reply", {"n": n})
+    async def main():
+        _, everything = hub.subscribe("s1", 0)
+        _, missed = hub.subscribe("s1", everything[1][0])
+        sub, _ = hub.subscribe("s2")
+        sub.queue = asyncio.Queue(2)
+        for n in range(4):
+            sub._offer((n, "reply", {"n": n}))
+        return everything, missed, [sub.queue.get_nowait()[0] for _ in range(2)]
+    everything, missed, kept = asyncio.run(main())
+    assert [e[2]["n"] for e in everything] == [2, 3, 4]  # only the last backlog_events are kept
+    assert [e[2]["n"] for e in missed] == [4]
+    assert kept == [2, 3]  # oldest dropped when a slow client's queue is full
+
+def test_ticket_close_pushes_update_to_linked_session():
+    t = store.create_ticket(Ticket(id=Ticket.new_id(), priority=Priority.P3, domain=Domain.BILLING, reason="push test"))
+    push_hub.link_ticket(t.id, "push-sess")
+    store.close_ticket(t.id)
+    _, _, data = push_hub.backlog["push-sess"][-1]
+    assert data["ticket_id"] == t.id and data["update"] == "closed" and data["status"] == "CLOSED"
+
+def test_failed_async_turn_pushes_turn_error():
+    from natlang.server import deliver_async_turn, ChatRequest
+    deliver_async_turn(ChatRequest(session_id="push-fail", text="   "), None, "r-failed")
+    _, name, data = push_hub.backlog["push-fail"][-1]
+    # a named "error" event would collide with EventSource's own connection errors
+    assert name == "turn_error" and data == {"receipt_id": "r-failed", "status_code": 400, "detail": "Empty message."}
+
+def test_async_turns_are_admitted_before_they_queue():
+    import natlang.server as srv
+    from unittest import mock
+    from natlang import rate_limit
+    sid = "push-flood"
+    while rate_limit.allow(sid): pass
+    with mock.patch.object(srv.turn_pool, "submit") as submit:
+        try:
+            srv.chat_async(srv.ChatRequest(session_id=sid, text="is my power back yet")); assert False
+        except srv.HTTPException as e:
+            assert e.status_code == 429
+        rate_limit.buckets.pop(sid, None)
+        full = threading.BoundedSemaphore(1); full.acquire()
+        with mock.patch.object(srv, "async_slots", full):
+            try:
+                srv.chat_async(srv.ChatRequest(session_id=sid, text="is my power back yet")); assert False
+            except srv.HTTPException as e:
+                assert e.status_code == 503
+        assert not submit.called and sid not in push_hub.backlog  # no receipt for a refused turn
+        slots = threading.BoundedSemaphore(1)
+        with mock.patch.object(srv, "async_slots", slots):
+            receipt = srv.chat_async(srv.ChatRequest(session_id=sid, text="is my power back yet"))
+            assert submit.call_args[0][0] is srv.deliver_pending_turn and not slots.acquire(blocking=False)
+            with mock.patch.object(srv, "deliver_async_turn", side_effect=RuntimeError("boom")):
+                try:
+                    srv.deliver_pending_turn(*submit.call_args[0][1:])
+                except RuntimeError:
+                    pass
+            assert slots.acquire(blocking=False)  # the slot comes back however the turn ends
+    rate_limit.buckets.pop(sid, None)
+    assert receipt.status == "accepted" and push_hub.backlog[sid][-1][1] == "receipt"
+
+def test_format_sse():
+    frame = format_sse((7, "reply", {"reply": "ok"}))
+    assert frame.endswith("\n\n")
+    lines = frame.strip().split("\n")
+    assert lines[:2] == ["id: 7", "event: reply"] and json.loads(lines[2][len("data: "):]) == {"reply": "ok"}
+
+if __name__ == "__main__":
+    test_publish_from_other_thread_reaches_subscriber()
+    test_resume_from_last_event_id_and_bounded_queue()
+    test_ticket_close_pushes_update_to_linked_session()
+    test_failed_async_turn_pushes_turn_error()
+    test_async_turns_are_admitted_before_they_queue()
+    test_format_sse()
+    print("ok")
@@ -0,0 +1,101 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import json
+import tempfile
+import natlang.server as srv
+from natlang.storage import store
+from natlang.models import SentimentResult, EmotionScore, Domain
+from natlang.agent_selector import routing_engine
+from natlang.notifications import notification_scheduler
+from natlang.flows import RESUME_HANDLERS
+from natlang.replay import ReplayConfig, load_sessions, replay
+
+def sentiment(domain="OUTAGE", profanity=False, safety_flag=False, intents=(), **emotions):
+    return SentimentResult(domain=Domain(domain), emotions=[EmotionScore(k, v) for k, v in emotions.items()],
+                           profanity=profanity, safety_flag=safety_flag, intents=list(intents), confidence=0.9)
+
+# session id -> [(text, account_number, sentiment)]
+SCRIPTS = {
+    "rp-impatient": [("my power is still out", "ACCT-MERCURY", sentiment(impatient=0.75)),
+                     ("yes", "ACCT-MERCURY", sentiment(happy=0.8, intents=["accept_solution"]))],
+    "rp-angry": [("fix this damn outage now", "ACCT-BOWIE", sentiment(angry=0.95, profanity=True))],
+    # angry_profanity is resumed before the safety flow, so this one escalates to an agent rather than the emergency CSR
+    "rp-scared": [("damn, I see sparks by the meter", None, sentiment(fearful=0.9, angry=0.85, profanity=True, safety_flag=True))],
+    "rp-billing": [("Billing", None, None), ("I was overcharged on my bill", "ACCT-PRINCE",
+                   sentiment("BILLING", neutral=0.7, intents=["billing_dispute"]))],
+}
+
+def record(tag):
+    """Run the scripts through the server (as sessions "<script>-<tag>") and return their journal records."""
+    start = len(store.interactions)
+    for sid, turns in SCRIPTS.items():
+        for text, account, sr in turns:
+            srv.process_chat(srv.ChatRequest(session_id=f"{sid}-{tag}", text=text, account_number=account),
+                             analyze=lambda _t, sr=sr: sr)
+    return store.interactions[start:]
+
+def write_journal(records):
+    f = tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8")
+    with f:
+        for r in records: f.write(json.dumps(r) + "\n")
+    return f.name
+
+def test_baseline_reproduces_the_journal():
+    records = record("a")
+    assert records[0]["account_number"] == "ACCT-MERCURY"
+    sessions = load_sessions([write_journal(records)])
+    assert sorted(s for s, _ in sessions) == sorted(f"{s}-a" for s in SCRIPTS)
+    out = replay(sessions, [ReplayConfig(name="same")])
+    assert out["baseline"]["journal_agreement"] == {"turns": 6, "matching": 6, "share": 1.0}
+    same = out["variants"]["same"]
+    assert same["changed"]["turns"] == 0 and same["tickets"]["total"]["delta"] == 0 and same["transitions"] == []
+    assert [same["tickets"][p]["baseline"] for p in ("P0", "P1", "P2")] == [0, 2, 1] and same["escalations"]["baseline"] == 2
+
+def test_threshold_and_order_variants():
+    sessions = load_sessions([write_journal(record("b"))])
+    tickets, jobs, load = len(store.tickets), len(notification_scheduler.jobs), {a: x.load for a, x in routing_engine.agents.items()}
+    variants = [ReplayConfig.from_spec("impatient_080", {"thresholds": {"impatient": 0.8}}),
+                ReplayConfig.from_spec("safety_first", {"resume": ["flow_safety_fear_entry"] + [
+                    h.__name__ for h in RESUME_HANDLERS if h.__name__ != "flow_safety_fear_entry"]})]
+    out = replay(sessions, variants)["variants"]
+    v = out["impatient_080"]
+    assert v["changed"] == {"turns": 2, "sessions": 1, "turn_share": 0.3333}
+    assert v["flows"]["flow_outage_impatient"]["delta"] == -1 and v["tickets"]["P2"]["delta"] == -1
+    assert {"from": None, "to": "await_account_details", "baseline": 1, "variant": 0, "delta": -1} in v["transitions"]
+    assert v["examples"][0]["session_id"] == "rp-impatient-b" and v["examples"][0]["variant"]["flow"] == "fallback"
+    v = out["safety_first"]
+    assert v["flows"]["flow_safety_fear_entry"]["delta"] == 1 and v["flows"]["flow_outage_angry_profanity"]["delta"] == -1
+    assert v["tickets"]["P0"]["delta"] == 1 and v["tickets"]["P1"]["delta"] == -1 and v["escalations"]["delta"] == 0
+    # replayed sessions leave nothing behind
+    assert len(store.tickets) == tickets and len(notification_scheduler.jobs) == jobs
+    assert {a: x.load for a, x in routing_engine.agents.items()} == load
+
+def test_process_pool_matches_in_process():
+    sessions = load_sessions([write_journal(record("c"))]) * 3
+    variants = [ReplayConfig.from_spec("v", {"thresholds": {"impatient": 0.8, "angry": 0.9}})]
+    local = replay(sessions, variants, chunk_size=2)
+    pooled = replay(sessions, variants, workers=2, chunk_size=2)
+    assert pooled["variants"] == local["variants"] and pooled["baseline"] == local["baseline"]
+
+def test_config_errors():
+    for spec in ({"thresholds": {"grumpy": 0.5}}, {"thresholds": {"angry": 1.5}}, {"entry": ["flow_nope"]}, {"order": []}):
+        try:
+            ReplayConfig.from_spec("bad", spec); assert False, spec
+        except ValueError:
+            pass
+    try:
+        replay([], []); assert False
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_baseline_reproduces_the_journal()
+    test_threshold_and_order_variants()
+    test_process_pool_matches_in_process()
+    test_config_errors()
+    print("ok")
@@ -0,0 +1,97 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.routing import RoutingEngine, simulate
+from natlang.agent_selector import routing_engine
+from natlang.storage import store
+from natlang.models import SentimentResult, EmotionScore, Domain
+from natlang.models import Ticket, Priority
+from natlang.flows import flow_safety_fear_entry, flow_billing_acceptance
+
+def test_least_loaded_agent_wins():
+    eng = RoutingEngine({"OUTAGE": ["a", "b"]}, max_load=3)
+    picks = [eng.assign(f"T{i}", "P2", "OUTAGE") for i in range(4)]
+    assert sorted(picks) == ["a", "a", "b", "b"]
+    eng.release("T0")
+    assert eng.peek("OUTAGE") == picks[0]
+
+def test_queue_drains_by_priority_then_arrival():
+    clock = [0.0]
+    eng = RoutingEngine({"OUTAGE": ["a"]}, max_load=1, clock=lambda: clock[0])
+    assert eng.assign("busy", "P2", "OUTAGE") == "a"
+    for i, prio in enumerate(["P3", "P2", "P1", "P2"]):  # (P0 never queues)
+        clock[0] = i
+        assert eng.assign(f"Q{i}", prio, "OUTAGE") is None
+    order = []
+    held = "busy"
+    for _ in range(4):
+        (tid, agent, _), = eng.release(held)
+        order.append(tid); held = tid
+    assert order == ["Q2", "Q1", "Q3", "Q0"]
+
+def test_ticket_closed_while_queued_is_skipped():
+    eng = RoutingEngine({"BILLING": ["a"]}, max_load=1)
+    eng.assign("T1", "P2", "BILLING"); eng.assign("T2", "P1", "BILLING"); eng.assign("T3", "P2", "BILLING")
+    eng.release("T2")
+    assert [t for t, _, _ in eng.release("T1")] == ["T3"]
+
+def test_simulator_reports_percentiles():
+    trace = [{"ts": i, "priority": "P0" if i % 5 == 0 else "P2", "skill": "OUTAGE", "service_seconds": 10} for i in range(50)]
+    report = simulate(trace, roster={"OUTAGE": ["a"]}, max_load=1)
+    assert report["unassigned"] == 0
+    assert report["by_priority"]["P0"]["wait_p99"] < report["by_priority"]["P2"]["wait_p99"]
+
+def test_p0_never_waits_and_lower_priorities_queue():
+    eng = RoutingEngine({"CSR_EMERGENCY": ["a", "b"]}, max_load=5)
+    picks = [eng.assign(f"E{i}", "P0", "CSR_EMERGENCY") for i in range(12)]
+    assert None not in picks and sorted(picks) == ["a"] * 6 + ["b"] * 6
+    assert eng.assign("T", "P2", "CSR_EMERGENCY") is None and eng.queue_depths() == {"CSR_EMERGENCY": 1}
+    # queued in one pool, then placed in another: only the second assignment counts
+    two = RoutingEngine({"CSR_EMERGENCY": [], "OUTAGE": ["o"]}, max_load=1)
+    assert two.assign("X", "P1", "CSR_EMERGENCY") is None and two.assign("X", "P1", "OUTAGE") == "o"
+    assert two.queued == {} and two.release("X") == [] and two.agents["o"].load == 0
+
+def test_assignments_expire_after_their_hold():
+    clock, handed = [0.0], []
+    eng = RoutingEngine({"OUTAGE": ["a"]}, max_load=1, clock=lambda: clock[0], hold_seconds={"P1": 60},
+                        on_assigned=lambda t, a: handed.append((t, a)))
+    assert eng.assign("never-closed", "P1", "OUTAGE") == "a" and eng.assign("next", "P1", "OUTAGE") is None
+    clock[0] = 59
+    assert eng.expire() == [] and eng.agents["a"].load == 1
+    clock[0] = 60
+    assert eng.queue_depths() == {} and handed == [("next", "a")] and "never-closed" not in eng.assignments
+    eng.release("next")
+    clock[0] = 500
+    assert eng.expire() == [] and eng.agents["a"].load == 0  # released before its hold ran out
+
+def test_emergency_tickets_always_name_an_agent():
+    fear = SentimentResult(domain=Domain.OUTAGE, emotions=[EmotionScore("fearful", 0.9)], profanity=False, safety_flag=True)
+    before = {a: x.load for a, x in routing_engine.agents.items()}
+    out = [flow_safety_fear_entry(f"fear-{i}", "sparks at the meter", fear) for i in range(12)]
+    try:
+        assert all(store.get_ticket(r["ticket_id"]).assigned_agent_id for r in out)
+    finally:
+        for r in out: store.close_ticket(r["ticket_id"])
+    assert {a: x.load for a, x in routing_engine.agents.items()} == before
+
+def test_rejected_billing_callback_keeps_its_agent():
+    t = store.create_ticket(Ticket(id=Ticket.new_id(), priority=Priority.P2, domain=Domain.BILLING, reason="x"))
+    t.assigned_agent_id = routing_engine.assign(t.id, "P2", "BILLING")
+    load = routing_engine.agents[t.assigned_agent_id].load
+    store.set_session("reject-twice", "await_billing_accept", ticket_id=t.id)
+    no = SentimentResult(domain=Domain.BILLING, emotions=[EmotionScore("disappointed", 0.7)], profanity=False, safety_flag=False)
+    r = flow_billing_acceptance("reject-twice", "no", no)
+    try:
+        assert r["actions"] == ["ESCALATE_AGENT"] and t.assigned_agent_id in r["message"]
+        assert routing_engine.agents[t.assigned_agent_id].load == load
+    finally:
+        store.close_ticket(t.id)
+
+if __name__ == "__main__":
+    test_least_loaded_agent_wins(); test_queue_drains_by_priority_then_arrival(); test_ticket_closed_while_queued_is_skipped(); test_simulator_reports_percentiles()
+    test_p0_never_waits_and_lower_priorities_queue(); test_assignments_expire_after_their_hold(); test_emergency_tickets_always_name_an_agent(); test_rejected_billing_callback_keeps_its_agent()
+    print("ok")
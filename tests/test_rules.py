@@ -0,0 +1,66 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import random
+import numpy as np
+from natlang.config import THRESHOLDS as T
+from natlang.models import SentimentResult, EmotionScore, Domain, EmotionKind
+from natlang.rules import rule_table, matches, features, features_from_dict, feature_matrix
+from natlang.flows import emo, is_positive
+
+EMOTIONS = [k.name.lower() for k in EmotionKind]
+
+def random_sr(rng):
+    # scores drawn partly from the thresholds themselves so the >= / < edges are exercised
+    pool = [round(rng.random(), 2) for _ in range(4)] + list(T.values())
+    emotions = [EmotionScore(rng.choice(EMOTIONS + ["other"]), rng.choice(pool)) for _ in range(rng.randint(0, 4))]
+    return SentimentResult(Domain.UNKNOWN, emotions, rng.random() < 0.2, rng.random() < 0.1,
+                           rng.sample(["billing_dispute", "accept_solution", "outage_status"], rng.randint(0, 2)))
+
+def expected(sr):
+    # the flows' original scalar conditions
+    angry = 1.0 if sr.profanity else sr.score("angry")
+    out = set()
+    if sr.score("impatient") >= T["impatient"] and angry < T["angry"]: out.add("outage_impatient")
+    if angry >= T["angry"]: out.add("angry")
+    if angry >= T["angry"] and sr.profanity: out.add("angry_profanity")
+    if sr.score("fearful") >= T["fearful"]: out.add("fearful")
+    if sr.safety_flag: out.add("safety_flag")
+    if max(sr.score("positive"), sr.score("happy"), sr.score("neutral")) >= min(T["positive"], T["neutral"]): out.add("positive")
+    if "billing_dispute" in sr.intents or sr.score("neutral") >= T["neutral"]: out.add("billing_dispute")
+    if sr.score("disappointed") >= T["disappointed"]: out.add("billing_disappointed")
+    return out
+
+def test_compiled_rules_match_scalar_conditions():
+    rng = random.Random(3)
+    srs = [random_sr(rng) for _ in range(2000)]
+    for sr in srs:
+        assert set(matches(sr)) == expected(sr), sr
+    M = rule_table.evaluate(np.stack([features(sr) for sr in srs]))
+    for sr, row in zip(srs, M):
+        assert {n for n, m in zip(rule_table.names, row) if m} == set(matches(sr))
+
+def test_journal_rows_give_the_same_features():
+    rng = random.Random(4)
+    srs = [random_sr(rng) for _ in range(200)]
+    X = feature_matrix(sr.to_dict() for sr in srs)
+    assert np.array_equal(X, np.stack([features(sr) for sr in srs]))
+    assert feature_matrix([]).shape == (0, X.shape[1])
+
+def test_emotion_vector_and_score():
+    sr = SentimentResult(Domain.OUTAGE, [EmotionScore("Angry", 0.4), EmotionScore("angry", 0.9), EmotionScore("other", 0.3)], True, False)
+    assert sr.score("angry") == 0.4 and sr.score("ANGRY") == 0.4  # first listed score wins, as before
+    assert sr.score("other") == 0.3 and sr.score("fearful") == 0.0
+    assert sr.vector[EmotionKind.ANGRY] == 0.4
+    assert emo(sr, "angry") == 1.0 and emo(sr, "impatient") == 0.0  # profanity => belligerent
+    assert not is_positive(sr)
+
+if __name__ == "__main__":
+    test_compiled_rules_match_scalar_conditions()
+    test_journal_rows_give_the_same_features()
+    test_emotion_vector_and_score()
+    print("ok")
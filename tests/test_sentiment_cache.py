@@ -0,0 +1,65 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.sentiment_cache import SentimentCache
+from natlang.models import SentimentResult, EmotionScore, Domain
+
+def sr(conf=0.9, safety=False):
+    return SentimentResult(Domain.OUTAGE, [EmotionScore("impatient", 0.85)], profanity=False, safety_flag=safety, intents=["outage_status"], confidence=conf)
+
+def test_near_duplicate_hit_and_threshold():
+    cache = SentimentCache(threshold=0.9)
+    r = sr()
+    cache.put("my power is still out and I'm getting impatient", r)
+    assert cache.get("My power is still out and im getting impatient!!") is r
+    assert cache.get("my bill is wrong this month") is None
+    assert SentimentCache(threshold=0.99).get("anything") is None
+
+def test_safety_bypass_and_failures_not_cached():
+    cache = SentimentCache()
+    cache.put("there is smoke coming from the meter", sr())
+    assert cache.get("there is smoke coming from the meter") is None
+    cache.put("my power is out", sr(conf=0.0))
+    assert cache.get("my power is out") is None
+    cache.put("my power is out", sr())
+    assert cache.get("my power is out but there are sparks") is None
+
+def test_negated_near_duplicates_never_share_a_result():
+    cache = SentimentCache(threshold=0.5)  # the guard holds even with a permissive similarity bar
+    pairs = [("I am happy with the service", "I am not happy with the service"),
+             ("the technician fixed it, thanks", "the technician never fixed it, thanks"),
+             ("my bill is correct now", "my bill isn't correct now"),
+             ("the agent was helpful today", "the agent was rude today")]
+    for seen, asked in pairs:
+        cache.put(seen, sr())
+        assert cache.get(asked) is None and cache.get(seen) is not None
+    # the same negation, spelled with or without its apostrophe, still hits
+    cache.put("my bill isn't right", sr())
+    assert cache.get("My bill isnt right!") is not None
+
+def test_reworded_report_hits_at_the_default_threshold():
+    cache = SentimentCache()
+    r = sr()
+    cache.put("my power is out", r)
+    for asked in ("power's been out for hours", "our power is out", "the power is out at my house"):
+        assert cache.get(asked) is r, asked
+    # same words otherwise, but a negation or a change of mood must go to the model
+    for asked in ("my power is not out", "my power is still out", "my power is out and I'm furious"):
+        assert cache.get(asked) is None, asked
+    assert cache.get("my power bill is too high") is None and cache.get("my internet is out") is None
+
+def test_ttl_and_ring_eviction():
+    now = [0.0]
+    cache = SentimentCache(size=2, ttl=10, clock=lambda: now[0])
+    cache.put("first message here", sr()); cache.put("second message here", sr()); cache.put("third message here", sr())
+    assert cache.get("first message here") is None and cache.get("third message here") is not None
+    now[0] = 11
+    assert cache.get("third message here") is None and len(cache) == 0
+
+if __name__ == "__main__":
+    test_near_duplicate_hit_and_threshold(); test_safety_bypass_and_failures_not_cached(); test_negated_near_duplicates_never_share_a_result(); test_reworded_report_hits_at_the_default_threshold(); test_ttl_and_ring_eviction()
+    print("ok")
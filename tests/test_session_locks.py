@@ -0,0 +1,82 @@
+import os, sys, threading, time
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.session_locks import SessionLocks, SessionBusy, session_locks
+from natlang import rate_limit
+import natlang.server as srv
+
+def test_same_session_fifo_and_cleanup():
+    locks = SessionLocks(max_waiters=5)
+    order = []
+    locks.acquire("s")
+    threads = []
+    for i in range(5):
+        t = threading.Thread(target=lambda i=i: (locks.acquire("s"), order.append(i), locks.release("s")))
+        t.start(); threads.append(t)
+        time.sleep(0.02)  # make the arrival order deterministic
+    assert order == []
+    locks.release("s")
+    for t in threads: t.join(5)
+    assert order == [0, 1, 2, 3, 4]
+    assert len(locks) == 0
+
+def test_other_sessions_do_not_wait():
+    locks = SessionLocks()
+    locks.acquire("a")
+    done = threading.Event()
+    threading.Thread(target=lambda: (locks.acquire("b"), done.set(), locks.release("b"))).start()
+    assert done.wait(1)
+    locks.release("a")
+    assert len(locks) == 0
+
+def test_timeout_leaves_no_state():
+    locks = SessionLocks()
+    locks.acquire("s")
+    try:
+        locks.acquire("s", timeout=0.05)
+        assert False, "expected SessionBusy"
+    except SessionBusy:
+        pass
+    locks.release("s")
+    assert len(locks) == 0
+    with locks.hold("s"):
+        assert len(locks) == 1
+
+def test_waiters_are_capped_and_refused_at_once():
+    locks = SessionLocks(timeout=5, max_waiters=2)
+    locks.acquire("s")
+    waiting = [threading.Thread(target=lambda: (locks.acquire("s"), locks.release("s"))) for _ in range(2)]
+    for t in waiting: t.start()
+    while len(locks.slots["s"].waiters) < 2: time.sleep(0.005)
+    t0 = time.perf_counter()
+    try:
+        locks.acquire("s"); assert False, "expected SessionBusy"
+    except SessionBusy:
+        assert time.perf_counter() - t0 < 0.5 and locks.slots["s"].refs == 3
+    locks.release("s")
+    for t in waiting: t.join(5)
+    assert len(locks) == 0
+
+def test_flooding_session_is_rejected_before_it_queues():
+    sid = "flood"
+    session_locks.acquire(sid)  # an earlier turn of this session is still running
+    try:
+        while rate_limit.allow(sid): pass
+        t0 = time.perf_counter()
+        for text, status in (("hello", 429), ("   ", 400)):
+            try:
+                srv.run_turn(srv.ChatRequest(session_id=sid, text=text)); assert False
+            except srv.HTTPException as e:
+                assert e.status_code == status
+        assert time.perf_counter() - t0 < 0.5 and not session_locks.slots[sid].waiters
+    finally:
+        session_locks.release(sid); rate_limit.buckets.pop(sid, None)
+
+if __name__ == "__main__":
+    test_same_session_fifo_and_cleanup(); test_other_sessions_do_not_wait(); test_timeout_leaves_no_state()
+    test_waiters_are_capped_and_refused_at_once(); test_flooding_session_is_rejected_before_it_queues()
+    print("ok")
@@ -0,0 +1,47 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import gzip
+import tempfile
+from pathlib import Path
+from natlang.static_assets import AssetBundle, IMMUTABLE, REVALIDATE, parse_accept_encoding
+
+def make_bundle(js="console.log('hi');\n" * 40):
+    root = Path(tempfile.mkdtemp())
+    (root / "index.html").write_text('<link rel="stylesheet" href="styles.css"/><script src="app.js"></script><a href="https://x/y">x</a>')
+    (root / "app.js").write_text(js)
+    (root / "styles.css").write_text("body{}")
+    return AssetBundle(root)
+
+def test_fingerprints_and_rewrites_shell():
+    b = make_bundle()
+    hashed = [n for n in b.assets if n.startswith("app.") and n != "app.js"]
+    assert len(hashed) == 1 and b.assets[hashed[0]].cache_control == IMMUTABLE
+    shell = b.get("").variants["identity"].decode()
+    assert f'src="{hashed[0]}"' in shell and 'href="https://x/y"' in shell
+    assert b.get("").cache_control == REVALIDATE
+    assert make_bundle(js="changed();\n" * 40).get("").digest != b.get("").digest
+
+def test_encoding_negotiation():
+    js = next(a for n, a in make_bundle().assets.items() if n.startswith("app.") and n != "app.js")
+    enc, body = js.pick("gzip, deflate")
+    assert enc == "gzip" and gzip.decompress(body) == js.variants["identity"]
+    assert js.pick("gzip;q=0")[0] == "identity"
+    assert js.pick(None)[0] == "identity"
+    assert parse_accept_encoding("br;q=0.5, gzip") == {"br": 0.5, "gzip": 1.0}
+    assert "gzip" not in make_bundle().assets["styles.css"].variants  # too small to be worth it
+
+def test_etag_revalidation():
+    shell = make_bundle().get("index.html")
+    assert shell.not_modified(shell.etag("gzip")) and shell.not_modified(f'W/{shell.etag("identity")}')
+    assert not shell.not_modified('"0000000000000000"') and not shell.not_modified(None)
+
+if __name__ == "__main__":
+    test_fingerprints_and_rewrites_shell()
+    test_encoding_negotiation()
+    test_etag_revalidation()
+    print("ok")
@@ -0,0 +1,56 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+from natlang.stats import WindowCounter, LiveStats
+from natlang.models import Ticket, Priority, Domain, SentimentResult, EmotionScore
+
+class FakeClock:
+    def __init__(self): self.now = 1_000_000.0
+    def __call__(self): return self.now
+
+def turn(domain, emotions, flow, actions=None, profanity=False):
+    sr = SentimentResult(domain, [EmotionScore(t, s) for t, s in emotions], profanity, False)
+    return {"sentiment": sr.to_dict(), "flow": flow, "actions": actions}
+
+def test_window_slides_and_expires():
+    clock = FakeClock()
+    c = WindowCounter(window=60, bucket=10, clock=clock)
+    c.add(["a"]); clock.now += 30; c.add(["a", "b"])
+    assert c.snapshot() == {"a": 2, "b": 1}
+    clock.now += 35  # first event is now out of the window
+    assert c.snapshot() == {"a": 1, "b": 1}
+    clock.now += 3600  # a long idle gap clears everything without walking every missed bucket
+    assert c.snapshot() == {}
+    c.add(["a"])
+    assert c.snapshot() == {"a": 1}
+
+def test_live_stats_shares_tickets_and_escalations():
+    clock = FakeClock()
+    s = LiveStats(WindowCounter(window=300, bucket=10, clock=clock))
+    s.record_interaction(turn(Domain.OUTAGE, [("angry", 0.9)], "flow_outage_angry_profanity", ["NOTIFY_ASSIGNED_AGENT"]))
+    s.record_interaction(turn(Domain.OUTAGE, [("angry", 0.2)], "flow_outage_angry_profanity", ["NOTIFY_ASSIGNED_AGENT"], profanity=True))
+    s.record_interaction(turn(Domain.OUTAGE, [("fearful", 0.8)], "flow_safety_fear_entry", ["ASK_SAFETY_CONFIRM"]))
+    s.record_interaction(turn(Domain.BILLING, [("neutral", 0.7)], "flow_billing_dispute_entry", ["ASK_TIME"]))
+    s.record_interaction({"sentiment": {"note": "menu"}, "flow": "flow_menu_route", "actions": ["ASK_ACCOUNT"]})
+    for p in (Priority.P0, Priority.P1, Priority.P1):
+        s.record_ticket(Ticket(id=Ticket.new_id(), priority=p, domain=Domain.OUTAGE, reason="t"))
+    snap = s.snapshot(series=True)
+    assert snap["turns"] == {"total": 5, "analyzed": 4, "by_domain": {"OUTAGE": 3, "BILLING": 1, "MENU": 1}}
+    assert snap["emotions"]["angry"]["turns"] == 2 and snap["emotions"]["angry"]["share"] == 0.5
+    assert snap["emotions"]["fearful"]["by_domain"]["OUTAGE"]["share"] == round(1 / 3, 4)
+    assert snap["tickets"]["by_priority"]["P1"] == {"count": 2, "per_minute": round(2 / 5, 3)}
+    assert snap["tickets"]["by_domain"] == {"OUTAGE": {"P0": 1, "P1": 2}}
+    assert snap["flows"]["flow_outage_angry_profanity"] == {"turns": 2, "escalations": 2, "escalation_rate": 1.0}
+    assert snap["flows"]["flow_safety_fear_entry"]["escalation_rate"] == 0.0
+    assert sum(row.get("P1", 0) for row in snap["series"]["tickets_per_minute"]) == 2
+    clock.now += 301
+    assert s.snapshot()["tickets"]["total"] == 0
+
+if __name__ == "__main__":
+    test_window_slides_and_expires()
+    test_live_stats_shares_tickets_and_escalations()
+    print("ok")
@@ -0,0 +1,102 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import multiprocessing as mp
+from datetime import datetime, timezone, timedelta
+from unittest import mock
+from natlang import ids
+from natlang.ids import TicketIdAllocator, SR_ID_RE, id_floor, id_time, is_time_ordered, derived_worker_id, check_worker_id
+from natlang.storage import InMemoryStore, DuplicateTicketId, store
+from natlang.billing_store import billing_store
+from natlang.models import Ticket, Priority, Domain, SentimentResult, EmotionScore
+from natlang.flows import flow_billing_prior_sr_and_feedback
+
+def ticket(tid, created_at=None):
+    return Ticket(id=tid, priority=Priority.P2, domain=Domain.OUTAGE, reason="x", created_at=created_at or datetime.now(timezone.utc))
+
+def allocate(n):
+    # the module allocator of a fresh process: worker id derived from host name and pid
+    return ids.ticket_ids.worker_id, [Ticket.new_id() for _ in range(n)]
+
+def test_ids_are_ordered_unique_and_carry_their_time():
+    a = TicketIdAllocator(7)
+    before = datetime.now(timezone.utc) - timedelta(milliseconds=1)
+    out = [a.next() for _ in range(20000)]
+    assert out == sorted(out) and len(set(out)) == len(out) and all(is_time_ordered(i) for i in out)
+    assert before <= id_time(out[0]) <= datetime.now(timezone.utc) and id_floor(before) < out[0]
+    assert int(out[0][3:], 16) >> 12 & 0x3FF == 7 and id_time("SR-0ABC1234") is None
+    # a clock stepping back, or a spent sequence, never repeats an id
+    with mock.patch.object(ids.time, "time_ns", return_value=(ids.ID_EPOCH_MS + 10**9) * 10**6):
+        run = [a.next() for _ in range(5000)]
+    with mock.patch.object(ids.time, "time_ns", return_value=(ids.ID_EPOCH_MS + 10**9 - 5) * 10**6):
+        run.append(a.next())
+    assert run == sorted(run) and len(set(run)) == len(run)
+    try:
+        TicketIdAllocator(1024); assert False
+    except ValueError:
+        pass
+
+def test_workers_in_separate_processes_never_collide():
+    with mp.get_context("spawn").Pool(2, maxtasksperchild=1) as pool:
+        (wa, a), (wb, b) = pool.map(allocate, [5000, 5000], chunksize=1)
+    assert wa != wb and len(set(a) | set(b)) == len(a) + len(b) == 10000
+
+def test_derived_worker_ids_differ_between_containers():
+    # every container runs its server as PID 1: only the host name tells them apart
+    with mock.patch.object(ids.os, "getpid", return_value=1):
+        with mock.patch.object(ids.socket, "gethostname", return_value="natlang-7d9f-abcde"):
+            a = derived_worker_id()
+        with mock.patch.object(ids.socket, "gethostname", return_value="natlang-7d9f-fghij"):
+            b = derived_worker_id()
+    assert a != b and 0 <= a <= ids.MAX_WORKER
+    # one host: distinct pids (mod 1024) keep distinct worker ids
+    workers = set()
+    with mock.patch.object(ids.socket, "gethostname", return_value="natlang-7d9f-abcde"):
+        for pid in range(4000, 5024):
+            with mock.patch.object(ids.os, "getpid", return_value=pid):
+                workers.add(derived_worker_id())
+    assert len(workers) == 1024
+    check_worker_id(None, 1); check_worker_id(3, 4)
+    try:
+        check_worker_id(None, 4); assert False
+    except RuntimeError as e:
+        assert "NATLANG_WORKER_ID" in str(e)
+
+def test_store_rejects_duplicates_and_range_scans_by_id():
+    st = InMemoryStore()
+    made = [st.create_ticket(ticket(Ticket.new_id())) for _ in range(50)]
+    try:
+        st.create_ticket(ticket(made[3].id)); assert False
+    except DuplicateTicketId:
+        pass
+    assert st.tickets[made[3].id] is made[3]
+    mid = id_time(made[25].id)
+    got = st.tickets_between(since=mid)
+    assert got[0].id <= made[25].id and got[-1] is made[-1] and all(t.id >= id_floor(mid) for t in got)
+    assert [t.id for t in st.tickets_between()] == sorted(t.id for t in made)
+    # legacy ids are matched by created_at; removal drops a ticket from the index
+    old = st.create_ticket(ticket("SR-0000BEEF", created_at=datetime(2025, 1, 1, tzinfo=timezone.utc)))
+    assert st.tickets_between(until=datetime(2025, 6, 1, tzinfo=timezone.utc)) == [old]
+    assert st.remove_ticket(made[0].id) is made[0] and st.remove_ticket(old.id) is old and st.remove_ticket(old.id) is None
+    assert made[0].id not in st.ticket_ids and st.legacy_ticket_ids == [] and len(st.tickets_between()) == 49
+
+def test_prior_sr_parsing_accepts_both_formats():
+    assert [m.group(1) for m in SR_ID_RE.finditer("SR-0abc1234 and SR-05240F70A887C000, not SR-12345")] == ["0abc1234", "05240F70A887C000"]
+    neutral = SentimentResult(domain=Domain.BILLING, emotions=[EmotionScore("neutral", 0.6)], profanity=False, safety_flag=False)
+    sr_id = Ticket.new_id()
+    billing_store.create_request("ACCT-ENO", "Brian", "Eno", "overcharge_dispute", sr_id)
+    store.set_session("ids-prior", "await_prior_sr", account_number="ACCT-ENO")
+    r = flow_billing_prior_sr_and_feedback("ids-prior", f"it's {sr_id.lower()}", neutral)
+    assert r["actions"] == ["ASK_FEEDBACK"] and store.get_session("ids-prior")["ctx"]["prior_sr"] == sr_id
+
+if __name__ == "__main__":
+    test_ids_are_ordered_unique_and_carry_their_time()
+    test_workers_in_separate_processes_never_collide()
+    test_derived_worker_ids_differ_between_containers()
+    test_store_rejects_duplicates_and_range_scans_by_id()
+    test_prior_sr_parsing_accepts_both_formats()
+    print("ok")
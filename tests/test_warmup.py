@@ -0,0 +1,68 @@
+import os, sys
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+BASE = str((__file__).split("/tests/")[0])
+if BASE not in sys.path:
+    sys.path.insert(0, BASE)
+
+import subprocess
+import time
+from natlang.warmup import Readiness
+
+def test_warmup_runs_steps_and_reports_ready():
+    r = Readiness(started=time.perf_counter())
+    calls = []
+    assert not r.ready()
+    r.start([("a", lambda: calls.append("a")), ("b", lambda: calls.append("b"))], background=False)
+    snap = r.snapshot()
+    assert calls == ["a", "b"] and snap["ready"] and snap["warmup"] == "done" and set(snap["steps"]) == {"a", "b"}
+    r.first_response(); first = r.first_response_seconds
+    r.first_response()
+    assert r.first_response_seconds == first
+
+def test_failed_warmup_still_ready():
+    r = Readiness()
+    r.start([("boom", lambda: 1 / 0), ("after", lambda: None)], background=False)
+    # a failed step does not skip the ones after it
+    assert r.ready() and r.state == "failed" and "after" in r.steps and set(r.failed) == {"boom"} and r.error
+
+def test_required_step_holds_readiness_until_it_succeeds():
+    loaded, attempts = [], []
+    def flaky_import():
+        attempts.append(1)
+        if len(attempts) < 3: raise OSError("ledger not mounted yet")
+        loaded.append("ledger")
+    r = Readiness(retry_seconds=0.01)
+    r.start([("sentiment_backend", lambda: 1 / 0)], required=[("billing_import", flaky_import)])
+    deadline = time.time() + 5
+    while not r.ready() and time.time() < deadline:
+        time.sleep(0.005)
+    r._thread.join(1.0)
+    assert r.ready() and loaded == ["ledger"] and len(attempts) == 3 and r.required == []
+    assert "billing_import" in r.steps and set(r.failed) == {"sentiment_backend"}
+    s = Readiness()
+    s.start([("sentiment_backend", lambda: 1 / 0)], background=False, required=[("billing_import", lambda: 1 / 0)])
+    assert not s.ready() and s.snapshot()["waiting_for"] == ["billing_import"]
+
+def test_background_warmup_and_skip():
+    r = Readiness()
+    r.start([("slow", lambda: time.sleep(0.05))])
+    assert r.state == "running" and not r.ready()
+    r._thread.join(1.0)
+    assert r.ready()
+    s = Readiness(); s.start([])
+    assert s.ready() and s.state == "skipped"
+
+def test_server_import_does_not_load_llm_sdk():
+    code = "import sys, natlang.server; print('google.generativeai' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BASE, capture_output=True, text=True,
+                         env=dict(os.environ, NATLANG_SENTIMENT_BACKEND="gemini"), timeout=60)
+    assert out.stdout.strip().splitlines()[-1] == "False", out.stderr
+
+if __name__ == "__main__":
+    test_warmup_runs_steps_and_reports_ready()
+    test_failed_warmup_still_ready()
+    test_required_step_holds_readiness_until_it_succeeds()
+    test_background_warmup_and_skip()
+    test_server_import_does_not_load_llm_sdk()
+    print("ok")
@@ -0,0 +1,45 @@
+"""Export interactions, feedback, tickets or billing requests as JSONL, Arrow IPC or Parquet.
+
+Reads a running server's GET /export/{kind} (needs NATLANG_DEBUG_TOKEN) and
+streams the body to a file, so neither side holds the whole export in memory.
+
+Usage (from project root):
+
+python tools/export_data.py interactions --out interactions.jsonl
+python tools/export_data.py interactions --format parquet --since 2026-10-01 --until 2026-11-01 --out oct.parquet
+python tools/export_data.py feedback --session s-abc123 --out -            # JSONL to stdout
+python tools/export_data.py tickets --base-url http://127.0.0.1:8000 --token $NATLANG_DEBUG_TOKEN --out tickets.arrows --format arrow
+
+Arrow and Parquet need pyarrow on the server (it answers 501 otherwise).
+"""
+import sys, os, argparse, time
+import requests
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream a NatLang data export to a file")
+    ap.add_argument("kind", choices=["interactions", "feedback", "tickets", "billing"])
+    ap.add_argument("--format", default="jsonl", choices=["jsonl", "arrow", "parquet"])
+    ap.add_argument("--since", help="ISO-8601 start (inclusive, UTC if no offset)")
+    ap.add_argument("--until", help="ISO-8601 end (exclusive)")
+    ap.add_argument("--session", help="only this session (interactions / feedback)")
+    ap.add_argument("--out", required=True, help="output file, or - for stdout")
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--token", default=os.getenv("NATLANG_DEBUG_TOKEN"), help="debug token (default: $NATLANG_DEBUG_TOKEN)")
+    args = ap.parse_args()
+
+    params = {"format": args.format, "since": args.since, "until": args.until, "session_id": args.session}
+    t0 = time.perf_counter(); n = 0
+    with requests.get(f"{args.base_url}/export/{args.kind}", params={k: v for k, v in params.items() if v},
+                      headers={"X-Debug-Token": args.token or ""}, stream=True, timeout=(10, 300)) as r:
+        if r.status_code != 200:
+            raise SystemExit(f"export failed: HTTP {r.status_code} {r.text[:300]}")
+        out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+        try:
+            for chunk in r.iter_content(chunk_size=1 << 16):
+                out.write(chunk); n += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer: out.close()
+    print(f"{n:,} bytes in {time.perf_counter() - t0:.1f}s -> {args.out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Concurrent load generator for /chat built from the scripted scenarios (2.1–2.5).
+
+Each synthetic conversation replays one scenario under its own session id.
+Conversations arrive as a Poisson process at --rate per second and run on up to
+--concurrency worker threads; turns within a conversation are sequential.
+
+Usage (from project root):
+
+# start a local server on the stub sentiment backend with 300ms simulated LLM latency
+python tools/load_test.py --spawn-server --stub-latency-ms 300 --conversations 500 --rate 20
+
+# or drive an already running server
+python tools/load_test.py --base-url http://127.0.0.1:8000 --mix "2.1_accept=3,2.2=1,2.3=1"
+
+Prints throughput, p50/p95/p99 latency per scenario and per flow that answered
+(the server's meta.flow), and error / 429 rates (JSON with --json).
+"""
+import sys, os, json, time, uuid, random, argparse, threading, subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+proj = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proj)
+from natlang.metrics import percentile
+
+SCENARIOS = {
+    "2.1_accept": [("Outage Assist", None), ("my power is still out and I'm getting impatient", "ACCT-MERCURY"), ("no", "ACCT-MERCURY"), ("yes", "ACCT-MERCURY")],
+    "2.1_nonhappy": [("Outage Assist", None), ("my power is still out and I'm getting impatient", "ACCT-MERCURY"), ("no", "ACCT-MERCURY"), ("no", "ACCT-MERCURY"),
+                     ("I need SMS updates every hour until restored", "ACCT-MERCURY")],
+    "2.2": [("Outage Assist", None), ("this f*** power is still out!", "ACCT-PRINCE")],
+    "2.3": [("I am afraid about the situation outside", None), ("no", None)],
+    "2.3_emergency": [("Outage Assist", None), ("there are sparks and smoke coming from the pole", None)],
+    "2.4_accept": [("I was overcharged on my bill this month", "ACCT-BOWIE"), ("10:30am", "ACCT-BOWIE"), ("yes", "ACCT-BOWIE")],
+    "2.4_nonhappy": [("I was overcharged on my bill this month", "ACCT-BOWIE"), ("10:30am", "ACCT-BOWIE"), ("no", "ACCT-BOWIE")],
+    "2.5": [("I'm disappointed with the billing service on my last case", "ACCT-NICKS"), ("I don't have it", "ACCT-NICKS"),
+            ("the representative hung up on me", "ACCT-NICKS")],
+}
+
+def parse_mix(spec):
+    if not spec:
+        return {name: 1.0 for name in SCENARIOS}
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}   # scenario -> [seconds]
+        self.status = {}    # scenario -> {status: count}
+        self.flows = {}     # flow that answered (successful turns) -> [seconds]
+
+    def record(self, scenario, seconds, status, flow=None):
+        with self.lock:
+            self.latency.setdefault(scenario, []).append(seconds)
+            if flow: self.flows.setdefault(flow, []).append(seconds)
+            counts = self.status.setdefault(scenario, {})
+            counts[status] = counts.get(status, 0) + 1
+
+_local = threading.local()
+
+def http():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+def run_conversation(base_url, scenario, results, think_s, timeout):
+    sid = f"load-{uuid.uuid4().hex[:10]}"
+    for text, acct in SCENARIOS[scenario]:
+        t0 = time.perf_counter(); flow = None
+        try:
+            r = http().post(f"{base_url}/chat", json={"session_id": sid, "text": text, "account_number": acct}, timeout=timeout)
+            status = str(r.status_code)
+            elapsed = time.perf_counter() - t0
+            if r.ok: flow = (r.json().get("meta") or {}).get("flow")
+        except (requests.RequestException, ValueError) as e:
+            status = type(e).__name__; elapsed = time.perf_counter() - t0
+        results.record(scenario, elapsed, status, flow)
+        if status != "200":
+            return  # the rest of the script depends on this turn
+        if think_s: time.sleep(think_s)
+
+def report(results, wall):
+    out = {"wall_seconds": round(wall, 3), "scenarios": {}}
+    all_lat, all_status = [], {}
+    for scenario, lats in sorted(results.latency.items()):
+        lats = sorted(lats); counts = results.status[scenario]
+        n = len(lats)
+        out["scenarios"][scenario] = {
+            "turns": n,
+            "p50_ms": round(percentile(lats, 50) * 1000, 2), "p95_ms": round(percentile(lats, 95) * 1000, 2),
+            "p99_ms": round(percentile(lats, 99) * 1000, 2),
+            "error_rate": round(sum(v for k, v in counts.items() if k not in ("200", "429")) / n, 4),
+            "rate_limited_rate": round(counts.get("429", 0) / n, 4),
+        }
+        all_lat.extend(lats)
+        for k, v in counts.items(): all_status[k] = all_status.get(k, 0) + v
+    out["flows"] = {}
+    for flow, lats in sorted(results.flows.items()):
+        lats = sorted(lats)
+        out["flows"][flow] = {"turns": len(lats), "p50_ms": round(percentile(lats, 50) * 1000, 2),
+                              "p95_ms": round(percentile(lats, 95) * 1000, 2), "p99_ms": round(percentile(lats, 99) * 1000, 2)}
+    all_lat.sort(); n = len(all_lat) or 1
+    out["total"] = {
+        "turns": len(all_lat), "throughput_rps": round(len(all_lat) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(all_lat, 50) * 1000, 2), "p95_ms": round(percentile(all_lat, 95) * 1000, 2),
+        "p99_ms": round(percentile(all_lat, 99) * 1000, 2),
+        "error_rate": round(sum(v for k, v in all_status.items() if k not in ("200", "429")) / n, 4),
+        "rate_limited_rate": round(all_status.get("429", 0) / n, 4), "status_counts": all_status,
+    }
+    return out
+
+def spawn_server(port, stub_latency_ms, jitter_ms):
+    env = dict(os.environ, NATLANG_SENTIMENT_BACKEND="stub", NATLANG_STUB_LATENCY_MS=str(stub_latency_ms),
+               NATLANG_STUB_LATENCY_JITTER_MS=str(jitter_ms), GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "DUMMY"))
+    proj = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "natlang.server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+                            cwd=proj, env=env, stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if requests.get(f"{base}/healthz", timeout=1).ok:
+                return proc, base
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.terminate()
+    raise SystemExit("server did not become healthy")
+
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent /chat load generator")
+    ap.add_argument("--base-url", default=os.getenv("API_BASE", "http://127.0.0.1:8000"))
+    ap.add_argument("--spawn-server", action="store_true", help="start a local uvicorn on the stub sentiment backend")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--stub-latency-ms", type=float, default=200.0)
+    ap.add_argument("--stub-jitter-ms", type=float, default=50.0)
+    ap.add_argument("--conversations", type=int, default=200)
+    ap.add_argument("--rate", type=float, default=10.0, help="conversation arrivals per second (Poisson)")
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--mix", help='scenario weights, e.g. "2.1_accept=3,2.2=1" (default: uniform)')
+    ap.add_argument("--think-ms", type=float, default=0.0, help="pause between turns of one conversation")
+    ap.add_argument("--timeout", type=float, default=30.0)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    proc = None
+    base = args.base_url.rstrip("/")
+    if args.spawn_server:
+        proc, base = spawn_server(args.port, args.stub_latency_ms, args.stub_jitter_ms)
+    results = Results()
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for _ in range(args.conversations):
+                pool.submit(run_conversation, base, rng.choices(names, weights=weights)[0], results, args.think_ms / 1000.0, args.timeout)
+                time.sleep(rng.expovariate(args.rate))
+        wall = time.perf_counter() - start
+    finally:
+        if proc: proc.terminate(); proc.wait(timeout=10)
+    out = report(results, wall)
+    if args.json:
+        print(json.dumps(out, indent=2)); return
+    print(f"{'scenario':<16}{'turns':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err':>8}{'429':>8}")
+    for name, row in list(out["scenarios"].items()) + [("TOTAL", out["total"])]:
+        print(f"{name:<16}{row['turns']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['error_rate']:>8.2%}{row['rate_limited_rate']:>8.2%}")
+    print(f"\n{'flow':<36}{'turns':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in out["flows"].items():
+        print(f"{name:<36}{row['turns']:>7}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    print(f"throughput: {out['total']['throughput_rps']} turns/s over {out['wall_seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Replay journaled conversations under alternate thresholds / flow order and diff the outcomes.
+
+Input is interaction-journal JSONL (one store.interactions record per line) or
+an interactions export from GET /export/interactions (JSONL or Parquet). Every
+session is re-run through the flows with its journaled sentiment, once as
+configured today and once per variant (natlang.replay), across a process pool.
+
+Usage (from project root):
+
+python tools/replay_whatif.py interactions.jsonl --set angry=0.75 --set impatient=0.8
+python tools/replay_whatif.py day1.jsonl day2.jsonl --entry-order flow_outage_angry_profanity,flow_safety_fear_entry,flow_outage_impatient,flow_billing_disappointed,flow_billing_dispute_entry
+python tools/replay_whatif.py interactions.parquet --variants variants.json --workers 8 --json > report.json
+
+variants.json maps names to overrides:
+{"angry_075": {"thresholds": {"angry": 0.75}}, "anger_first": {"entry": ["flow_outage_angry_profanity", ...]}}
+
+Prints, per variant, tickets by priority, escalations, flow usage and stage
+transitions against the baseline, and a few turns whose outcome changed.
+"""
+import sys, os, json, argparse, time
+proj = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proj)
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+from natlang.replay import ReplayConfig, load_sessions, replay
+
+def variants_from(args):
+    specs = {}
+    if args.variants:
+        with open(args.variants, encoding="utf-8") as f:
+            specs.update(json.load(f))
+    spec = {}
+    for item in args.set or []:
+        name, _, value = item.partition("=")
+        spec.setdefault("thresholds", {})[name.strip()] = float(value)
+    if args.resume_order: spec["resume"] = [h.strip() for h in args.resume_order.split(",") if h.strip()]
+    if args.entry_order: spec["entry"] = [h.strip() for h in args.entry_order.split(",") if h.strip()]
+    if spec: specs["variant"] = spec
+    return [ReplayConfig.from_spec(name, s) for name, s in specs.items()]
+
+def fmt(d):
+    sign = "+" if d["delta"] > 0 else ""
+    return f"{d['baseline']:>8} -> {d['variant']:<8} ({sign}{d['delta']})"
+
+def print_report(report, top):
+    agree = report["baseline"]["journal_agreement"]
+    print(f"replayed in {report['seconds']}s ({report['turns_per_second']} turn replays/s)")
+    if agree.get("turns"):
+        print(f"baseline reproduces the journaled flow on {agree['matching']}/{agree['turns']} turns ({agree['share']:.2%})")
+    for name, v in report["variants"].items():
+        changed = v["changed"]
+        print(f"\n== {name}: {v['sessions']} sessions, {v['turns']} turns; "
+              f"{changed['turns']} turns ({changed['turn_share']:.2%}) in {changed['sessions']} sessions changed")
+        print("tickets:")
+        for p, d in v["tickets"].items():
+            print(f"  {p:<6}{fmt(d)}")
+        print(f"escalations: {fmt(v['escalations'])}")
+        for flow, d in v["escalations"]["by_flow"].items():
+            if d["delta"]: print(f"  {flow:<38}{fmt(d)}")
+        print("flows:")
+        for flow, d in v["flows"].items():
+            if d["delta"]: print(f"  {flow:<38}{fmt(d)}")
+        if v["transitions"]:
+            print("stage transitions:")
+            for t in v["transitions"][:top]:
+                print(f"  {str(t['from'] or '-'):>24} -> {str(t['to'] or '-'):<24}{fmt(t)}")
+        for ex in v["examples"][:top]:
+            b, a = ex["baseline"], ex["variant"]
+            print(f"  e.g. {ex['session_id']}#{ex['turn']} {ex['text'][:60]!r}: {b['flow']} {b['actions']} -> {a['flow']} {a['actions']}")
+
+def main():
+    ap = argparse.ArgumentParser(description="What-if replay of interaction journals")
+    ap.add_argument("journals", nargs="+", help="interaction journal / export files (.jsonl or .parquet)")
+    ap.add_argument("--set", action="append", metavar="EMOTION=VALUE", help="threshold override for the variant (repeatable)")
+    ap.add_argument("--resume-order", help="comma-separated resume handler order for the variant")
+    ap.add_argument("--entry-order", help="comma-separated new-intent handler order for the variant")
+    ap.add_argument("--variants", help="JSON file of named variants")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (0 = replay in this process)")
+    ap.add_argument("--chunk", type=int, default=200, help="sessions per task")
+    ap.add_argument("--examples", type=int, default=10, help="changed turns to keep per variant")
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+
+    try:
+        variants = variants_from(args)
+    except ValueError as e:
+        ap.error(str(e))
+    if not variants:
+        ap.error("nothing to compare: give --set, --resume-order, --entry-order or --variants")
+    t0 = time.perf_counter()
+    sessions = load_sessions(args.journals)
+    load_seconds = round(time.perf_counter() - t0, 3)
+    report = replay(sessions, variants, workers=args.workers, chunk_size=args.chunk, max_examples=args.examples)
+    report["load_seconds"] = load_seconds
+    if args.json:
+        print(json.dumps(report, indent=2)); return
+    print(f"{len(sessions)} sessions loaded in {load_seconds}s")
+    print_report(report, args.examples)
+
+if __name__ == "__main__":
+    main()
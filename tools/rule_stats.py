@@ -0,0 +1,76 @@
+"""Evaluate the compiled flow rules over interaction journals, offline.
+
+Input is JSONL with one interaction-journal record per line, as kept in
+store.interactions: {"session_id", "user_text", "bot_text", "sentiment": {...}, "ts"}.
+Every turn's sentiment is turned into a feature row and all rules are decided in
+one vectorized pass (natlang.rules), so millions of turns take seconds.
+
+Usage (from project root):
+
+python tools/rule_stats.py interactions.jsonl [more.jsonl ...]
+python tools/rule_stats.py interactions.jsonl --by domain --json
+
+Prints, per rule, how many turns matched and what share of all turns that is,
+optionally split by a sentiment field (domain or source), plus how often
+rules fire together.
+"""
+import sys, os, json, argparse, time
+import numpy as np
+proj = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proj)
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+from natlang.rules import rule_table, feature_matrix
+
+def load(paths):
+    rows = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line: continue
+                s = json.loads(line).get("sentiment")
+                if isinstance(s, dict) and "emotions" in s: rows.append(s)
+    return rows
+
+def summarize(M, names):
+    n = len(M)
+    counts = M.sum(axis=0)
+    out = {name: {"turns": int(c), "share": round(float(c) / n, 4) if n else 0.0} for name, c in zip(names, counts)}
+    co = M.T.astype(np.int64) @ M.astype(np.int64)
+    pairs = [(names[i], names[j], int(co[i, j])) for i in range(len(names)) for j in range(i + 1, len(names)) if co[i, j]]
+    return out, sorted(pairs, key=lambda p: -p[2])
+
+def main():
+    ap = argparse.ArgumentParser(description="Rule match statistics over interaction journals")
+    ap.add_argument("journals", nargs="+", help="interaction journal JSONL files")
+    ap.add_argument("--by", choices=["domain", "source"], help="also split the counts by this sentiment field")
+    ap.add_argument("--top-pairs", type=int, default=10)
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    rows = load(args.journals)
+    X = feature_matrix(rows)
+    t1 = time.perf_counter()
+    M = rule_table.evaluate(X)
+    t2 = time.perf_counter()
+    rules, pairs = summarize(M, rule_table.names)
+    report = {"turns": len(rows), "load_seconds": round(t1 - t0, 3), "evaluate_seconds": round(t2 - t1, 4),
+              "rules": rules, "pairs": [{"rules": [a, b], "turns": c} for a, b, c in pairs[:args.top_pairs]]}
+    if args.by:
+        keys = np.array([str(r.get(args.by) or "unknown") for r in rows])
+        report["by_" + args.by] = {k: summarize(M[keys == k], rule_table.names)[0] for k in sorted(set(keys.tolist()))}
+    if args.json:
+        print(json.dumps(report, indent=2)); return
+    print(f"{len(rows)} turns (load {report['load_seconds']}s, evaluate {report['evaluate_seconds']}s)")
+    for name, r in rules.items():
+        print(f"  {name:<24}{r['turns']:>10}  {r['share']:>7.2%}")
+    if pairs:
+        print("fired together:")
+        for a, b, c in pairs[:args.top_pairs]:
+            print(f"  {a} + {b}: {c}")
+    for k, table in report.get("by_" + (args.by or ""), {}).items():
+        print(f"{args.by}={k}: " + ", ".join(f"{n}={r['turns']}" for n, r in table.items() if r["turns"]))
+
+if __name__ == "__main__":
+    main()
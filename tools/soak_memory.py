@@ -0,0 +1,224 @@
+"""Memory soak test: replay synthetic turns in-process and track heap growth.
+
+Each synthetic conversation is one of the scripted scenarios (2.1–2.5) under a new
+session id and runs through server.run_turn with the local keyword
+analyzer, so no network is involved. Every --interval turns the tool records
+traced heap size (tracemalloc) and the item count and estimated size of each
+long-lived container (store.messages, store.interactions, store.feedback,
+store.sessions, store.tickets, rate_limit.buckets, billing_store.requests and
+its indexes, the push backlog, idempotency and sentiment caches, the stats ring,
+the routing queues, ...).
+
+Usage (from project root):
+
+python tools/soak_memory.py --turns 200000 --interval 20000
+python tools/soak_memory.py --turns 2000000 --json soak.json --csv soak.csv --max-bytes-per-turn 4096
+
+Reports bytes per turn and per session (total and per container) and the top
+allocation sites by growth. --json writes the full report, --csv one row per
+snapshot for dashboards. Exits 1 when --max-bytes-per-turn is exceeded.
+"""
+import sys, os, csv, gc, json, time, random, argparse, logging, tracemalloc
+from itertools import islice
+proj = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proj)
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+
+from natlang import server as srv
+from natlang import rate_limit
+from natlang.storage import store
+from natlang.billing_store import billing_store
+from natlang.notifications import notification_scheduler
+from natlang.agent_selector import routing_engine
+from natlang.local_sentiment import analyze_text_local
+from natlang.lexicon import scan
+from natlang.audit import audit_bus
+from natlang.push import push_hub
+from natlang.idempotency import idempotency_cache
+from natlang.sentiment_cache import sentiment_cache
+from natlang.stats import live_stats
+
+SCENARIOS = [
+    [("Outage Assist", None), ("my power is still out and I'm getting impatient", "ACCT-MERCURY"), ("no", "ACCT-MERCURY"), ("yes", "ACCT-MERCURY")],
+    [("Outage Assist", None), ("my power is still out and I'm getting impatient", "ACCT-MERCURY"), ("no", "ACCT-MERCURY"), ("no", "ACCT-MERCURY"),
+     ("I need SMS updates every hour until restored", "ACCT-MERCURY")],
+    [("Outage Assist", None), ("this f*** power is still out!", "ACCT-PRINCE")],
+    [("I am afraid about the situation outside", None), ("no", None)],
+    [("I was overcharged on my bill this month", "ACCT-BOWIE"), ("10:30am", "ACCT-BOWIE"), ("yes", "ACCT-BOWIE")],
+    [("I'm disappointed with the billing service on my last case", "ACCT-NICKS"), ("I don't have it", "ACCT-NICKS"),
+     ("the representative hung up on me", "ACCT-NICKS")],
+]
+
+# name -> container; every one of these lives for the life of the process
+CONTAINERS = {
+    "store.messages": lambda: store.messages,
+    "store.interactions": lambda: store.interactions,
+    "store.feedback": lambda: store.feedback,
+    "store.sessions": lambda: store.sessions,
+    "store.tickets": lambda: store.tickets,
+    "rate_limit.buckets": lambda: rate_limit.buckets,
+    "billing_store.requests": lambda: billing_store.requests,
+    "notifications.jobs": lambda: notification_scheduler.jobs,
+    "routing.assignments": lambda: routing_engine.assignments,
+    "routing.queued": lambda: routing_engine.queued,
+    "routing.queues": lambda: routing_engine.queues,
+    "routing.expiry": lambda: routing_engine._expiry,
+    "billing_store.by_time": lambda: billing_store.by_time.keys,
+    "billing_store.by_account": lambda: billing_store.by_account,
+    "billing_store.by_issue": lambda: billing_store.by_issue,
+    "push.backlog": lambda: push_hub.backlog,
+    "push.ticket_sessions": lambda: push_hub.ticket_sessions,
+    "idempotency.entries": lambda: idempotency_cache.entries,
+    "sentiment_cache.buckets": lambda: sentiment_cache.buckets,
+    "stats.slots": lambda: live_stats.counter.slots,
+    "stats.totals": lambda: live_stats.counter.totals,
+}
+
+
+def deep_sizeof(obj, seen=None) -> int:
+    """sys.getsizeof over the object graph (dicts, sequences, sets, __dict__/__slots__), counting shared objects once."""
+    seen = set() if seen is None else seen
+    stack, total = [obj], 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o)); total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys()); stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)) or type(o).__name__ == "deque":
+            stack.extend(o)
+        elif not isinstance(o, (str, bytes, int, float, bool, type(None))):
+            if hasattr(o, "__dict__"): stack.append(o.__dict__)
+            for slot in getattr(type(o), "__slots__", ()):
+                if hasattr(o, slot): stack.append(getattr(o, slot))
+    return total
+
+
+def container_size(c, sample: int) -> int:
+    """Estimated deep size: the container itself plus the mean size of up to `sample` most recent items times its length."""
+    n = len(c)
+    if not n:
+        return sys.getsizeof(c)
+    if isinstance(c, dict):
+        items = list(islice(reversed(c.items()), sample))
+    else:
+        items = list(islice(reversed(c), sample))
+    seen = set()
+    per_item = sum(deep_sizeof(i, seen) for i in items) / len(items)
+    return int(sys.getsizeof(c) + per_item * n)
+
+
+def snapshot_row(turns, sessions, t0, sample):
+    current, peak = tracemalloc.get_traced_memory()
+    row = {"turns": turns, "sessions": sessions, "elapsed_s": round(time.perf_counter() - t0, 2),
+           "traced_bytes": current, "traced_peak_bytes": peak}
+    for name, get in CONTAINERS.items():
+        c = get()
+        row[f"{name}.items"] = len(c)
+        row[f"{name}.bytes"] = container_size(c, sample)
+    return row
+
+
+def top_sites(start, end, limit):
+    stats = end.compare_to(start, "lineno")
+    out = []
+    for s in stats:
+        if s.size_diff <= 0: continue
+        frame = s.traceback[0]
+        if frame.filename.endswith(("tracemalloc.py", "soak_memory.py")): continue
+        out.append({"site": f"{os.path.relpath(frame.filename, proj)}:{frame.lineno}", "size_diff_bytes": s.size_diff, "count_diff": s.count_diff})
+        if len(out) >= limit: break
+    return out
+
+
+def per_unit(rows, key, unit):
+    first, last = rows[0], rows[-1]
+    d = last[unit] - first[unit]
+    return round((last[key] - first[key]) / d, 1) if d else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="In-process memory soak test")
+    ap.add_argument("--turns", type=int, default=100_000)
+    ap.add_argument("--interval", type=int, default=10_000, help="turns between snapshots")
+    ap.add_argument("--top", type=int, default=15, help="allocation sites to report")
+    ap.add_argument("--sample", type=int, default=200, help="items sampled per container for size estimates")
+    ap.add_argument("--frames", type=int, default=1, help="tracemalloc traceback depth")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--json", help="write the full report here")
+    ap.add_argument("--csv", help="write one row per snapshot here")
+    ap.add_argument("--max-bytes-per-turn", type=float, help="fail (exit 1) if traced growth per turn exceeds this")
+    args = ap.parse_args()
+
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("natlang"): logging.getLogger(name).setLevel(logging.WARNING)
+    srv.analyze_text = analyze_text_local
+    rng = random.Random(args.seed)
+
+    # warm caches and import-time structures so they do not count as growth
+    for conv in SCENARIOS:
+        for text, _ in conv: scan(text)
+    gc.collect()
+    tracemalloc.start(args.frames)
+    base = tracemalloc.take_snapshot()
+    t0 = time.perf_counter()
+    rows = [snapshot_row(0, 0, t0, args.sample)]
+    turns = sessions = 0
+    next_snap = args.interval
+    while turns < args.turns:
+        sessions += 1
+        sid = f"soak-{sessions}"
+        for text, acct in rng.choice(SCENARIOS):
+            try:
+                srv.run_turn(srv.ChatRequest(session_id=sid, text=text, account_number=acct))
+            except srv.HTTPException:
+                pass
+            turns += 1
+        if turns >= next_snap:
+            audit_bus.flush(); gc.collect()
+            rows.append(snapshot_row(turns, sessions, t0, args.sample))
+            r = rows[-1]
+            print(f"  turns={turns:>9,} sessions={sessions:>8,} traced={r['traced_bytes'] / 1e6:>9.1f} MB "
+                  f"({per_unit(rows, 'traced_bytes', 'turns'):,.0f} B/turn)", file=sys.stderr)
+            next_snap += args.interval
+    if rows[-1]["turns"] != turns:
+        audit_bus.flush(); gc.collect()
+        rows.append(snapshot_row(turns, sessions, t0, args.sample))
+    sites = top_sites(base, tracemalloc.take_snapshot(), args.top)
+    tracemalloc.stop()
+
+    report = {
+        "turns": turns, "sessions": sessions, "elapsed_s": rows[-1]["elapsed_s"],
+        "bytes_per_turn": per_unit(rows, "traced_bytes", "turns"),
+        "bytes_per_session": per_unit(rows, "traced_bytes", "sessions"),
+        "containers": {name: {"items": rows[-1][f"{name}.items"], "bytes": rows[-1][f"{name}.bytes"],
+                              "items_per_turn": per_unit(rows, f"{name}.items", "turns"),
+                              "bytes_per_turn": per_unit(rows, f"{name}.bytes", "turns"),
+                              "bytes_per_session": per_unit(rows, f"{name}.bytes", "sessions")}
+                       for name in CONTAINERS},
+        "top_allocation_sites": sites,
+        "snapshots": rows,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(report, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0])); w.writeheader(); w.writerows(rows)
+
+    print(f"\n{turns:,} turns / {sessions:,} sessions in {report['elapsed_s']}s: "
+          f"{report['bytes_per_turn']:,.0f} B/turn, {report['bytes_per_session']:,.0f} B/session (traced heap)")
+    print(f"{'container':<26}{'items':>12}{'MB':>10}{'B/turn':>10}{'B/session':>12}")
+    for name, c in sorted(report["containers"].items(), key=lambda kv: -kv[1]["bytes"]):
+        print(f"{name:<26}{c['items']:>12,}{c['bytes'] / 1e6:>10.2f}{c['bytes_per_turn']:>10,.0f}{c['bytes_per_session']:>12,.0f}")
+    print("\ntop allocation sites by growth:")
+    for s in sites:
+        print(f"  {s['size_diff_bytes'] / 1e6:>9.2f} MB {s['count_diff']:>10,} blocks  {s['site']}")
+    if args.max_bytes_per_turn is not None and report["bytes_per_turn"] > args.max_bytes_per_turn:
+        print(f"\nFAIL: {report['bytes_per_turn']:,.0f} B/turn exceeds --max-bytes-per-turn {args.max_bytes_per_turn:,.0f}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Train the local distilled sentiment/intent model from interaction journals.
+
+Input is JSONL with one interaction-journal record per line, as kept in
+store.interactions: {"session_id", "user_text", "bot_text", "sentiment": {...}, "ts"},
+or an interactions export from a running server (tools/export_data.py
+interactions, JSONL or Parquet). Only LLM-labelled rows are used (menu turns, local-model / fallback predictions
+and LLM-error placeholders are skipped).
+
+Usage (from project root):
+
+python tools/train_local_model.py interactions.jsonl [more.jsonl ...]
+python tools/export_data.py interactions --out export.jsonl && python tools/train_local_model.py export.jsonl
+python tools/train_local_model.py interactions.jsonl --out models/sentiment_local.npz --epochs 80 --min-confidence 0.9
+
+Holds out --holdout of the rows, prints accuracy and how much of the held-out
+traffic the confidence gate would serve locally, then refits on everything and
+writes the model. The server loads it from LOCAL_MODEL_PATH at startup.
+"""
+import sys, os, json, argparse, time
+import numpy as np
+proj = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proj)
+os.environ.setdefault("GEMINI_API_KEY", "DUMMY")
+from natlang.local_model import load_journal, train, evaluate
+from natlang.config import LOCAL_MODEL_PATH, LOCAL_MODEL_MIN_CONFIDENCE
+
+def main():
+    ap = argparse.ArgumentParser(description="Train the local sentiment/intent model")
+    ap.add_argument("journals", nargs="+", help="interaction journal / export files (.jsonl or .parquet)")
+    ap.add_argument("--out", default=LOCAL_MODEL_PATH)
+    ap.add_argument("--epochs", type=int, default=60)
+    ap.add_argument("--lr", type=float, default=0.05)
+    ap.add_argument("--l2", type=float, default=1e-4)
+    ap.add_argument("--holdout", type=float, default=0.2, help="fraction held out for evaluation (0 to skip)")
+    ap.add_argument("--min-confidence", type=float, default=LOCAL_MODEL_MIN_CONFIDENCE)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    texts, Y = load_journal(args.journals)
+    if not texts:
+        raise SystemExit("no LLM-labelled rows found in the journals")
+    print(f"{len(texts)} labelled turns", file=sys.stderr)
+    report = {"examples": len(texts)}
+    if args.holdout > 0 and len(texts) >= 10:
+        order = np.random.default_rng(args.seed).permutation(len(texts))
+        cut = int(len(texts) * (1 - args.holdout))
+        tr, te = order[:cut], order[cut:]
+        model = train([texts[i] for i in tr], Y[tr], epochs=args.epochs, lr=args.lr, l2=args.l2, seed=args.seed)
+        report["holdout"] = evaluate(model, [texts[i] for i in te], Y[te], args.min_confidence)
+    model = train(texts, Y, epochs=args.epochs, lr=args.lr, l2=args.l2, seed=args.seed)
+    model.meta.update({"trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "min_confidence": args.min_confidence})
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    model.save(args.out)
+    t0 = time.perf_counter(); n = min(len(texts), 500)
+    for t in texts[:n]: model.predict(t)
+    report["predict_us"] = round((time.perf_counter() - t0) / n * 1e6, 1)
+    report["model"] = args.out
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
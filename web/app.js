@@ -29,6 +29,7 @@ function appendMsg(role, text, meta={}){
   }
   log.appendChild(div);
   log.scrollTop = log.scrollHeight;
+  return div;
 }
 
 function escapeHtml(str){
@@ -47,6 +48,89 @@ function getSession(){
   return sid;
 }
 
+function newIdempotencyKey(){
+  if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2,12)}`;
+}
+
+// Resend on network failure with the same key: the server replays the original reply
+async function postChat(body, retries = 2){
+  for (let attempt = 0; ; attempt++){
+    try{
+      return await fetch("/chat", {
+        method: "POST",
+        headers: {"Content-Type":"application/json", "Idempotency-Key": body.idempotency_key},
+        body: JSON.stringify(body)
+      });
+    }catch(e){
+      if (attempt >= retries) throw e;
+      await new Promise(r => setTimeout(r, 500 * (attempt + 1)));
+    }
+  }
+}
+
+// Server-pushed events: replies to /chat/async, ticket updates, outage notifications.
+// EventSource reconnects by itself and resumes from the last event id it saw.
+let events = null, eventsSession = null;
+const pending = new Map();  // receipt_id -> "..." bubble awaiting its reply
+
+function openEvents(sid){
+  if (!window.EventSource || eventsSession === sid) return;
+  if (events) events.close();
+  pending.clear(); early.clear();
+  eventsSession = sid;
+  events = new EventSource(`/events/${encodeURIComponent(sid)}`);
+  const onEvent = (name, fn) => events.addEventListener(name, e => fn(JSON.parse(e.data)));
+  onEvent("reply", data => deliver(data, () =>
+    appendMsg("bot", data.reply, { meta: {ticket: data.ticket_id, correlation_id: data.correlation_id, ...data.meta} })));
+  // not "error": EventSource fires its own data-less "error" event on every dropped connection
+  onEvent("turn_error", data => deliver(data, () => appendMsg("bot", data.detail || "Error")));
+  onEvent("ticket_update", data => {
+    const what = data.update === "closed" ? "has been closed" : `is now with agent ${data.assigned_agent_id}`;
+    appendMsg("bot", `Ticket ${data.ticket_id} ${what}.`);
+  });
+  onEvent("notification", data => appendMsg("bot", data.message, { meta: {ticket: data.ticket_id} }));
+}
+
+// The pushed reply can beat the 202 response; hold it until the receipt is known.
+// Replays of already-rendered replies after a reconnect are never claimed.
+const early = new Map();
+function deliver(data, render){
+  const div = pending.get(data.receipt_id);
+  if (div === undefined){
+    early.set(data.receipt_id, render);
+    return;
+  }
+  pending.delete(data.receipt_id);
+  div.remove();
+  render();
+}
+
+function awaitReply(receiptId){
+  const render = early.get(receiptId);
+  if (render){
+    early.delete(receiptId);
+    render();
+  }else{
+    pending.set(receiptId, appendMsg("bot pending", "…"));
+  }
+}
+
+async function postAsync(body, retries = 2){
+  for (let attempt = 0; ; attempt++){
+    try{
+      return await fetch("/chat/async", {
+        method: "POST",
+        headers: {"Content-Type":"application/json", "Idempotency-Key": body.idempotency_key},
+        body: JSON.stringify(body)
+      });
+    }catch(e){
+      if (attempt >= retries) throw e;
+      await new Promise(r => setTimeout(r, 500 * (attempt + 1)));
+    }
+  }
+}
+
 async function sendMsg(){
   const text = input.value.trim();
   if (!text) return;
@@ -56,12 +140,25 @@ async function sendMsg(){
   appendMsg("user", text);
   input.value = "";
 
+  const body = { session_id: sid, text, account_number: account, idempotency_key: newIdempotencyKey() };
+  openEvents(sid);
+  if (events && events.readyState === EventSource.OPEN){
+    try{
+      const res = await postAsync(body);
+      const data = await res.json();
+      if (!res.ok){
+        appendMsg("bot", data.detail || "Error");
+        return;
+      }
+      awaitReply(data.receipt_id);
+      return;
+    }catch(e){
+      console.error(e);  // fall through to the synchronous endpoint with the same key
+    }
+  }
+
   try{
-    const res = await fetch("/chat", {
-      method: "POST",
-      headers: {"Content-Type":"application/json"},
-      body: JSON.stringify({ session_id: sid, text, account_number: account })
-    });
+    const res = await postChat(body);
     const data = await res.json();
     if (!res.ok){
       appendMsg("bot", data.detail || "Error");
@@ -86,5 +183,5 @@ function showGreeting(){
     ]
   });
 }
-getSession();
+openEvents(getSession());
 showGreeting();